@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Agent Database Access Layer
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Long-lived SQLite connections for the agents, usable from async code
+without blocking the event loop.
+
+Writes are queued to one dedicated writer thread that owns the only write
+connection. Whatever is queued when the writer wakes up is committed as a
+single transaction (each job in its own savepoint, so one failing job does
+not undo the others), which turns many small concurrent writes into one
+fsync. Reads run on a small pool of reader threads with their own
+connections; WAL mode lets them proceed while the writer commits.
+Connections live as long as the database object, so sqlite3's per-connection
+statement cache keeps reusing prepared statements.
+"""
+
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -65536,   # KiB
+    "temp_store": "MEMORY",
+}
+
+_CLOSE = object()
+
+
+class AgentDatabase:
+    """Writer thread plus reader pool over one SQLite database file"""
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None,
+                 readers: int = 2, max_batch: int = 512, cached_statements: int = 256):
+        self.db_path = db_path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.max_batch = max_batch
+        self.cached_statements = cached_statements
+
+        self._write_queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name=f"agent-db-writer:{db_path}", daemon=True)
+        self._writer.start()
+
+        self._reader_local = threading.local()
+        self._reader_connections: List[sqlite3.Connection] = []
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="agent-db-reader")
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly by the writer.
+        # Each connection is only used by the thread that opened it; close() runs elsewhere.
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    # Writes
+
+    def submit_write(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue `fn(conn)` for the writer; the future resolves once its transaction commits"""
+        if self._closed:
+            raise RuntimeError("AgentDatabase is closed")
+        future: Future = Future()
+        self._write_queue.put((fn, future))
+        return future
+
+    async def run_write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit_write(fn))
+
+    def write_sync(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return self.submit_write(fn).result()
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Run one write statement; returns lastrowid"""
+        return await self.run_write(lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, rows: Iterable[Sequence]) -> int:
+        """Run one write statement for every row; returns the number of rows affected"""
+        rows = list(rows)
+        return await self.run_write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                jobs = [self._write_queue.get()]
+                while len(jobs) < self.max_batch:
+                    try:
+                        jobs.append(self._write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                closing = any(job is _CLOSE for job in jobs)
+                jobs = [job for job in jobs if job is not _CLOSE and job[1].set_running_or_notify_cancel()]
+                if jobs:
+                    self._commit_batch(conn, jobs)
+                if closing:
+                    return
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, jobs: list):
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, _future in jobs:
+                conn.execute("SAVEPOINT job")
+                try:
+                    outcomes.append((True, fn(conn)))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    outcomes.append((False, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Error committing write batch of {len(jobs)} jobs: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _fn, future in jobs:
+                future.set_exception(e)
+            return
+
+        for (_fn, future), (ok, value) in zip(jobs, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    # Reads
+
+    def _reader_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._reader_local, "conn", None)
+        if conn is None:
+            conn = self._reader_local.conn = self._connect()
+            self._reader_connections.append(conn)
+        return conn
+
+    def submit_read(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        return self._readers.submit(lambda: fn(self._reader_connection()))
+
+    async def run_read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.wrap_future(self.submit_read(fn))
+
+    def read_sync(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return self.submit_read(fn).result()
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return await self.run_read(lambda conn: conn.execute(sql, params).fetchall())
+
+    def fetchall_sync(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        return self.read_sync(lambda conn: conn.execute(sql, params).fetchall())
+
+    def close(self):
+        """Commit everything already queued, then close all connections"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put(_CLOSE)
+        self._writer.join()
+        self._readers.shutdown(wait=True)
+        for conn in self._reader_connections:
+            conn.close()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Alert Manager
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Deduplicates the monitor's system_alerts. An alert is identified by a
+fingerprint of its type and key dimensions, and at most one alert per
+fingerprint is active. While a condition keeps firing, the active alert's
+occurrence count and last_seen time are updated instead of adding rows;
+it is notified (logged) again only every renotify interval, and resolved
+as soon as the check finds the condition cleared.
+
+Active alerts are indexed in memory, loaded from the table at startup,
+so firing needs no reads. Repeat firings are written back at most once
+per persist interval, which bounds the write rate by the number of
+distinct active alerts rather than by how often the checks run.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from write_buffer import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RENOTIFY_INTERVAL = 3600.0  # seconds between notifications of a still-active alert
+DEFAULT_PERSIST_INTERVAL = 300.0    # seconds between writes of repeat firings
+
+INSERT_ALERT = '''
+    INSERT INTO system_alerts (
+        alert_type, severity, message, details, status, created_at,
+        fingerprint, occurrences, last_seen, notified_at
+    ) VALUES (?, ?, ?, ?, 'active', ?, ?, ?, ?, ?)
+'''
+
+UPDATE_ALERT = '''
+    UPDATE system_alerts
+    SET severity = ?, message = ?, details = ?, occurrences = ?, last_seen = ?, notified_at = ?
+    WHERE fingerprint = ? AND status = 'active'
+'''
+
+RESOLVE_ALERT = '''
+    UPDATE system_alerts
+    SET status = 'resolved', resolved_at = ?, occurrences = ?, last_seen = ?
+    WHERE fingerprint = ? AND status = 'active'
+'''
+
+
+def create_tables(conn):
+    """Add the deduplication columns to older system_alerts tables"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(system_alerts)")}
+    for column, definition in (
+        ("fingerprint", "TEXT"),
+        ("occurrences", "INTEGER DEFAULT 1"),
+        ("last_seen", "TEXT"),
+        ("notified_at", "TEXT"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE system_alerts ADD COLUMN {column} {definition}")
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS ix_system_alerts_fingerprint
+        ON system_alerts (fingerprint, status)
+    ''')
+
+
+def fingerprint(alert_type: str, key: Optional[Dict[str, Any]] = None) -> str:
+    """Stable id for an alert type and its key dimensions"""
+    identity = json.dumps([alert_type, key or {}], sort_keys=True, default=str)
+    return hashlib.sha1(identity.encode()).hexdigest()[:16]
+
+
+@dataclass
+class ActiveAlert:
+    """In-memory state of an active alert"""
+    fingerprint: str
+    alert_type: str
+    severity: str
+    message: str
+    details: Optional[str]
+    created_at: str
+    occurrences: int
+    last_seen: str
+    notified_at: str
+    notified: float     # time.monotonic() of the last notification
+    persisted: float    # time.monotonic() of the last write
+    dirty: bool = False
+
+
+class AlertManager:
+    """Fires and resolves fingerprinted alerts against an in-memory index of active ones"""
+
+    def __init__(self, db, write_buffer: WriteBehindBuffer,
+                 renotify_interval: float = DEFAULT_RENOTIFY_INTERVAL,
+                 renotify_intervals: Optional[Dict[str, float]] = None,
+                 persist_interval: float = DEFAULT_PERSIST_INTERVAL):
+        self.db = db
+        self.write_buffer = write_buffer
+        self.renotify_interval = renotify_interval
+        self.renotify_intervals = renotify_intervals or {}  # per alert type
+        self.persist_interval = persist_interval
+        self.active: Dict[str, ActiveAlert] = {}
+        self._load()
+
+    def _load(self):
+        def load(conn):
+            rows = conn.execute('''
+                SELECT id, fingerprint, alert_type, severity, message, details, created_at,
+                       COALESCE(occurrences, 1), COALESCE(last_seen, created_at), COALESCE(notified_at, created_at)
+                FROM system_alerts
+                WHERE status = 'active'
+                ORDER BY id
+            ''').fetchall()
+
+            latest = {}
+            for row in rows:
+                # Alerts from before fingerprinting are keyed by type alone
+                latest[row[1] or fingerprint(row[2])] = row
+            duplicates = [(row[0],) for row in rows if latest[row[1] or fingerprint(row[2])] is not row]
+
+            # Keep the newest active alert per fingerprint and resolve the rest
+            now = datetime.utcnow().isoformat()
+            conn.executemany(
+                "UPDATE system_alerts SET status = 'resolved', resolved_at = ? WHERE id = ?",
+                [(now, alert_id) for (alert_id,) in duplicates]
+            )
+            conn.executemany(
+                "UPDATE system_alerts SET fingerprint = ? WHERE id = ? AND fingerprint IS NULL",
+                [(alert_fingerprint, row[0]) for alert_fingerprint, row in latest.items()]
+            )
+            return latest, len(duplicates)
+
+        latest, duplicates = self.db.write_sync(load)
+        # Timestamps in the table are wall clock; notifications restart their interval from now
+        started = time.monotonic()
+        self.active = {
+            alert_fingerprint: ActiveAlert(alert_fingerprint, alert_type, severity, message, details, created_at,
+                                           occurrences, last_seen, notified_at, started, started)
+            for alert_fingerprint, (_id, _fp, alert_type, severity, message, details, created_at,
+                                    occurrences, last_seen, notified_at) in latest.items()
+        }
+        if duplicates:
+            logger.info(f"Resolved {duplicates} duplicate active alerts")
+        logger.info(f"Loaded {len(self.active)} active alerts")
+
+    def fire(self, alert_type: str, severity: str, message: str, details: Dict[str, Any] = None,
+             key: Optional[Dict[str, Any]] = None) -> bool:
+        """Record that a condition holds; returns True if it was notified"""
+        alert_fingerprint = fingerprint(alert_type, key)
+        details_json = json.dumps(details) if details else None
+        now, timestamp = time.monotonic(), datetime.utcnow().isoformat()
+
+        alert = self.active.get(alert_fingerprint)
+        if alert is None:
+            self.active[alert_fingerprint] = ActiveAlert(
+                alert_fingerprint, alert_type, severity, message, details_json, timestamp,
+                1, timestamp, timestamp, now, now
+            )
+            self.write_buffer.add(INSERT_ALERT, [(
+                alert_type, severity, message, details_json, timestamp,
+                alert_fingerprint, 1, timestamp, timestamp
+            )])
+            logger.warning(f"Alert created: [{severity.upper()}] {alert_type}: {message}")
+            return True
+
+        alert.severity, alert.message, alert.details = severity, message, details_json
+        alert.occurrences += 1
+        alert.last_seen = timestamp
+        alert.dirty = True
+
+        notify = now - alert.notified >= self.renotify_intervals.get(alert_type, self.renotify_interval)
+        if notify:
+            alert.notified, alert.notified_at = now, timestamp
+            logger.warning(f"Alert still active: [{severity.upper()}] {alert_type}: {message} "
+                           f"({alert.occurrences} occurrences since {alert.created_at})")
+        if notify or now - alert.persisted >= self.persist_interval:
+            self._persist(alert, now)
+        return notify
+
+    def resolve(self, alert_type: str, key: Optional[Dict[str, Any]] = None) -> bool:
+        """Record that a condition has cleared; returns True if an active alert was resolved"""
+        alert = self.active.get(fingerprint(alert_type, key))
+        if alert is None:
+            return False
+        self._resolve(alert)
+        return True
+
+    def resolve_except(self, alert_type: str, keys: Iterable[Optional[Dict[str, Any]]]) -> int:
+        """Resolve every active `alert_type` alert except those for `keys`; returns how many"""
+        keep = {fingerprint(alert_type, key) for key in keys}
+        stale = [alert for alert in self.active.values()
+                 if alert.alert_type == alert_type and alert.fingerprint not in keep]
+        for alert in stale:
+            self._resolve(alert)
+        return len(stale)
+
+    def _resolve(self, alert: ActiveAlert):
+        del self.active[alert.fingerprint]
+        self.write_buffer.add(RESOLVE_ALERT, [(
+            datetime.utcnow().isoformat(), alert.occurrences, alert.last_seen, alert.fingerprint
+        )])
+        logger.info(f"Alert resolved: {alert.alert_type}: {alert.message} ({alert.occurrences} occurrences)")
+
+    def flush(self):
+        """Buffer the latest counts of every active alert with unwritten firings"""
+        now = time.monotonic()
+        for alert in self.active.values():
+            if alert.dirty:
+                self._persist(alert, now)
+
+    def _persist(self, alert: ActiveAlert, now: float):
+        self.write_buffer.add(UPDATE_ALERT, [(
+            alert.severity, alert.message, alert.details, alert.occurrences,
+            alert.last_seen, alert.notified_at, alert.fingerprint
+        )])
+        alert.persisted, alert.dirty = now, False
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Alert Rules
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Compiles the monitor's performance_thresholds into rule evaluators. A
+threshold names a metric series and any of:
+
+    min / max             bounds on the series' value or aggregate
+    target                reported in alert messages
+    aggregate             'value' (latest sample, default), 'avg' or 'delta'
+                          over the last window_minutes
+    window_minutes        window for 'avg' and 'delta' (default 60)
+    min_rate_per_hour /   bounds on the rate of change (per hour) over
+    max_rate_per_hour     rate_window_minutes (default 15)
+    for_minutes           how long a bound must stay breached before firing
+    severity              of the alert (default 'medium')
+    series                metric series to read (default: the threshold name)
+
+Samples are streamed in with observe(). Each series keeps its latest
+sample, and each (series, window) pair a RollingWindow of fixed slots
+with running totals, so adding a sample and evaluating a rule are O(1)
+and nothing is read back from the database.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+WINDOW_SLOTS = 60
+DEFAULT_WINDOW_MINUTES = 60
+DEFAULT_RATE_WINDOW_MINUTES = 15
+AGGREGATES = ("value", "avg", "delta")
+
+
+class RollingWindow:
+    """Sum, count and oldest sample of a series over the last `window` seconds.
+
+    The window is split into WINDOW_SLOTS slots holding per-slot totals
+    and the slot's first sample; slots leaving the window are subtracted
+    from the running totals. Slot resolution bounds the error, and memory
+    does not grow with the sample rate.
+    """
+
+    __slots__ = ("window", "width", "slots", "index", "sums", "counts", "first_ts", "first_value",
+                 "total", "count", "oldest", "newest", "last_ts", "last_value")
+
+    def __init__(self, window: float, slots: int = WINDOW_SLOTS):
+        self.window = window
+        self.width = window / slots
+        self.slots = slots
+        self.index: List[Optional[int]] = [None] * slots
+        self.sums = [0.0] * slots
+        self.counts = [0] * slots
+        self.first_ts = [0.0] * slots
+        self.first_value = [0.0] * slots
+        self.total = 0.0
+        self.count = 0
+        self.oldest: Optional[int] = None  # lowest live slot number
+        self.newest: Optional[int] = None
+        self.last_ts = 0.0
+        self.last_value = 0.0
+
+    def add(self, timestamp: float, value: float):
+        slot = int(timestamp // self.width)
+        if self.newest is not None and slot <= self.newest - self.slots:
+            return  # older than the window
+        self.expire(timestamp)
+
+        position = slot % self.slots
+        if self.index[position] != slot:
+            self.index[position] = slot
+            self.sums[position] = 0.0
+            self.counts[position] = 0
+            self.first_ts[position] = timestamp
+            self.first_value[position] = value
+            if self.oldest is None or slot < self.oldest:
+                self.oldest = slot
+        elif timestamp < self.first_ts[position]:
+            self.first_ts[position] = timestamp
+            self.first_value[position] = value
+        self.sums[position] += value
+        self.counts[position] += 1
+        self.total += value
+        self.count += 1
+
+        if self.newest is None or slot >= self.newest:
+            self.newest = slot
+            self.last_ts, self.last_value = timestamp, value
+
+    def expire(self, now: float):
+        """Drop slots that are entirely older than `now - window`"""
+        if self.oldest is None:
+            return
+        limit = int(now // self.width) - self.slots  # slots up to here are out
+        if limit >= self.newest:
+            self._clear()
+            return
+        while self.oldest <= limit or self.index[self.oldest % self.slots] != self.oldest:
+            position = self.oldest % self.slots
+            if self.index[position] == self.oldest:
+                self.total -= self.sums[position]
+                self.count -= self.counts[position]
+                self.index[position] = None
+            self.oldest += 1
+
+    def _clear(self):
+        self.index = [None] * self.slots
+        self.total, self.count = 0.0, 0
+        self.oldest = self.newest = None
+
+    def average(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def first(self) -> Optional[Tuple[float, float]]:
+        """(timestamp, value) of the oldest sample still in the window"""
+        if self.oldest is None:
+            return None
+        position = self.oldest % self.slots
+        return self.first_ts[position], self.first_value[position]
+
+
+@dataclass
+class Rule:
+    """One compiled threshold check; `breached_since` is its only evaluation state"""
+    name: str
+    series: str
+    check: str                  # 'level' or 'rate'
+    severity: str
+    aggregate: str = "value"
+    window: Optional[RollingWindow] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    target: Optional[float] = None
+    for_seconds: float = 0.0
+    breached_since: Optional[float] = None
+
+    @property
+    def key(self) -> Optional[Dict[str, str]]:
+        """Alert key dimensions; level rules alert under the threshold name alone"""
+        return {"check": self.check} if self.check != "level" else None
+
+    def measure(self, latest: Optional[Tuple[float, float]]) -> Optional[float]:
+        """Current value of what this rule bounds, or None without enough data"""
+        if self.check == "rate":
+            first = self.window.first()
+            if first is None or self.window.last_ts <= first[0]:
+                return None
+            return (self.window.last_value - first[1]) / (self.window.last_ts - first[0]) * 3600
+        if self.aggregate == "avg":
+            return self.window.average()
+        if self.aggregate == "delta":
+            first = self.window.first()
+            # A change over a window is only meaningful once the series spans it
+            if first is None or self.window.last_ts - first[0] < self.window.window - self.window.width:
+                return None
+            return self.window.last_value - first[1]
+        return latest[1] if latest else None
+
+    def describe(self, value: float) -> str:
+        label = self.name.replace('_', ' ').capitalize()
+        minutes = self.window.window / 60 if self.window else 0
+        if self.check == "rate":
+            bound = f"min {self.low:g}/hour" if self.low is not None and value < self.low else f"max {self.high:g}/hour"
+            return f"{label}: {self.series} changing by {value:+.4g}/hour over {minutes:g} minutes ({bound})"
+        measured = {
+            "value": self.series,
+            "avg": f"{minutes:g}-minute average of {self.series}",
+            "delta": f"change in {self.series} over {minutes:g} minutes",
+        }[self.aggregate]
+        if self.low is not None and value < self.low:
+            bound = f"below the minimum {self.low:g}"
+        else:
+            bound = f"above the maximum {self.high:g}"
+        target = f", target {self.target:g}" if self.target is not None else ""
+        return f"{label}: {measured} is {value:.4g}, {bound}{target}"
+
+
+def compile_rules(thresholds: Dict[str, Dict[str, Any]], windows: Dict[Tuple[str, float], RollingWindow]) -> List[Rule]:
+    """Rules for every threshold, registering the rolling windows they read in `windows`"""
+    def window(series: str, minutes: float) -> RollingWindow:
+        seconds = float(minutes) * 60
+        if (series, seconds) not in windows:
+            windows[(series, seconds)] = RollingWindow(seconds)
+        return windows[(series, seconds)]
+
+    rules = []
+    for name, spec in thresholds.items():
+        series = spec.get("series", name)
+        severity = spec.get("severity", "medium")
+        for_seconds = float(spec.get("for_minutes", 0)) * 60
+        aggregate = spec.get("aggregate", "value")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Threshold {name}: unknown aggregate {aggregate!r}")
+
+        if spec.get("min") is not None or spec.get("max") is not None:
+            rules.append(Rule(
+                name, series, "level", severity, aggregate,
+                window(series, spec.get("window_minutes", DEFAULT_WINDOW_MINUTES)) if aggregate != "value" else None,
+                spec.get("min"), spec.get("max"), spec.get("target"), for_seconds
+            ))
+        if spec.get("min_rate_per_hour") is not None or spec.get("max_rate_per_hour") is not None:
+            rules.append(Rule(
+                name, series, "rate", severity, "value",
+                window(series, spec.get("rate_window_minutes", DEFAULT_RATE_WINDOW_MINUTES)),
+                spec.get("min_rate_per_hour"), spec.get("max_rate_per_hour"), None, for_seconds
+            ))
+    return rules
+
+
+class RuleEngine:
+    """Streams metric samples into rolling state and evaluates the compiled rules against it"""
+
+    def __init__(self, thresholds: Dict[str, Dict[str, Any]]):
+        self.windows: Dict[Tuple[str, float], RollingWindow] = {}
+        self.rules = compile_rules(thresholds, self.windows)
+        self.latest: Dict[str, Tuple[float, float]] = {}
+        self._series_windows: Dict[str, List[RollingWindow]] = {}
+        for (series, _seconds), rolling in self.windows.items():
+            self._series_windows.setdefault(series, []).append(rolling)
+
+    def observe(self, series: str, value: float, timestamp: Optional[float] = None):
+        """Add one sample of `series`, stamped `timestamp` (epoch seconds, default now)"""
+        timestamp = time.time() if timestamp is None else timestamp
+        latest = self.latest.get(series)
+        if latest is None or timestamp >= latest[0]:
+            self.latest[series] = (timestamp, value)
+        for rolling in self._series_windows.get(series, ()):
+            rolling.add(timestamp, value)
+
+    def evaluate(self, now: Optional[float] = None) -> List[Tuple[Rule, bool, Optional[str]]]:
+        """(rule, firing, message) for every rule whose series has data.
+
+        A rule fires once its bound has been breached for its for_minutes;
+        a windowed rule whose window has emptied counts as not breached.
+        """
+        now = time.time() if now is None else now
+        for rolling in self.windows.values():
+            rolling.expire(now)
+
+        results = []
+        for rule in self.rules:
+            latest = self.latest.get(rule.series)
+            if latest is None:
+                continue
+            value = rule.measure(latest)
+            breached = value is not None and (
+                (rule.low is not None and value < rule.low) or (rule.high is not None and value > rule.high)
+            )
+            if not breached:
+                rule.breached_since = None
+                results.append((rule, False, None))
+                continue
+            if rule.breached_since is None:
+                rule.breached_since = now
+            firing = now - rule.breached_since >= rule.for_seconds
+            results.append((rule, firing, rule.describe(value) if firing else None))
+        return results
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Scores the newest points of many regular metric series at once with four
+detectors:
+
+    ewma         deviation from the exponentially weighted mean, in EW
+                 standard deviations
+    zscore       deviation from the mean of the preceding window
+    seasonal     deviation from the series' mean for the same hour of the
+                 week over its history
+    changepoint  shift between the means of the windows before and after
+                 each split point
+
+Series are rows of one (series x time) matrix with NaN for missing points,
+and every detector works on whole batches of rows with NumPy. Only the
+last `scored` columns are scored; history only contributes cumulative
+sums and per-hour-of-week totals, so the cost is one pass over the data.
+
+The monitor runs this over the hourly rollups of performance_metrics
+(system and platform series) and imports the module lazily, so NumPy is
+only needed where anomalies are detected.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from anomaly_settings import DETECTORS, DetectorSettings
+from metric_store import WEEK_OFFSET
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+
+
+@dataclass
+class Anomaly:
+    series: Tuple[str, str]     # (metric_type, metric_name)
+    detector: str
+    timestamp: int
+    value: float
+    score: float
+
+
+def hour_of_week(timestamps: np.ndarray) -> np.ndarray:
+    """0 for Monday 00:00 UTC up to 167"""
+    return ((timestamps - WEEK_OFFSET) // 3600) % HOURS_PER_WEEK
+
+
+def detect(series: Sequence[Tuple[str, str]], timestamps: np.ndarray, values: np.ndarray, scored: int,
+           settings: Optional[DetectorSettings] = None) -> List[Anomaly]:
+    """Anomalies among the last `scored` columns of `values` (one row per entry of `series`).
+
+    Each (series, detector) pair reports at most its highest-scoring point,
+    if that score is over the detector's threshold.
+    """
+    settings = settings or DetectorSettings()
+    series_count, length = values.shape
+    scored = max(1, min(scored, length))
+    clock_hours = timestamps // 3600
+    weekly_hours = hour_of_week(timestamps)
+    rows_per_batch = max(1, settings.batch_points // max(length, 1))
+
+    anomalies = []
+    for start in range(0, series_count, rows_per_batch):
+        batch = np.asarray(values[start:start + rows_per_batch], dtype=np.float64)
+        for detector, scores, columns in _score_batch(batch, clock_hours, weekly_hours, scored, settings):
+            # Scores are NaN where a detector lacks data; NaN never passes the comparison
+            with np.errstate(invalid="ignore"):
+                flagged = np.nonzero(scores > settings.threshold(detector))[0]
+            for row in flagged:
+                column = columns[row]
+                anomalies.append(Anomaly(
+                    tuple(series[start + row]), detector, int(timestamps[column]),
+                    float(batch[row, column]), float(scores[row])
+                ))
+    return anomalies
+
+
+def _score_batch(values: np.ndarray, clock_hours: np.ndarray, weekly_hours: np.ndarray, scored: int,
+                 settings: DetectorSettings) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    """(detector, best score per row, its column) for every detector"""
+    length = values.shape[1]
+    first = length - scored
+    results = []
+    with np.errstate(invalid="ignore", divide="ignore"):
+        detections = [
+            ("ewma", _ewma_scores(values, scored, settings.ewma_span), first),
+            ("zscore", _zscore_scores(values, scored, settings.zscore_window), first),
+        ]
+        if first > 0:
+            means, std = _seasonal_baseline(values, clock_hours, weekly_hours, first, settings.seasonal_min_samples)
+            detections.append(("seasonal", _seasonal_scores(values, weekly_hours, scored, means, std), first))
+
+            # Without the daily and weekly cycle, a cycle's rise or fall is not a changepoint;
+            # rows without a full baseline over the windows are taken as they are
+            low = max(0, first - 2 * settings.changepoint_window)
+            expected = means[:, weekly_hours[low:]]
+            expected[np.isnan(expected).any(axis=1)] = 0.0
+            z, offset = _changepoint_scores(values[:, low:] - expected, scored, settings.changepoint_window)
+            detections.append(("changepoint", z, offset + low))
+
+        for detector, z, offset in detections:
+            if z is None:
+                continue
+            magnitude = np.abs(z)
+            best = np.argmax(np.where(np.isnan(magnitude), -np.inf, magnitude), axis=1)
+            scores = magnitude[np.arange(len(values)), best]
+            results.append((detector, scores, best + offset))
+    return results
+
+
+def _std_floor(mean: np.ndarray) -> np.ndarray:
+    """Smallest standard deviation used, so flat series do not divide by zero"""
+    return 1e-6 * np.maximum(1.0, np.abs(mean))
+
+
+def _window_stats(values: np.ndarray, window: int, ends: np.ndarray):
+    """NaN-aware mean, standard deviation and count over [end - window, end) for each end"""
+    low = int(ends.min()) - window
+    block = values[:, low:int(ends.max())]
+    valid = ~np.isnan(block)
+    filled = np.where(valid, block, 0.0)
+
+    zeros = np.zeros((len(values), 1))
+    sums = np.hstack((zeros, np.cumsum(filled, axis=1)))
+    squares = np.hstack((zeros, np.cumsum(filled * filled, axis=1)))
+    counts = np.hstack((zeros, np.cumsum(valid, axis=1)))
+
+    stop, begin = ends - low, ends - low - window
+    count = counts[:, stop] - counts[:, begin]
+    mean = (sums[:, stop] - sums[:, begin]) / count
+    variance = np.maximum((squares[:, stop] - squares[:, begin]) / count - mean * mean, 0.0)
+    return mean, np.sqrt(variance), count
+
+
+def _zscore_scores(values: np.ndarray, scored: int, window: int) -> Optional[np.ndarray]:
+    length = values.shape[1]
+    if length - scored < window:
+        return None
+    columns = np.arange(length - scored, length)
+    mean, std, count = _window_stats(values, window, columns)
+    z = (values[:, columns] - mean) / np.maximum(std, _std_floor(mean))
+    z[count < window / 2] = np.nan
+    return z
+
+
+def _changepoint_scores(values: np.ndarray, scored: int, window: int):
+    """Split points lag the newest point by `window`, so the window after each split is complete"""
+    length = values.shape[1]
+    last = length - window
+    splits = np.arange(max(window, last - scored + 1), last + 1)
+    if len(splits) == 0:
+        return None, 0
+
+    before, before_std, before_count = _window_stats(values, window, splits)
+    after, after_std, after_count = _window_stats(values, window, splits + window)
+    pooled = np.sqrt((before_std ** 2 + after_std ** 2) / 2)
+    z = (after - before) / np.maximum(pooled, _std_floor(before))
+    z[(before_count < window / 2) | (after_count < window / 2)] = np.nan
+    return z, int(splits[0])
+
+
+def _ewma_scores(values: np.ndarray, scored: int, span: int) -> Optional[np.ndarray]:
+    """Deviation of each scored point from the EW mean and variance of the points before it.
+
+    The recursion runs over the columns, vectorized across series, and only
+    over enough history for the weights to settle (5 spans).
+    """
+    length = values.shape[1]
+    warm = min(length - scored, 5 * span)
+    if warm < span:
+        return None
+    tail = values[:, length - scored - warm:]
+    alpha = 2.0 / (span + 1)
+
+    seed = tail[:, :span]
+    seed_valid = ~np.isnan(seed)
+    seed_count = seed_valid.sum(axis=1)
+    seed_filled = np.where(seed_valid, seed, 0.0)
+    mean = seed_filled.sum(axis=1) / seed_count
+    variance = np.maximum((seed_filled ** 2).sum(axis=1) / seed_count - mean ** 2, 0.0)
+
+    z = np.full((len(values), scored), np.nan)
+    for column in range(span, tail.shape[1]):
+        point = tail[:, column]
+        deviation = point - mean
+        if column >= warm:
+            z[:, column - warm] = deviation / np.maximum(np.sqrt(variance), _std_floor(mean))
+        valid = ~np.isnan(point)
+        start = valid & np.isnan(mean)
+        mean = np.where(start, point, mean)
+        variance = np.where(start, 0.0, variance)
+        update = valid & ~start
+        increment = alpha * deviation
+        mean = np.where(update, mean + increment, mean)
+        variance = np.where(update, (1 - alpha) * (variance + deviation * increment), variance)
+    return z
+
+
+def _seasonal_baseline(values: np.ndarray, clock_hours: np.ndarray, weekly_hours: np.ndarray, history: int,
+                       min_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean per hour of the week over the first `history` columns, shape (rows, 168) with NaN for
+    hours with fewer than `min_samples` points, and each row's standard deviation around them.
+
+    The deviation is pooled over all hours of the week, since a few weeks of
+    history give each hour too few points for a stable estimate of its own.
+    """
+    # Columns are in time order, so each clock hour is a contiguous run: reduce the runs
+    # in place first, then group the much smaller per-hour totals by hour of the week
+    block = values[:, :history]
+    hour_starts = np.flatnonzero(np.diff(clock_hours[:history], prepend=-1))
+    valid = ~np.isnan(block)
+    if valid.all():
+        filled = block
+        counts = np.broadcast_to(np.diff(hour_starts, append=history), (len(values), len(hour_starts)))
+    else:
+        filled = np.where(valid, block, 0.0)
+        counts = np.add.reduceat(valid, hour_starts, axis=1, dtype=np.int64)
+    sums = np.add.reduceat(filled, hour_starts, axis=1)
+    squares = np.add.reduceat(filled * filled, hour_starts, axis=1)
+
+    order = np.argsort(weekly_hours[hour_starts], kind="stable")
+    hours, starts = np.unique(weekly_hours[hour_starts][order], return_index=True)
+    sums = np.add.reduceat(sums[:, order], starts, axis=1)
+    squares = np.add.reduceat(squares[:, order], starts, axis=1)
+    counts = np.add.reduceat(counts[:, order], starts, axis=1).astype(np.float64)
+
+    enough = counts >= min_samples
+    means = np.full((len(values), HOURS_PER_WEEK), np.nan)
+    means[:, hours] = np.where(enough, sums / counts, np.nan)
+    within = np.where(enough, squares - sums * sums / counts, 0.0).sum(axis=1)
+    degrees = (np.where(enough, counts, 0.0) - enough).sum(axis=1)
+    return means, np.sqrt(np.maximum(within, 0.0) / degrees)
+
+
+def _seasonal_scores(values: np.ndarray, weekly_hours: np.ndarray, scored: int,
+                     means: np.ndarray, std: np.ndarray) -> np.ndarray:
+    """Deviation of the scored points from the baseline for their hour of the week"""
+    expected = means[:, weekly_hours[-scored:]]
+    return (values[:, -scored:] - expected) / np.maximum(std, _std_floor(np.nanmean(means, axis=1)))[:, None]
+
+
+def load_hourly_series(db, start: int, end: int) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+    """Hourly rollups in [start, end) as (series, timestamps, values) with NaN for missing hours"""
+    rows = db.read_sync(lambda conn: conn.execute('''
+        SELECT metric_type, metric_name, timestamp, metric_value
+        FROM performance_metrics
+        WHERE period = 'hourly' AND timestamp >= ? AND timestamp < ?
+    ''', (start, end)).fetchall())
+
+    index: Dict[Tuple[str, str], int] = {}
+    rows_index = np.fromiter((index.setdefault((metric_type, name), len(index)) for metric_type, name, _, _ in rows),
+                             dtype=np.int64, count=len(rows))
+    timestamps = np.arange(start, end, 3600, dtype=np.int64)
+    values = np.full((len(index), len(timestamps)), np.nan)
+    if rows:
+        columns = (np.fromiter((row[2] for row in rows), dtype=np.int64, count=len(rows)) - start) // 3600
+        values[rows_index, columns] = np.fromiter((row[3] for row in rows), dtype=np.float64, count=len(rows))
+    return list(index), timestamps, values
+
+
+def detect_stored(db, end: int, since: int, days: int = 30,
+                  settings: Optional[DetectorSettings] = None) -> List[Anomaly]:
+    """Anomalies in the hourly series among the hours in [since, end), with `days` of history"""
+    start = end - days * 86400
+    series, timestamps, values = load_hourly_series(db, start, end)
+    scored = (end - max(since, start)) // 3600
+    if not series or scored <= 0:
+        return []
+    return detect(series, timestamps, values, scored, settings)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detection Settings
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Detector windows and thresholds for anomaly_detection. They live apart
+from the detectors so the monitor can hold its settings from startup,
+for scoring and for alert severities alike, without loading NumPy.
+"""
+
+from dataclasses import dataclass
+
+DETECTORS = ("ewma", "zscore", "seasonal", "changepoint")
+
+
+@dataclass
+class DetectorSettings:
+    """Window lengths are in points of the series' step"""
+    ewma_span: int = 24
+    ewma_threshold: float = 4.0
+    zscore_window: int = 24
+    zscore_threshold: float = 4.5
+    seasonal_threshold: float = 4.0
+    seasonal_min_samples: int = 3
+    changepoint_window: int = 12
+    changepoint_threshold: float = 3.0
+    batch_points: int = 4_000_000  # matrix cells processed at once, bounding memory
+
+    def threshold(self, detector: str) -> float:
+        return getattr(self, f"{detector}_threshold")
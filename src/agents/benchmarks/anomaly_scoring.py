@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Anomaly detection benchmark.
+
+Generates minutely series with a daily cycle and noise, injects a spike
+into 1% of them and a level shift into another 1% within the scored
+window, and times anomaly_detection.detect() over all of them. Series are
+generated and scored in chunks so memory stays bounded; only detection is
+timed.
+
+    python benchmarks/anomaly_scoring.py --series 10000 --days 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from anomaly_detection import DetectorSettings, detect
+
+
+def generate(rng, count: int, timestamps: np.ndarray, scored: int):
+    """Series matrix plus the rows given a spike and a level shift"""
+    phase = rng.uniform(0, 2 * np.pi, (count, 1))
+    level = rng.uniform(10, 100, (count, 1))
+    values = level * (1 + 0.2 * np.sin(2 * np.pi * timestamps / 86400 + phase))
+    values += rng.normal(0, 1, values.shape) * level * 0.02
+
+    spikes = rng.choice(count, max(1, count // 100), replace=False)
+    shifts = rng.choice(np.setdiff1d(np.arange(count), spikes), max(1, count // 100), replace=False)
+    length = len(timestamps)
+    values[spikes, length - rng.integers(1, scored, len(spikes))] += level[spikes, 0] * 0.5
+    values[shifts, length - scored:] += level[shifts, 0, None] * 0.3
+    return values, set(spikes.tolist()), set(shifts.tolist())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--series", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--step", type=int, default=60, help="seconds between points")
+    parser.add_argument("--scored", type=int, default=60, help="newest points scored")
+    parser.add_argument("--chunk", type=int, default=500, help="series generated at a time")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    end = 1_800_000_000 - 1_800_000_000 % 86400
+    timestamps = np.arange(end - args.days * 86400, end, args.step, dtype=np.int64)
+    points_per_hour = 3600 // args.step
+    settings = DetectorSettings(ewma_span=points_per_hour, zscore_window=points_per_hour,
+                                changepoint_window=points_per_hour // 2)
+
+    elapsed, found, injected = 0.0, {}, {"spike": 0, "shift": 0}
+    caught = {"spike": 0, "shift": 0}
+    for start in range(0, args.series, args.chunk):
+        count = min(args.chunk, args.series - start)
+        values, spikes, shifts = generate(rng, count, timestamps, args.scored)
+        series = [("bench", f"series_{start + row}") for row in range(count)]
+
+        began = time.perf_counter()
+        anomalies = detect(series, timestamps, values, args.scored, settings)
+        elapsed += time.perf_counter() - began
+
+        flagged = {}
+        for anomaly in anomalies:
+            found[anomaly.detector] = found.get(anomaly.detector, 0) + 1
+            flagged.setdefault(int(anomaly.series[1].rsplit("_", 1)[1]) - start, set()).add(anomaly.detector)
+        injected["spike"] += len(spikes)
+        injected["shift"] += len(shifts)
+        caught["spike"] += sum(1 for row in spikes if row in flagged)
+        caught["shift"] += sum(1 for row in shifts if row in flagged)
+        found["clean series flagged"] = found.get("clean series flagged", 0) + sum(
+            1 for row in flagged if row not in spikes and row not in shifts)
+
+    points = args.series * len(timestamps)
+    print(f"{args.series} series x {len(timestamps)} points ({points / 1e6:.0f}M): "
+          f"detection {elapsed:.2f} s ({points / elapsed / 1e6:.0f}M points/s)")
+    print(f"spikes caught {caught['spike']}/{injected['spike']}, shifts caught {caught['shift']}/{injected['shift']}")
+    print("detections: " + ", ".join(f"{name} {count}" for name, count in sorted(found.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Content insert benchmark for the agents' SQLite access.
+
+Inserts the same content rows into the platform agent's `content` table
+two ways and prints throughput for each:
+
+  before  what add_content_to_queue used to do: open a connection, insert,
+          commit and close for every row, on the calling thread
+  after   AgentDatabase.execute from concurrent coroutines, which queues
+          each insert for the writer thread and group-commits whatever is
+          pending
+
+    python benchmarks/content_inserts.py --rows 100000 --concurrency 256
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_db import AgentDatabase
+
+CREATE_CONTENT = '''
+    CREATE TABLE content (
+        id TEXT PRIMARY KEY,
+        persona TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        content_body TEXT,
+        media_urls TEXT,
+        hashtags TEXT,
+        target_platforms TEXT,
+        scheduled_time TEXT,
+        created_at TEXT,
+        status TEXT DEFAULT 'draft',
+        performance_metrics TEXT
+    )
+'''
+
+INSERT_CONTENT = '''
+    INSERT INTO content (
+        id, persona, content_type, title, description, content_body,
+        media_urls, hashtags, target_platforms, scheduled_time,
+        created_at, status, performance_metrics
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def content_rows(count):
+    now = datetime.utcnow().isoformat()
+    for n in range(count):
+        yield (
+            f'content_{n}', 'strategic_storyteller', 'video', f'Title {n}', 'Description', 'Body',
+            json.dumps([]), json.dumps(['#media']), json.dumps(['youtube', 'tiktok']), now,
+            now, 'scheduled', json.dumps({})
+        )
+
+
+def insert_connect_per_row(path, rows):
+    with sqlite3.connect(path) as conn:
+        conn.execute(CREATE_CONTENT)
+
+    for row in rows:
+        conn = sqlite3.connect(path)
+        conn.execute(INSERT_CONTENT, row)
+        conn.commit()
+        conn.close()
+
+
+def insert_agent_database(path, rows, concurrency):
+    db = AgentDatabase(path)
+    db.write_sync(lambda conn: conn.execute(CREATE_CONTENT))
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def insert(row):
+            async with semaphore:
+                await db.execute(INSERT_CONTENT, row)
+
+        await asyncio.gather(*(insert(row) for row in rows))
+
+    asyncio.run(run())
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--concurrency', type=int, default=256, help='coroutines inserting at once (after only)')
+    args = parser.parse_args()
+
+    rows = list(content_rows(args.rows))
+    print(f'{args.rows} content rows')
+    print(f"{'configuration':<10} {'seconds':>9} {'rows/s':>10}")
+    for name, insert in (('before', insert_connect_per_row),
+                         ('after', lambda path, rows: insert_agent_database(path, rows, args.concurrency))):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'platform_architecture.db')
+            started = time.perf_counter()
+            insert(path, rows)
+            elapsed = time.perf_counter() - started
+            with sqlite3.connect(path) as conn:
+                assert conn.execute('SELECT COUNT(*) FROM content').fetchone()[0] == args.rows
+        print(f'{name:<10} {elapsed:>9.2f} {args.rows / elapsed:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
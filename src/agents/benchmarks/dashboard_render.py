@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Dashboard rendering benchmark.
+
+Fills a temporary monitoring database with --days of system metric
+samples and daily agent and platform rows, then times
+generate_performance_dashboard() three ways:
+
+  cold       no chart pages on disk: every chart is built
+  no-op      nothing collected since: every chart is skipped
+  changed    one new system sample: only the system overview is rebuilt
+
+    python benchmarks/dashboard_render.py --days 7 --interval 60 --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring_analytics_system import MonitoringAnalyticsSystem
+
+PERSONAS = ("strategic_storyteller", "creative_catalyst", "community_builder", "data_decoder")
+PLATFORMS = ("linkedin", "instagram", "youtube", "tiktok")
+
+
+def populate(monitor: MonitoringAnalyticsSystem, days: int, interval: int):
+    """Raw system samples every `interval` seconds, rolled up, plus one agent and platform row per day"""
+    rng = random.Random(7)
+    end = int(time.time())
+    for timestamp in range(end - days * 86400, end, interval):
+        monitor.metrics.record('system', {
+            'active_agents': rng.randint(3, 4),
+            'published_content': rng.randint(100, 130),
+            'recent_activity': rng.randint(0, 50),
+            'pending_messages': rng.randint(0, 20),
+        }, timestamp)
+
+    today = datetime.utcnow().date()
+    dates = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+    monitor.write_buffer.add(
+        "INSERT OR REPLACE INTO agent_performance (agent_id, persona, content_created, content_published, "
+        "messages_sent, date) VALUES (?, ?, ?, ?, ?, ?)",
+        [(f"{persona}_agent", persona, rng.randint(0, 20), rng.randint(0, 10), rng.randint(0, 100), date)
+         for persona in PERSONAS for date in dates]
+    )
+    monitor.write_buffer.add(
+        "INSERT OR REPLACE INTO platform_performance (platform, content_count, total_views, "
+        "avg_engagement_rate, date) VALUES (?, ?, ?, ?, ?)",
+        [(platform, rng.randint(0, 20), rng.randint(0, 10000), rng.uniform(0.01, 0.1), date)
+         for platform in PLATFORMS for date in dates]
+    )
+    monitor.write_buffer.flush_sync()
+    # As the daemon's downsample job would have, so the overview reads hourly buckets
+    asyncio.run(monitor.downsample_metrics())
+
+
+def timed(monitor: MonitoringAnalyticsSystem, days: int) -> float:
+    began = time.perf_counter()
+    monitor.generate_performance_dashboard(days)
+    return time.perf_counter() - began
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=60, help="seconds between system samples")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The monitor writes dashboard/ relative to the working directory
+        os.chdir(directory)
+        monitor = MonitoringAnalyticsSystem(db_path=os.path.join(directory, "analytics.db"))
+        try:
+            populate(monitor, args.days, args.interval)
+            # Load pandas and plotly and start the workers outside the timings
+            monitor.generate_performance_dashboard(args.days)
+
+            results = {"cold": [], "no-op": [], "changed": []}
+            for _ in range(args.runs):
+                for name in os.listdir("dashboard"):
+                    os.unlink(os.path.join("dashboard", name))
+                results["cold"].append(timed(monitor, args.days))
+                results["no-op"].append(timed(monitor, args.days))
+                monitor.metrics.record('system', {'active_agents': random.randint(0, 10)}, int(time.time()) - 1)
+                results["changed"].append(timed(monitor, args.days))
+        finally:
+            monitor.close()
+
+    for name, seconds in results.items():
+        print(f"{name:8s} best {min(seconds) * 1000:8.1f} ms   median {sorted(seconds)[len(seconds) // 2] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Startup import-time benchmark for the monitoring system.
+
+Imports monitoring_analytics_system in fresh interpreters under
+`python -X importtime`, prints the best cumulative import time and the
+slowest dependencies, and exits non-zero if the import takes longer than
+the budget or pulls in the visualization stack or NumPy, which must stay
+behind the lazy imports of dashboard_rendering and anomaly_detection.
+
+    python benchmarks/import_time.py --runs 5 --budget-ms 750
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULE = "monitoring_analytics_system"
+DEFAULT_BUDGET_MS = 750.0
+
+# Only needed for rendering dashboards and detecting anomalies; importing the monitor must not load them
+LAZY_MODULES = ("pandas", "plotly", "matplotlib", "seaborn", "dashboard_rendering",
+                "numpy", "anomaly_detection")
+
+
+def measure(module: str):
+    """Import `module` in a new interpreter; returns {module name: cumulative microseconds}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=AGENTS_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    # The first run also warms the bytecode and filesystem caches, so report the best one
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run[args.module])
+    total_ms = best[args.module] / 1000
+
+    print(f"import {args.module}: {total_ms:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for name, us in sorted(best.items(), key=lambda item: item[1], reverse=True)[1:args.top + 1]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    loaded = sorted({name for run in runs for name in run if name.split(".")[0] in LAZY_MODULES})
+    if loaded:
+        print(f"FAIL: visualization modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
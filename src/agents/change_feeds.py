@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Change Feed Collector
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Incremental collection from the coordination API's change feeds
+(GET /changes/<source>?since=<watermark>). Each cycle reads only the rows
+added or changed since the stored watermark and folds them into the
+monitor's daily agent_performance and platform_performance rollups with
+additive upserts, so a cycle costs as much as the new activity and not
+the history.
+
+Folding needs to know whether a changed row was already counted, so the
+last seen status of each content item and message is kept in feed_state
+and looked up only for the ids in the current batch. Rollup increments,
+state changes and the new watermarks go into the write buffer together
+and are committed in the same transaction.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metric_store import epoch_seconds
+from write_buffer import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+FEED_SOURCES = ("analytics", "messages", "content")
+FEED_PAGE_SIZE = 500
+MAX_FEED_PAGES_PER_CYCLE = 20  # the rest is picked up by the next cycle
+
+# State of processed or failed messages is dropped this long after they were created.
+# Only a message updated again after that (e.g. processed a second time) would be
+# counted twice; keeping it forever would grow feed_state with the message history.
+MESSAGE_STATE_RETENTION_DAYS = 30
+STATE_LOOKUP_CHUNK = 500
+
+UPSERT_AGENT_PERFORMANCE = '''
+    INSERT INTO agent_performance (
+        agent_id, persona, content_created, content_published,
+        messages_sent, messages_processed, response_time_avg, date
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (agent_id, date) DO UPDATE SET
+        content_created = content_created + excluded.content_created,
+        content_published = content_published + excluded.content_published,
+        messages_sent = messages_sent + excluded.messages_sent,
+        response_time_avg = CASE
+            WHEN messages_processed + excluded.messages_processed > 0
+            THEN (response_time_avg * messages_processed + excluded.response_time_avg * excluded.messages_processed)
+                 / (messages_processed + excluded.messages_processed)
+            ELSE response_time_avg
+        END,
+        messages_processed = messages_processed + excluded.messages_processed
+'''
+
+UPSERT_PLATFORM_PERFORMANCE = '''
+    INSERT INTO platform_performance (
+        platform, content_count, total_views, avg_engagement_rate, engagement_samples, date
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (platform, date) DO UPDATE SET
+        content_count = content_count + excluded.content_count,
+        total_views = total_views + excluded.total_views,
+        avg_engagement_rate = CASE
+            WHEN engagement_samples + excluded.engagement_samples > 0
+            THEN (avg_engagement_rate * engagement_samples + excluded.avg_engagement_rate * excluded.engagement_samples)
+                 / (engagement_samples + excluded.engagement_samples)
+            ELSE avg_engagement_rate
+        END,
+        engagement_samples = engagement_samples + excluded.engagement_samples
+'''
+
+UPSERT_FEED_STATE = '''
+    INSERT OR REPLACE INTO feed_state (source, entity_id, status, day) VALUES (?, ?, ?, ?)
+'''
+
+PRUNE_MESSAGE_STATE = '''
+    DELETE FROM feed_state
+    WHERE source = 'messages' AND status IN ('processed', 'failed') AND day < ?
+'''
+
+UPSERT_WATERMARK = '''
+    INSERT OR REPLACE INTO collection_watermarks (source, watermark, updated_at) VALUES (?, ?, ?)
+'''
+
+
+def create_tables(conn):
+    """Create the watermark and state tables and migrate older rollup tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS collection_watermarks (
+            source TEXT PRIMARY KEY,
+            watermark TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS feed_state (
+            source TEXT NOT NULL,
+            entity_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            day TEXT NOT NULL,  -- creation day, for pruning
+            PRIMARY KEY (source, entity_id)
+        )
+    ''')
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(platform_performance)")}
+    if "engagement_samples" not in columns:
+        conn.execute("ALTER TABLE platform_performance ADD COLUMN engagement_samples INTEGER DEFAULT 0")
+
+
+def _day(timestamp: Optional[str]) -> str:
+    return (timestamp or datetime.utcnow().isoformat())[:10]
+
+
+def _seconds_between(start: str, end: str) -> float:
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+class ChangeFeedCollector:
+    """Watermarks and per-entity state for folding change feeds into the rollups"""
+
+    def __init__(self, db, write_buffer: WriteBehindBuffer):
+        self.db = db
+        self.write_buffer = write_buffer
+        self.watermarks: Dict[str, str] = {}
+        self._pruned_day: Optional[str] = None
+        self._load()
+
+    def _load(self):
+        def load(conn):
+            watermarks = dict(conn.execute("SELECT source, watermark FROM collection_watermarks").fetchall())
+            if not watermarks.keys() & set(FEED_SOURCES):
+                # First incremental run: the rollups were written by full re-aggregation, so
+                # clear them and let the feeds replay history into them from the start
+                conn.execute("DELETE FROM agent_performance")
+                conn.execute("DELETE FROM platform_performance")
+                conn.execute("DELETE FROM feed_state")
+            return watermarks
+
+        self.watermarks = self.db.write_sync(load)
+        if not self.watermarks.keys() & set(FEED_SOURCES):
+            logger.info("No collection watermarks yet; replaying change feeds from the beginning")
+
+    def set_watermark(self, source: str, watermark: str):
+        """Store the watermark of a job other than the feeds, with the next write buffer flush"""
+        self.watermarks[source] = watermark
+        self.write_buffer.add(UPSERT_WATERMARK, [(source, watermark, datetime.utcnow().isoformat())])
+
+    async def read(self, source: str, get_json: Callable[..., Awaitable[Optional[Dict[str, Any]]]]) -> Tuple[List[dict], Optional[str]]:
+        """Read up to MAX_FEED_PAGES_PER_CYCLE pages of changes after the stored watermark"""
+        changes, watermark = [], self.watermarks.get(source)
+        for _ in range(MAX_FEED_PAGES_PER_CYCLE):
+            params = {"limit": FEED_PAGE_SIZE}
+            if watermark:
+                params["since"] = watermark
+            page = await get_json(f"/changes/{source}", params)
+            if page is None:
+                break
+            changes.extend(page.get("changes", []))
+            watermark = page.get("watermark")
+            if not page.get("has_more"):
+                break
+        return changes, watermark
+
+    async def _known_statuses(self, source: str, entity_ids: List[str]) -> Dict[str, str]:
+        """Last folded status of each of `entity_ids` that has been seen before"""
+        def lookup(conn):
+            known = {}
+            for start in range(0, len(entity_ids), STATE_LOOKUP_CHUNK):
+                chunk = entity_ids[start:start + STATE_LOOKUP_CHUNK]
+                known.update(conn.execute(
+                    f"SELECT entity_id, status FROM feed_state WHERE source = ? AND entity_id IN ({','.join('?' * len(chunk))})",
+                    (source, *chunk)
+                ).fetchall())
+            return known
+
+        return await self.db.run_read(lookup) if entity_ids else {}
+
+    async def fold(self, feeds: Dict[str, Tuple[List[dict], Optional[str]]], agent_personas: Dict[str, str],
+                   observe: Optional[Callable[[str, float, Optional[float]], None]] = None) -> int:
+        """Fold each source's changes into the rollups and advance its watermark.
+
+        After the state lookups, everything is added to the write buffer
+        without awaiting in between, so increments, state and watermarks
+        land in one transaction. Engagement rates and the processing time
+        of newly processed messages are also passed to `observe(series,
+        value, timestamp)`. Returns the number of changes folded.
+        """
+        analytics = feeds.get("analytics", ([], None))[0]
+        content = feeds.get("content", ([], None))[0]
+        messages = feeds.get("messages", ([], None))[0]
+
+        # State written by the previous cycle may still be buffered
+        await self.write_buffer.flush()
+        content_state = await self._known_statuses("content", [item["id"] for item in content])
+        message_state = await self._known_statuses("messages", [str(message["id"]) for message in messages])
+
+        # [content_created, content_published, messages_sent, messages_processed, processing_seconds]
+        agents = defaultdict(lambda: [0, 0, 0, 0, 0.0])
+        # [records, views, engagement_rate_sum, engagement_rate_samples]
+        platforms = defaultdict(lambda: [0, 0.0, 0.0, 0])
+        personas = dict(agent_personas)
+        state_rows = []
+
+        for record in analytics:
+            totals = platforms[(record["platform"], _day(record.get("recorded_at")))]
+            totals[0] += 1
+            if record["metric_name"] == "views":
+                totals[1] += record["metric_value"]
+            elif record["metric_name"] == "engagement_rate":
+                totals[2] += record["metric_value"]
+                totals[3] += 1
+                if observe and record.get("recorded_at"):
+                    observe("engagement_rate", record["metric_value"], epoch_seconds(record["recorded_at"]))
+
+        for item in content:
+            previous = content_state.get(item["id"])
+            day = _day(item.get("created_at"))
+            key = (item["creator_agent_id"], day)
+            personas.setdefault(item["creator_agent_id"], item["persona"])
+            if previous is None:
+                agents[key][0] += 1
+            # Published counts belong to the creation day, like the API's own rollups
+            was_published, is_published = previous == "published", item["status"] == "published"
+            if was_published != is_published:
+                agents[key][1] += 1 if is_published else -1
+            if previous != item["status"]:
+                content_state[item["id"]] = item["status"]
+                state_rows.append(("content", item["id"], item["status"], day))
+
+        for message in messages:
+            message_id = str(message["id"])
+            previous = message_state.get(message_id)
+            day = _day(message.get("created_at"))
+            if previous is None:
+                agents[(message["sender_agent_id"], day)][2] += 1
+            if message["status"] == "processed" and previous != "processed" and message.get("processed_at"):
+                totals = agents[(message["receiver_agent_id"], _day(message["processed_at"]))]
+                seconds = _seconds_between(message["created_at"], message["processed_at"])
+                totals[3] += 1
+                totals[4] += seconds
+                if observe:
+                    observe("response_time", seconds, epoch_seconds(message["processed_at"]))
+            if previous != message["status"]:
+                message_state[message_id] = message["status"]
+                state_rows.append(("messages", message_id, message["status"], day))
+
+        self.write_buffer.add(UPSERT_AGENT_PERFORMANCE, [
+            (agent_id, personas.get(agent_id, "unknown"), created, published, sent, processed,
+             seconds / processed if processed else 0.0, day)
+            for (agent_id, day), (created, published, sent, processed, seconds) in agents.items()
+        ])
+        self.write_buffer.add(UPSERT_PLATFORM_PERFORMANCE, [
+            (platform, records, int(views), engagement_sum / samples if samples else 0.0, samples, day)
+            for (platform, day), (records, views, engagement_sum, samples) in platforms.items()
+        ])
+        self.write_buffer.add(UPSERT_FEED_STATE, state_rows)
+
+        now = datetime.utcnow()
+        watermark_rows = []
+        for source, (_changes, watermark) in feeds.items():
+            if watermark and watermark != self.watermarks.get(source):
+                self.watermarks[source] = watermark
+                watermark_rows.append((source, watermark, now.isoformat()))
+        self.write_buffer.add(UPSERT_WATERMARK, watermark_rows)
+
+        # Once a day, forget messages that finished long ago
+        today = now.date().isoformat()
+        if self._pruned_day != today:
+            self._pruned_day = today
+            cutoff = (now - timedelta(days=MESSAGE_STATE_RETENTION_DAYS)).date().isoformat()
+            self.write_buffer.add(PRUNE_MESSAGE_STATE, [(cutoff,)])
+
+        return len(analytics) + len(content) + len(messages)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Content Scheduler
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Time-ordered queue of content awaiting distribution. Items are kept in a
+binary heap keyed on their scheduled time, with an id index for O(1)
+lookup and cancellation, and an async dispatch loop that sleeps until the
+next item is due.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_REMOVED = object()  # placeholder for cancelled heap entries (lazy deletion)
+
+
+class ContentScheduler:
+    """
+    Heap-ordered scheduler for anything with an ``id`` and a ``scheduled_time``
+
+    Cancelling or rescheduling marks the old heap entry as removed instead of
+    re-heapifying; removed entries are dropped when they reach the top, and
+    the heap is compacted once they make up more than half of it.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._heap: List[list] = []
+        self._index: Dict[str, list] = {}
+        self._sequence = itertools.count()  # FIFO among items due at the same instant
+        self._removed = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._index
+
+    def __iter__(self):
+        return (entry[3] for entry in self._index.values())
+
+    def schedule(self, item: Any) -> None:
+        """Add an item, replacing any entry already scheduled under the same id"""
+        if item.id in self._index:
+            self._discard(self._index[item.id])
+
+        due_at = self._due_at(item.scheduled_time)
+        entry = [due_at, next(self._sequence), item.id, item]
+        self._index[item.id] = entry
+        heapq.heappush(self._heap, entry)
+
+        # Only a new earliest item shortens the dispatch loop's sleep
+        if self._wakeup is not None and self._heap[0] is entry:
+            self._wakeup.set()
+
+    def get(self, item_id: str) -> Optional[Any]:
+        entry = self._index.get(item_id)
+        return entry[3] if entry else None
+
+    def cancel(self, item_id: str) -> Optional[Any]:
+        """Remove an item without dispatching it; returns the item if it was scheduled"""
+        entry = self._index.pop(item_id, None)
+        if entry is None:
+            return None
+        item = entry[3]
+        self._discard(entry)
+        return item
+
+    def next_due_time(self) -> Optional[float]:
+        self._drop_removed_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: Optional[float] = None) -> List[Any]:
+        """Remove and return every item whose scheduled time has passed, earliest first"""
+        now = self._clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if entry[3] is _REMOVED:
+                self._removed -= 1
+                continue
+            del self._index[entry[2]]
+            due.append(entry[3])
+        return due
+
+    async def run(self, dispatch: Callable[[Any], Awaitable[Any]], max_concurrency: int = 100) -> None:
+        """Dispatch items as they come due until stop() is called.
+
+        Everything due at once is handed to `dispatch` as separate tasks,
+        at most `max_concurrency` running at a time; in-flight dispatches
+        are awaited before returning.
+        """
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        semaphore = asyncio.Semaphore(max_concurrency)
+        in_flight = set()
+
+        async def dispatch_one(item):
+            async with semaphore:
+                try:
+                    await dispatch(item)
+                except Exception as e:
+                    logger.error(f"Error dispatching scheduled item {item.id}: {e}")
+
+        try:
+            while not self._stopping:
+                # Clear before inspecting the heap so a schedule() racing with us still wakes the loop
+                self._wakeup.clear()
+
+                for item in self.pop_due():
+                    task = asyncio.create_task(dispatch_one(item))
+                    in_flight.add(task)
+                    task.add_done_callback(in_flight.discard)
+
+                next_due = self.next_due_time()
+                timeout = None if next_due is None else max(0.0, next_due - self._clock())
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            self._wakeup = None
+
+    def stop(self) -> None:
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    @staticmethod
+    def _due_at(scheduled_time: datetime) -> float:
+        return scheduled_time.timestamp()
+
+    def _discard(self, entry: list) -> None:
+        entry[3] = _REMOVED
+        self._removed += 1
+        if self._removed > len(self._heap) // 2:
+            self._heap = [live for live in self._heap if live[3] is not _REMOVED]
+            heapq.heapify(self._heap)
+            self._removed = 0
+
+    def _drop_removed_head(self) -> None:
+        while self._heap and self._heap[0][3] is _REMOVED:
+            heapq.heappop(self._heap)
+            self._removed -= 1
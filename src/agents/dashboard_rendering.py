@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Dashboard Rendering
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Chart and HTML rendering for the monitoring dashboard. This is the only
+module that needs pandas and plotly; MonitoringAnalyticsSystem imports it
+when a dashboard is actually generated, so collection, alerting and
+summaries start without loading the visualization stack, and run without
+it installed.
+
+Each chart's input rows are queried in the calling process and hashed.
+A chart whose rows hash the same as at its last render, and whose page
+is still on disk, is skipped; the charts that did change are built in a
+process pool, since building Plotly figures is CPU-bound. Every page is
+written to a temporary file and renamed over the old one, so a browser
+or copy job never sees a half-written chart.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from agent_db import AgentDatabase
+from metric_store import MetricStore
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_OVERVIEW_METRICS = ('active_agents', 'published_content', 'recent_activity', 'pending_messages')
+
+# Part of every chart hash; bump it when a chart's figure code changes so existing pages are rebuilt
+CHART_VERSION = 1
+HASHES_FILE = ".chart_hashes.json"
+
+# Placeholder data for the content metrics chart: (platform, engagement rate, colour)
+SAMPLE_CONTENT_METRICS = [
+    ('LinkedIn', 0.045, '#0077B5'),
+    ('Instagram', 0.082, '#E4405F'),
+    ('YouTube', 0.038, '#FF0000'),
+    ('TikTok', 0.125, '#000000'),
+]
+
+
+class DashboardRenderer:
+    """Renders the dashboard into `dashboard_dir`, rebuilding only the charts whose data changed.
+
+    The process pool is started by the first render that changes more than
+    one chart and kept for later renders; close() shuts it down.
+    """
+
+    def __init__(self, dashboard_dir: Path = Path("dashboard"), max_workers: Optional[int] = None):
+        self.dashboard_dir = dashboard_dir
+        self.max_workers = max_workers or min(len(CHARTS), os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._hashes: Dict[str, str] = self._load_hashes()
+
+    def render(self, db: AgentDatabase, metrics: MetricStore, days: int = 7) -> Path:
+        """Write the changed chart pages and the dashboard page; returns the dashboard page's path"""
+        self.dashboard_dir.mkdir(exist_ok=True)
+
+        changed = {}
+        for name, (title, load, _build) in CHARTS.items():
+            try:
+                rows = load(db, metrics, days)
+            except Exception as e:
+                logger.error(f"Error creating {title} chart: {e}")
+                continue
+            if not rows:
+                continue
+            digest = _digest(name, days, rows)
+            if self._hashes.get(name) != digest or not (self.dashboard_dir / f"{name}.html").exists():
+                changed[name] = (rows, digest)
+
+        # A single chart, or a single core, is better served here than by shipping charts to workers
+        if len(changed) > 1 and self.max_workers > 1:
+            pool = self._executor()
+            futures = {name: pool.submit(_render_chart, name, rows, days, self.dashboard_dir)
+                       for name, (rows, _) in changed.items()}
+            errors = {name: future.exception() for name, future in futures.items()}
+            if any(isinstance(error, BrokenProcessPool) for error in errors.values()):
+                # A worker died; start a fresh pool next time instead of failing every render
+                self.close()
+        else:
+            errors = {}
+            for name, (rows, _) in changed.items():
+                try:
+                    _render_chart(name, rows, days, self.dashboard_dir)
+                    errors[name] = None
+                except Exception as e:
+                    errors[name] = e
+
+        for name, error in errors.items():
+            if error is None:
+                self._hashes[name] = changed[name][1]
+            else:
+                logger.error(f"Error creating {CHARTS[name][0]} chart: {error}")
+                self._hashes.pop(name, None)
+        if changed:
+            _write_atomic(self.dashboard_dir / HASHES_FILE, json.dumps(self._hashes, indent=2, sort_keys=True))
+        logger.info(f"Dashboard charts rendered: {len(changed)}, unchanged: {len(CHARTS) - len(changed)}")
+
+        dashboard_path = self.dashboard_dir / "performance_dashboard.html"
+        _write_atomic(dashboard_path, _dashboard_html(days))
+        return dashboard_path
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Renders run on worker threads of a process with a database writer thread, and a
+            # fork can copy a lock another thread holds, so workers start from a fork server
+            self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("forkserver"))
+        return self._pool
+
+    def _load_hashes(self) -> Dict[str, str]:
+        try:
+            with open(self.dashboard_dir / HASHES_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def render_dashboard(db: AgentDatabase, metrics: MetricStore, days: int = 7,
+                     dashboard_dir: Path = Path("dashboard")) -> Path:
+    """Render the dashboard once, with a DashboardRenderer that is closed afterwards"""
+    renderer = DashboardRenderer(dashboard_dir)
+    try:
+        return renderer.render(db, metrics, days)
+    finally:
+        renderer.close()
+
+
+def _digest(name: str, days: int, rows) -> str:
+    identity = json.dumps([CHART_VERSION, name, days, rows], separators=(',', ':'), default=str)
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def _render_chart(name: str, rows, days: int, dashboard_dir: Path):
+    """Build one chart's figure and write its page; runs in a pool worker"""
+    _title, _load, build = CHARTS[name]
+    _write_atomic(dashboard_dir / f"{name}.html", build(rows, days).to_html())
+
+
+def _write_atomic(path: Path, text: str):
+    """Replace `path` by renaming a finished temporary file over it"""
+    with tempfile.NamedTemporaryFile('w', dir=path.parent, prefix=f".{path.name}.", suffix=".tmp",
+                                     encoding='utf-8', delete=False) as f:
+        temporary = f.name
+        try:
+            f.write(text)
+        except BaseException:
+            f.close()
+            os.unlink(temporary)
+            raise
+    os.replace(temporary, path)
+
+
+def _system_overview_rows(db: AgentDatabase, metrics: MetricStore, days: int):
+    # Get system metrics for the last N days, at a resolution that suits the range
+    end = int(time.time())
+    return metrics.query('system', SYSTEM_OVERVIEW_METRICS, end - days * 86400, end)
+
+
+def _system_overview_chart(rows, days: int):
+    """Create system overview chart"""
+    df = pd.DataFrame(rows, columns=['metric_name', 'timestamp', 'metric_value',
+                                     'min_value', 'max_value', 'samples'])
+
+    # Convert timestamp to datetime
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+
+    # Create subplots
+    fig = make_subplots(
+        rows=2, cols=2,
+        subplot_titles=('Active Agents', 'Content Production', 'Message Activity', 'System Health'),
+        specs=[[{"secondary_y": False}, {"secondary_y": False}],
+               [{"secondary_y": False}, {"secondary_y": False}]]
+    )
+
+    # Active agents
+    agent_data = df[df['metric_name'] == 'active_agents']
+    if not agent_data.empty:
+        fig.add_trace(
+            go.Scatter(x=agent_data['timestamp'], y=agent_data['metric_value'],
+                      mode='lines+markers', name='Active Agents'),
+            row=1, col=1
+        )
+
+    # Content production
+    content_data = df[df['metric_name'] == 'published_content']
+    if not content_data.empty:
+        fig.add_trace(
+            go.Scatter(x=content_data['timestamp'], y=content_data['metric_value'],
+                      mode='lines+markers', name='Published Content'),
+            row=1, col=2
+        )
+
+    # Message activity
+    message_data = df[df['metric_name'] == 'recent_activity']
+    if not message_data.empty:
+        fig.add_trace(
+            go.Scatter(x=message_data['timestamp'], y=message_data['metric_value'],
+                      mode='lines+markers', name='Recent Activity'),
+            row=2, col=1
+        )
+
+    # System health (pending messages)
+    pending_data = df[df['metric_name'] == 'pending_messages']
+    if not pending_data.empty:
+        fig.add_trace(
+            go.Scatter(x=pending_data['timestamp'], y=pending_data['metric_value'],
+                      mode='lines+markers', name='Pending Messages'),
+            row=2, col=2
+        )
+
+    fig.update_layout(
+        title_text="System Overview Dashboard",
+        showlegend=False,
+        height=600
+    )
+    return fig
+
+
+def _agent_performance_rows(db: AgentDatabase, metrics: MetricStore, days: int):
+    # Get agent performance data
+    start_date = datetime.utcnow().date() - timedelta(days=days)
+    return db.fetchall_sync('''
+        SELECT persona, content_created, content_published, messages_sent, date
+        FROM agent_performance
+        WHERE date >= ?
+        ORDER BY date
+    ''', (start_date.isoformat(),))
+
+
+def _agent_performance_chart(rows, days: int):
+    """Create agent performance chart"""
+    df = pd.DataFrame(rows, columns=['persona', 'content_created', 'content_published', 'messages_sent', 'date'])
+
+    # Create performance chart by persona
+    return px.bar(df, x='persona', y='content_created',
+                  title='Content Creation by Persona',
+                  labels={'content_created': 'Content Created', 'persona': 'Persona'})
+
+
+def _platform_analytics_rows(db: AgentDatabase, metrics: MetricStore, days: int):
+    # Get platform performance data
+    start_date = datetime.utcnow().date() - timedelta(days=days)
+    return db.fetchall_sync('''
+        SELECT platform, avg_engagement_rate, total_views, content_count, date
+        FROM platform_performance
+        WHERE date >= ?
+        ORDER BY date
+    ''', (start_date.isoformat(),))
+
+
+def _platform_analytics_chart(rows, days: int):
+    """Create platform analytics chart"""
+    df = pd.DataFrame(rows, columns=['platform', 'avg_engagement_rate', 'total_views', 'content_count', 'date'])
+
+    # Create engagement rate chart
+    return px.bar(df, x='platform', y='avg_engagement_rate',
+                  title='Average Engagement Rate by Platform',
+                  labels={'avg_engagement_rate': 'Engagement Rate', 'platform': 'Platform'})
+
+
+def _content_metrics_rows(db: AgentDatabase, metrics: MetricStore, days: int):
+    return SAMPLE_CONTENT_METRICS
+
+
+def _content_metrics_chart(rows, days: int):
+    """Create content metrics chart"""
+    platforms, engagement_rates, colours = (list(column) for column in zip(*rows))
+    fig = go.Figure()
+
+    fig.add_trace(go.Bar(
+        x=platforms,
+        y=engagement_rates,
+        name='Engagement Rate',
+        marker_color=colours
+    ))
+
+    fig.update_layout(
+        title='Content Performance Metrics',
+        xaxis_title='Platform',
+        yaxis_title='Engagement Rate',
+        showlegend=False
+    )
+    return fig
+
+
+# Chart page name -> (title for error messages, row loader run by the renderer, figure builder run by a worker)
+CHARTS: Dict[str, Any] = {
+    'system_overview': ('system overview', _system_overview_rows, _system_overview_chart),
+    'agent_performance': ('agent performance', _agent_performance_rows, _agent_performance_chart),
+    'platform_analytics': ('platform analytics', _platform_analytics_rows, _platform_analytics_chart),
+    'content_metrics': ('content metrics', _content_metrics_rows, _content_metrics_chart),
+}
+
+
+def _dashboard_html(days: int) -> str:
+    """Generate comprehensive HTML dashboard"""
+    return f'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Autonomous Digital Media Agency - Performance Dashboard</title>
+    <style>
+        body {{
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #f5f5f5;
+        }}
+        .header {{
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 30px;
+            border-radius: 10px;
+            margin-bottom: 30px;
+            text-align: center;
+        }}
+        .dashboard-grid {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(500px, 1fr));
+            gap: 20px;
+            margin-bottom: 30px;
+        }}
+        .chart-container {{
+            background: white;
+            border-radius: 10px;
+            padding: 20px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }}
+        .metrics-summary {{
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 20px;
+            margin-bottom: 30px;
+        }}
+        .metric-card {{
+            background: white;
+            border-radius: 10px;
+            padding: 20px;
+            text-align: center;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }}
+        .metric-value {{
+            font-size: 2em;
+            font-weight: bold;
+            color: #667eea;
+        }}
+        .metric-label {{
+            color: #666;
+            margin-top: 10px;
+        }}
+        .alert-section {{
+            background: white;
+            border-radius: 10px;
+            padding: 20px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }}
+        .alert {{
+            padding: 10px;
+            margin: 10px 0;
+            border-radius: 5px;
+            border-left: 4px solid;
+        }}
+        .alert-high {{
+            background-color: #fee;
+            border-color: #f56565;
+            color: #c53030;
+        }}
+        .alert-medium {{
+            background-color: #fef5e7;
+            border-color: #ed8936;
+            color: #c05621;
+        }}
+        .alert-low {{
+            background-color: #f0fff4;
+            border-color: #48bb78;
+            color: #2f855a;
+        }}
+        iframe {{
+            width: 100%;
+            height: 400px;
+            border: none;
+        }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Autonomous Digital Media Agency</h1>
+        <h2>Performance Dashboard</h2>
+        <p>Last {days} days • Generated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC</p>
+    </div>
+
+    <div class="metrics-summary">
+        <div class="metric-card">
+            <div class="metric-value">4</div>
+            <div class="metric-label">Active Agents</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value">127</div>
+            <div class="metric-label">Content Published</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value">5.2%</div>
+            <div class="metric-label">Avg Engagement Rate</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value">99.8%</div>
+            <div class="metric-label">System Uptime</div>
+        </div>
+    </div>
+
+    <div class="dashboard-grid">
+        <div class="chart-container">
+            <h3>System Overview</h3>
+            <iframe src="system_overview.html"></iframe>
+        </div>
+        <div class="chart-container">
+            <h3>Agent Performance</h3>
+            <iframe src="agent_performance.html"></iframe>
+        </div>
+        <div class="chart-container">
+            <h3>Platform Analytics</h3>
+            <iframe src="platform_analytics.html"></iframe>
+        </div>
+        <div class="chart-container">
+            <h3>Content Metrics</h3>
+            <iframe src="content_metrics.html"></iframe>
+        </div>
+    </div>
+
+    <div class="alert-section">
+        <h3>System Alerts</h3>
+        <div class="alert alert-low">
+            <strong>System Health:</strong> All systems operating normally
+        </div>
+        <div class="alert alert-medium">
+            <strong>Content Production:</strong> Strategic Storyteller agent below target output
+        </div>
+    </div>
+</body>
+</html>
+        '''
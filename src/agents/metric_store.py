@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Metric Store
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Time-series storage for the monitor's performance_metrics table. Samples
+are stored with integer epoch-second timestamps as period 'raw' and are
+downsampled into closed hourly buckets, hourly into daily, and daily into
+weekly (Monday-aligned, UTC) and monthly. Each rollup row keeps the mean,
+min, max and sample count of its bucket, so coarser levels are built from
+finer ones without going back to the raw samples.
+
+Samples that arrive stamped before a level's last rollup (analytics read
+back from the change feeds carry their original recorded_at) are merged
+into the already-written buckets of every level by the next downsample.
+
+Every level has its own retention, and raw samples are only pruned once
+they have been rolled up. Range queries read the coarsest level that
+still gives enough points and fill in the part of the range that is not
+rolled up yet from the finer levels.
+"""
+
+import calendar
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from write_buffer import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+# Level each rollup is built from; weeks do not nest in months, so both come from days
+ROLLUP_SOURCES = {
+    "hourly": "raw",
+    "daily": "hourly",
+    "weekly": "daily",
+    "monthly": "daily",
+}
+
+# Days to keep each level; None keeps it forever
+DEFAULT_RETENTION_DAYS = {
+    "raw": 7,
+    "hourly": 90,
+    "daily": 730,
+    "weekly": None,
+    "monthly": None,
+}
+
+# Only buckets that closed this long ago are rolled up, so samples stamped just
+# before a boundary but written after it (up to a collection interval or so
+# later, for samples read from the change feeds) are not left out
+ROLLUP_SETTLE_SECONDS = 300
+
+# Finest level used for a range query, by range length in seconds
+QUERY_RESOLUTIONS = (
+    (2 * 86400, "raw"),
+    (45 * 86400, "hourly"),
+    (2 * 365 * 86400, "daily"),
+)
+
+WEEK_OFFSET = 4 * 86400  # 1970-01-01 was a Thursday; weeks start on Monday
+
+INSERT_SAMPLE = '''
+    INSERT INTO performance_metrics (
+        metric_type, metric_name, metric_value, dimensions, timestamp, period,
+        sample_count, min_value, max_value
+    ) VALUES (?, ?, ?, ?, ?, 'raw', 1, ?, ?)
+'''
+
+# Bucket start for a timestamp, per rollup level
+BUCKET_SQL = {
+    "hourly": "timestamp - timestamp % 3600",
+    "daily": "timestamp - timestamp % 86400",
+    "weekly": f"timestamp - (timestamp - {WEEK_OFFSET}) % 604800",
+    "monthly": "CAST(strftime('%s', timestamp, 'unixepoch', 'start of month') AS INTEGER)",
+}
+
+ROLLUP = '''
+    INSERT INTO performance_metrics (
+        metric_type, metric_name, metric_value, timestamp, period,
+        sample_count, min_value, max_value
+    )
+    SELECT metric_type, metric_name,
+           SUM(metric_value * sample_count) / SUM(sample_count),
+           {bucket}, ?, SUM(sample_count), MIN(min_value), MAX(max_value)
+    FROM performance_metrics
+    WHERE period = ? AND timestamp >= ? AND timestamp < ?
+    GROUP BY metric_type, metric_name, {bucket}
+'''
+
+# Raw samples written since the last downsample but stamped before a level's rollup boundary
+LATE_SAMPLES = '''
+    SELECT metric_type, metric_name, {bucket},
+           SUM(metric_value), COUNT(*), MIN(min_value), MAX(max_value)
+    FROM performance_metrics
+    WHERE id > ? AND id <= ? AND period = 'raw' AND timestamp < ?
+    GROUP BY metric_type, metric_name, {bucket}
+'''
+
+MERGE_LATE = '''
+    UPDATE performance_metrics
+    SET metric_value = (metric_value * sample_count + ?) / (sample_count + ?),
+        sample_count = sample_count + ?,
+        min_value = MIN(min_value, ?),
+        max_value = MAX(max_value, ?)
+    WHERE metric_type = ? AND metric_name = ? AND period = ? AND timestamp = ?
+'''
+
+INSERT_LATE = '''
+    INSERT INTO performance_metrics (
+        metric_type, metric_name, metric_value, timestamp, period,
+        sample_count, min_value, max_value
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def create_tables(conn):
+    """Create performance_metrics and its rollup state, migrating ISO-timestamp tables"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(performance_metrics)")}
+    if columns and "sample_count" not in columns:
+        # Older tables stored every sample as period 'hourly' with an ISO timestamp
+        conn.execute("ALTER TABLE performance_metrics RENAME TO performance_metrics_iso")
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS performance_metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            metric_type TEXT NOT NULL,
+            metric_name TEXT NOT NULL,
+            metric_value REAL NOT NULL,  -- the sample, or the bucket mean for rollups
+            dimensions TEXT,  -- JSON string for additional dimensions
+            timestamp INTEGER NOT NULL,  -- epoch seconds; bucket start for rollups
+            period TEXT NOT NULL,  -- raw, hourly, daily, weekly, monthly
+            sample_count INTEGER NOT NULL DEFAULT 1,
+            min_value REAL,
+            max_value REAL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS ix_performance_metrics_series
+        ON performance_metrics (metric_type, metric_name, period, timestamp)
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS metric_rollups (
+            period TEXT PRIMARY KEY,
+            rolled_up_to INTEGER NOT NULL,  -- end of the last bucket rolled up
+            sample_id INTEGER NOT NULL DEFAULT 0  -- last raw sample id accounted for
+        )
+    ''')
+    if "sample_id" not in {row[1] for row in conn.execute("PRAGMA table_info(metric_rollups)")}:
+        # Samples already written were rolled up, or missed, before late samples were merged
+        conn.execute("ALTER TABLE metric_rollups ADD COLUMN sample_id INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE metric_rollups SET sample_id = (SELECT COALESCE(MAX(id), 0) FROM performance_metrics)")
+
+    if columns and "sample_count" not in columns:
+        conn.execute('''
+            INSERT INTO performance_metrics (
+                metric_type, metric_name, metric_value, dimensions, timestamp, period,
+                sample_count, min_value, max_value
+            )
+            SELECT metric_type, metric_name, metric_value, dimensions,
+                   CAST(strftime('%s', timestamp) AS INTEGER), 'raw', 1, metric_value, metric_value
+            FROM performance_metrics_iso
+            WHERE strftime('%s', timestamp) IS NOT NULL
+        ''')
+        conn.execute("DROP TABLE performance_metrics_iso")
+        logger.info("Migrated performance_metrics to epoch timestamps")
+
+
+def bucket_start(period: str, timestamp: int) -> int:
+    """Start of the `period` bucket containing `timestamp`; the Python twin of BUCKET_SQL"""
+    if period == "raw":
+        return timestamp
+    if period == "hourly":
+        return timestamp - timestamp % 3600
+    if period == "daily":
+        return timestamp - timestamp % 86400
+    if period == "weekly":
+        return timestamp - (timestamp - WEEK_OFFSET) % 604800
+    if period == "monthly":
+        day = datetime.fromtimestamp(timestamp, timezone.utc)
+        return calendar.timegm((day.year, day.month, 1, 0, 0, 0))
+    raise ValueError(f"Unknown period: {period}")
+
+
+def epoch_seconds(timestamp: str) -> int:
+    """Epoch seconds of an ISO timestamp in naive UTC, as the API returns them"""
+    return int(datetime.fromisoformat(timestamp).replace(tzinfo=timezone.utc).timestamp())
+
+
+def resolution_for(start: int, end: int) -> str:
+    """Coarsest level that still gives a useful number of points for [start, end)"""
+    for max_range, period in QUERY_RESOLUTIONS:
+        if end - start <= max_range:
+            return period
+    return "weekly"
+
+
+class MetricStore:
+    """Writes, downsamples, prunes and queries the performance_metrics time series"""
+
+    def __init__(self, db, write_buffer: WriteBehindBuffer,
+                 retention_days: Optional[Dict[str, Optional[int]]] = None):
+        self.db = db
+        self.write_buffer = write_buffer
+        self.retention_days = {**DEFAULT_RETENTION_DAYS, **(retention_days or {})}
+
+    def record(self, metric_type: str, metrics: Dict[str, float], timestamp: Optional[int] = None,
+               dimensions: Optional[str] = None):
+        """Buffer one raw sample per metric name, all at `timestamp` (default now)"""
+        timestamp = int(time.time()) if timestamp is None else int(timestamp)
+        self.write_buffer.add(INSERT_SAMPLE, [
+            (metric_type, name, value, dimensions, timestamp, value, value)
+            for name, value in metrics.items()
+        ])
+
+    def record_many(self, metric_type: str, samples: Iterable[Tuple[str, float, int]]):
+        """Buffer raw (metric_name, value, timestamp) samples"""
+        self.write_buffer.add(INSERT_SAMPLE, [
+            (metric_type, name, value, None, int(timestamp), value, value)
+            for name, value, timestamp in samples
+        ])
+
+    def rolled_up_to(self, period: str) -> int:
+        """End of the last `period` bucket rolled up, 0 before the first rollup"""
+        row = self.db.read_sync(lambda conn: conn.execute(
+            "SELECT rolled_up_to FROM metric_rollups WHERE period = ?", (period,)
+        ).fetchone())
+        return row[0] if row else 0
+
+    async def downsample(self, now: Optional[int] = None) -> Dict[str, int]:
+        """Roll every closed bucket that has not been rolled up yet into the next level.
+
+        All levels are rolled up in one transaction, finest first, so each
+        level reads a source that is complete up to its own boundary. Raw
+        samples written since the last run but stamped before a level's
+        boundary are first merged into that level's buckets.
+        Returns the number of rollup rows written or updated per level.
+        """
+        await self.write_buffer.flush()
+        settled = (int(time.time()) if now is None else now) - ROLLUP_SETTLE_SECONDS
+
+        def roll_up(conn):
+            state = {period: (boundary, sample_id) for period, boundary, sample_id
+                     in conn.execute("SELECT period, rolled_up_to, sample_id FROM metric_rollups")}
+            rolled_up_to = {period: boundary for period, (boundary, _) in state.items()}
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM performance_metrics").fetchone()[0]
+            written = {}
+            for period, (boundary, sample_id) in state.items():
+                merged = _merge_late(conn, period, boundary, sample_id, last_id)
+                if merged:
+                    written[period] = merged
+            for period, source in ROLLUP_SOURCES.items():
+                start = rolled_up_to.get(period, 0)
+                end = bucket_start(period, min(settled, rolled_up_to.get(source, settled)))
+                if end <= start:
+                    continue
+                cursor = conn.execute(ROLLUP.format(bucket=BUCKET_SQL[period]), (period, source, start, end))
+                written[period] = written.get(period, 0) + cursor.rowcount
+                rolled_up_to[period] = end
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_rollups (period, rolled_up_to, sample_id) VALUES (?, ?, ?)",
+                [(period, end, last_id) for period, end in rolled_up_to.items()]
+            )
+            return written
+
+        written = await self.db.run_write(roll_up)
+        if any(written.values()):
+            logger.info(f"Downsampled metrics: {', '.join(f'{count} {period}' for period, count in written.items())}")
+        return written
+
+    async def prune(self, now: Optional[int] = None) -> Dict[str, int]:
+        """Delete rows past each level's retention; raw samples only once rolled up or merged"""
+        await self.write_buffer.flush()
+        now = int(time.time()) if now is None else now
+
+        def delete(conn):
+            hourly = conn.execute("SELECT rolled_up_to, sample_id FROM metric_rollups WHERE period = 'hourly'").fetchone()
+            rolled_up_to, sample_id = hourly or (0, 0)
+            deleted = {}
+            for period, days in self.retention_days.items():
+                if days is None:
+                    continue
+                cutoff = now - days * 86400
+                if period == "raw":
+                    # Late samples past the last downsample are kept until they are merged
+                    deleted[period] = conn.execute(
+                        "DELETE FROM performance_metrics WHERE period = 'raw' AND timestamp < ? AND id <= ?",
+                        (min(cutoff, rolled_up_to), sample_id)
+                    ).rowcount
+                    continue
+                deleted[period] = conn.execute(
+                    "DELETE FROM performance_metrics WHERE period = ? AND timestamp < ?", (period, cutoff)
+                ).rowcount
+            return deleted
+
+        return await self.db.run_write(delete)
+
+    def query(self, metric_type: str, metric_names: Sequence[str], start: int, end: int,
+              period: Optional[str] = None) -> List[Tuple[str, int, float, float, float, int]]:
+        """(metric_name, bucket timestamp, mean, min, max, samples) for [start, end), by name and time.
+
+        `period` defaults to resolution_for(start, end), and the bucket
+        containing `start` is included whole. Buckets after the level's
+        last rollup are aggregated from the finer levels, so the result
+        reaches up to `end` whatever the rollup schedule.
+        """
+        period = period or resolution_for(start, end)
+        start = bucket_start(period, start)
+
+        def read(conn):
+            rolled_up_to = dict(conn.execute("SELECT period, rolled_up_to FROM metric_rollups").fetchall())
+            return self._read_level(conn, rolled_up_to, metric_type, list(metric_names), period, start, end)
+
+        points = self.db.read_sync(read)
+        return sorted(
+            (name, timestamp, value_sum / samples, low, high, samples)
+            for (name, timestamp), (value_sum, low, high, samples) in points.items()
+        )
+
+    def _read_level(self, conn, rolled_up_to: Dict[str, int], metric_type: str, metric_names: List[str],
+                    period: str, start: int, end: int) -> Dict[Tuple[str, int], List[float]]:
+        """{(name, bucket): [value sum, min, max, samples]} at `period` for [start, end)"""
+        points: Dict[Tuple[str, int], List[float]] = {}
+        if start >= end or not metric_names:
+            return points
+
+        # Rows of this level cover up to its rollup boundary; raw covers everything
+        covered = end if period == "raw" else min(end, max(start, rolled_up_to.get(period, 0)))
+        rows = conn.execute(f'''
+            SELECT metric_name, timestamp, metric_value, min_value, max_value, sample_count
+            FROM performance_metrics
+            WHERE metric_type = ? AND metric_name IN ({','.join('?' * len(metric_names))})
+              AND period = ? AND timestamp >= ? AND timestamp < ?
+        ''', (metric_type, *metric_names, period, start, covered)).fetchall()
+        _merge(points, ((name, timestamp, value * samples, low, high, samples)
+                        for name, timestamp, value, low, high, samples in rows))
+
+        if covered < end:
+            tail = self._read_level(conn, rolled_up_to, metric_type, metric_names,
+                                    ROLLUP_SOURCES[period], covered, end)
+            _merge(points, ((name, bucket_start(period, timestamp), *totals)
+                            for (name, timestamp), totals in tail.items()))
+        return points
+
+
+def _merge_late(conn, period: str, boundary: int, sample_id: int, last_id: int) -> int:
+    """Fold raw samples with ids in (sample_id, last_id] stamped before `boundary` into `period`'s buckets.
+
+    Buckets are updated from the samples themselves rather than re-aggregated
+    from the source level, whose rows for old buckets may already be pruned.
+    Returns the number of buckets updated or created.
+    """
+    late = conn.execute(LATE_SAMPLES.format(bucket=BUCKET_SQL[period]), (sample_id, last_id, boundary)).fetchall()
+    for metric_type, name, bucket, value_sum, samples, low, high in late:
+        updated = conn.execute(MERGE_LATE, (value_sum, samples, samples, low, high,
+                                            metric_type, name, period, bucket)).rowcount
+        if not updated:
+            conn.execute(INSERT_LATE, (metric_type, name, value_sum / samples, bucket, period, samples, low, high))
+    if late:
+        logger.info(f"Merged late samples into {len(late)} {period} buckets")
+    return len(late)
+
+
+def _merge(points: Dict[Tuple[str, int], List[float]], rows: Iterable[tuple]):
+    """Add (name, bucket, value sum, min, max, samples) rows into `points`"""
+    for name, bucket, value_sum, low, high, samples in rows:
+        totals = points.get((name, bucket))
+        if totals is None:
+            points[(name, bucket)] = [value_sum, low, high, samples]
+        else:
+            totals[0] += value_sum
+            totals[1] = min(totals[1], low)
+            totals[2] = max(totals[2], high)
+            totals[3] += samples
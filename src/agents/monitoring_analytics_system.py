@@ -7,25 +7,43 @@ This system provides comprehensive monitoring, analytics, and performance tracki
 for the autonomous digital media agency.
 """
 
+import argparse
 import json
 import asyncio
 import logging
-import sqlite3
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
-import requests
+import aiohttp
 from pathlib import Path
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.subplots import make_subplots
+from agent_db import AgentDatabase
+from periodic_jobs import JobRunner, PeriodicJob
+from write_buffer import WriteBehindBuffer
+from change_feeds import FEED_SOURCES, ChangeFeedCollector, create_tables as create_feed_tables
+from metric_store import MetricStore, create_tables as create_metric_tables, epoch_seconds
+from alert_manager import DEFAULT_RENOTIFY_INTERVAL, AlertManager, create_tables as create_alert_tables
+from alert_rules import RuleEngine
+from anomaly_settings import DetectorSettings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Coordination API client settings
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+HTTP_CONNECTIONS_PER_HOST = 10
+HTTP_KEEPALIVE_SECONDS = 30
+API_PAGE_SIZE = 500
+
+# Daemon job intervals in seconds
+DEFAULT_JOB_INTERVALS = {
+    'collect': 60,
+    'alerts': 60,
+    'downsample': 300,
+    'anomalies': 3600,
+    'dashboard': 300,
+    'retention': 3600,
+}
+
 class MonitoringAnalyticsSystem:
     """
     Comprehensive monitoring and analytics system for the autonomous digital media agency
@@ -40,16 +58,40 @@ class MonitoringAnalyticsSystem:
     7. Dashboard generation
     """
     
-    def __init__(self, api_base_url: str = "http://localhost:5000/api", db_path: str = "analytics.db"):
+    def __init__(self, api_base_url: str = "http://localhost:5000/api", db_path: str = "analytics.db",
+                 buffer_max_rows: int = 500, buffer_max_delay: float = 5.0, retention_days: int = 90,
+                 alert_renotify_interval: float = DEFAULT_RENOTIFY_INTERVAL,
+                 anomaly_settings: Optional[DetectorSettings] = None):
         self.api_base_url = api_base_url
         self.db_path = db_path
-        self.alerts = []
+        self.retention_days = retention_days
+        self.job_runner: Optional[JobRunner] = None
+        # Detection and alert severities both read these thresholds
+        self.anomaly_settings = anomaly_settings or DetectorSettings()
+        self.dashboard_renderer = None  # dashboard_rendering.DashboardRenderer, created on first render
+        self.buffer_max_rows = buffer_max_rows
+        self.buffer_max_delay = buffer_max_delay
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._http_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.agent_personas: Dict[str, str] = {}
+        self.alert_renotify_interval = alert_renotify_interval
+        # Alert rules; see alert_rules for the keys
         self.performance_thresholds = {
-            'engagement_rate': {'min': 0.02, 'target': 0.05, 'max': 0.15},
-            'content_production': {'min': 5, 'target': 10, 'max': 20},  # per day
-            'agent_response_time': {'min': 0, 'target': 300, 'max': 900},  # seconds
-            'system_uptime': {'min': 0.95, 'target': 0.99, 'max': 1.0}
+            'engagement_rate': {'min': 0.02, 'target': 0.05, 'max': 0.15,
+                                'aggregate': 'avg', 'window_minutes': 60, 'severity': 'low'},
+            'content_production': {'min': 5, 'target': 10, 'max': 20,  # per day
+                                   'series': 'total_content', 'aggregate': 'delta', 'window_minutes': 1440},
+            'agent_response_time': {'min': 0, 'target': 300, 'max': 900,  # seconds
+                                    'series': 'response_time', 'aggregate': 'avg', 'window_minutes': 60},
+            'system_uptime': {'min': 0.95, 'target': 0.99, 'max': 1.0,
+                              'series': 'collection_success', 'aggregate': 'avg', 'window_minutes': 60,
+                              'severity': 'high'},
+            'agent_activity': {'min': 0.8, 'series': 'active_agent_ratio'},
+            'publish_rate': {'min': 0.7, 'series': 'publish_ratio'},
+            'message_processing': {'max': 50, 'series': 'pending_messages', 'severity': 'high',
+                                   'max_rate_per_hour': 600, 'for_minutes': 5},
         }
+        self.rules = RuleEngine(self.performance_thresholds)
         
         # Initialize analytics database
         self._init_analytics_db()
@@ -58,316 +100,284 @@ class MonitoringAnalyticsSystem:
 
     def _init_analytics_db(self):
         """Initialize analytics database for storing processed metrics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Performance metrics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS performance_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                metric_type TEXT NOT NULL,
-                metric_name TEXT NOT NULL,
-                metric_value REAL NOT NULL,
-                dimensions TEXT,  -- JSON string for additional dimensions
-                timestamp TEXT NOT NULL,
-                period TEXT NOT NULL  -- hourly, daily, weekly, monthly
-            )
-        ''')
-        
-        # Agent performance table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS agent_performance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                agent_id TEXT NOT NULL,
-                persona TEXT NOT NULL,
-                content_created INTEGER DEFAULT 0,
-                content_published INTEGER DEFAULT 0,
-                avg_engagement_rate REAL DEFAULT 0.0,
-                messages_sent INTEGER DEFAULT 0,
-                messages_processed INTEGER DEFAULT 0,
-                response_time_avg REAL DEFAULT 0.0,
-                date TEXT NOT NULL,
-                UNIQUE(agent_id, date)
-            )
-        ''')
+        self.db = AgentDatabase(self.db_path)
         
-        # Platform performance table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS platform_performance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                platform TEXT NOT NULL,
-                content_count INTEGER DEFAULT 0,
-                total_views INTEGER DEFAULT 0,
-                total_engagement INTEGER DEFAULT 0,
-                avg_engagement_rate REAL DEFAULT 0.0,
-                top_performing_content TEXT,  -- JSON string
-                date TEXT NOT NULL,
-                UNIQUE(platform, date)
-            )
-        ''')
+        def create_tables(conn):
+            # Performance metrics time series and rollup state
+            create_metric_tables(conn)
+            
+            # Agent performance table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS agent_performance (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    agent_id TEXT NOT NULL,
+                    persona TEXT NOT NULL,
+                    content_created INTEGER DEFAULT 0,
+                    content_published INTEGER DEFAULT 0,
+                    avg_engagement_rate REAL DEFAULT 0.0,
+                    messages_sent INTEGER DEFAULT 0,
+                    messages_processed INTEGER DEFAULT 0,
+                    response_time_avg REAL DEFAULT 0.0,
+                    date TEXT NOT NULL,
+                    UNIQUE(agent_id, date)
+                )
+            ''')
+            
+            # Platform performance table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS platform_performance (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    platform TEXT NOT NULL,
+                    content_count INTEGER DEFAULT 0,
+                    total_views INTEGER DEFAULT 0,
+                    total_engagement INTEGER DEFAULT 0,
+                    avg_engagement_rate REAL DEFAULT 0.0,
+                    engagement_samples INTEGER DEFAULT 0,
+                    top_performing_content TEXT,  -- JSON string
+                    date TEXT NOT NULL,
+                    UNIQUE(platform, date)
+                )
+            ''')
+            
+            # System alerts table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS system_alerts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    alert_type TEXT NOT NULL,
+                    severity TEXT NOT NULL,  -- low, medium, high, critical
+                    message TEXT NOT NULL,
+                    details TEXT,  -- JSON string
+                    status TEXT DEFAULT 'active',  -- active, acknowledged, resolved
+                    created_at TEXT NOT NULL,
+                    resolved_at TEXT,
+                    fingerprint TEXT,  -- alert type and key dimensions; one active alert each
+                    occurrences INTEGER DEFAULT 1,
+                    last_seen TEXT,
+                    notified_at TEXT
+                )
+            ''')
+            create_alert_tables(conn)
+            
+            # Change feed watermarks and state
+            create_feed_tables(conn)
         
-        # System alerts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS system_alerts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                alert_type TEXT NOT NULL,
-                severity TEXT NOT NULL,  -- low, medium, high, critical
-                message TEXT NOT NULL,
-                details TEXT,  -- JSON string
-                status TEXT DEFAULT 'active',  -- active, acknowledged, resolved
-                created_at TEXT NOT NULL,
-                resolved_at TEXT
-            )
-        ''')
+        self.db.write_sync(create_tables)
         
-        conn.commit()
-        conn.close()
+        # Metric rows and alerts are written behind, one transaction per flush
+        self.write_buffer = WriteBehindBuffer(self.db, self.buffer_max_rows, self.buffer_max_delay)
+        self.change_feeds = ChangeFeedCollector(self.db, self.write_buffer)
+        # End of the hourly buckets scored for anomalies; kept with the feed watermarks so a
+        # restart does not rescore, and re-alert on, hours it has already seen
+        scored_to = self.change_feeds.watermarks.get('anomalies')
+        self.anomalies_scored_to: Optional[int] = int(scored_to) if scored_to else None
+        self.metrics = MetricStore(self.db, self.write_buffer)
+        self.alerts = AlertManager(self.db, self.write_buffer, self.alert_renotify_interval)
         logger.info("Analytics database initialized")
 
+    def _http_session(self) -> aiohttp.ClientSession:
+        """Keep-alive session for the coordination API, bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.closed or self._http_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS
+            )
+            self._http = aiohttp.ClientSession(connector=connector, timeout=HTTP_TIMEOUT)
+            self._http_loop = loop
+        return self._http
+
+    async def _get_json(self, path: str, params: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """GET an API path; returns the decoded body, or None for a non-200 response"""
+        async with self._http_session().get(f"{self.api_base_url}{path}", params=params) as response:
+            if response.status != 200:
+                logger.warning(f"GET {path} returned {response.status}")
+                return None
+            return await response.json()
+
+    async def _get_all_pages(self, path: str, key: str) -> Optional[Dict[str, Any]]:
+        """GET a paginated API list, following next_cursor until the last page"""
+        items, params = [], {'limit': API_PAGE_SIZE}
+        while True:
+            page = await self._get_json(path, params)
+            if page is None:
+                return None
+            items.extend(page.get(key, []))
+            if not page.get('next_cursor'):
+                return {key: items, 'count': len(items)}
+            params = {'limit': API_PAGE_SIZE, 'cursor': page['next_cursor']}
+
     async def collect_system_metrics(self):
         """Collect comprehensive system metrics from the coordination API"""
         try:
-            # Get system status
-            response = requests.get(f"{self.api_base_url}/system/status")
-            if response.status_code == 200:
-                system_data = response.json()
-                await self._process_system_metrics(system_data)
-            
-            # Get performance dashboard data
-            response = requests.get(f"{self.api_base_url}/dashboard/performance")
-            if response.status_code == 200:
-                performance_data = response.json()
-                await self._process_performance_metrics(performance_data)
-            
-            # Get all agents
-            response = requests.get(f"{self.api_base_url}/agents")
-            if response.status_code == 200:
-                agents_data = response.json()
-                await self._process_agent_metrics(agents_data)
+            # Only rows added or changed since the last cycle are read and folded into the rollups
+            results = await asyncio.gather(
+                self._get_json("/system/status"),
+                self._get_all_pages("/agents", "agents"),
+                *(self.change_feeds.read(source, self._get_json) for source in FEED_SOURCES),
+                return_exceptions=True
+            )
+            failures = [result for result in results if isinstance(result, Exception)]
+            system_data, agents_data, *feed_results = [
+                None if isinstance(result, Exception) else result for result in results
+            ]
             
+            if system_data:
+                await self._process_system_metrics(system_data)
+            if agents_data:
+                self.agent_personas.update({agent['id']: agent['persona'] for agent in agents_data.get('agents', [])})
+            
+            feeds = {source: result for source, result in zip(FEED_SOURCES, feed_results) if result is not None}
+            # Platform analytics also become metric series, for the rollups and anomaly detection
+            self.metrics.record_many('platform', [
+                (f"{record['platform']}.{record['metric_name']}", record['metric_value'], epoch_seconds(record['recorded_at']))
+                for record in feeds.get('analytics', ([], None))[0] if record.get('recorded_at')
+            ])
+            folded = await self.change_feeds.fold(feeds, self.agent_personas, self.rules.observe)
+            logger.info(f"Folded {folded} changes from {', '.join(feeds) or 'no'} change feeds")
+            
+            if failures:
+                raise failures[0]
+            
+            self.rules.observe('collection_success', 1.0)
+            self.alerts.resolve("system_error")
             logger.info("System metrics collection completed")
             
         except Exception as e:
-            logger.error(f"Error collecting system metrics: {e}")
-            await self._create_alert("system_error", "high", f"Failed to collect metrics: {e}")
+            logger.error(f"Error collecting system metrics: {e!r}")
+            self.rules.observe('collection_success', 0.0)
+            self.alerts.fire("system_error", "high", f"Failed to collect metrics: {e!r}")
 
     async def _process_system_metrics(self, system_data: Dict[str, Any]):
         """Process and store system-level metrics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            timestamp = datetime.utcnow().isoformat()
             stats = system_data.get('statistics', {})
             
             # Store system metrics
-            metrics = [
-                ('system', 'total_agents', stats.get('agents', {}).get('total', 0)),
-                ('system', 'active_agents', stats.get('agents', {}).get('active', 0)),
-                ('system', 'total_content', stats.get('content', {}).get('total', 0)),
-                ('system', 'published_content', stats.get('content', {}).get('published', 0)),
-                ('system', 'pending_messages', stats.get('messages', {}).get('pending', 0)),
-                ('system', 'recent_activity', stats.get('messages', {}).get('recent_activity', 0))
-            ]
-            
-            for metric_type, metric_name, metric_value in metrics:
-                cursor.execute('''
-                    INSERT INTO performance_metrics (metric_type, metric_name, metric_value, timestamp, period)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (metric_type, metric_name, metric_value, timestamp, 'hourly'))
-            
-            conn.commit()
-            conn.close()
+            system_metrics = {
+                'total_agents': stats.get('agents', {}).get('total', 0),
+                'active_agents': stats.get('agents', {}).get('active', 0),
+                'total_content': stats.get('content', {}).get('total', 0),
+                'published_content': stats.get('content', {}).get('published', 0),
+                'pending_messages': stats.get('messages', {}).get('pending', 0),
+                'recent_activity': stats.get('messages', {}).get('recent_activity', 0)
+            }
+            self.metrics.record('system', system_metrics)
             
-            # Check for alerts
-            await self._check_system_alerts(stats)
+            # Stream the samples into the alert rules, evaluated by check_alerts()
+            for name, value in system_metrics.items():
+                self.rules.observe(name, value)
+            if system_metrics['total_agents'] > 0:
+                self.rules.observe('active_agent_ratio', system_metrics['active_agents'] / system_metrics['total_agents'])
+            if system_metrics['total_content'] > 0:
+                self.rules.observe('publish_ratio', system_metrics['published_content'] / system_metrics['total_content'])
             
         except Exception as e:
             logger.error(f"Error processing system metrics: {e}")
 
-    async def _process_performance_metrics(self, performance_data: Dict[str, Any]):
-        """Process and store performance metrics"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            current_date = datetime.utcnow().date().isoformat()
-            
-            # Process persona performance
-            for persona_data in performance_data.get('persona_performance', []):
-                cursor.execute('''
-                    INSERT OR REPLACE INTO agent_performance 
-                    (agent_id, persona, content_created, content_published, date)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    f"{persona_data['persona']}_aggregate",
-                    persona_data['persona'],
-                    persona_data['content_count'],
-                    int(persona_data['content_count'] * persona_data['publish_rate']),
-                    current_date
-                ))
-            
-            # Process platform analytics
-            platform_metrics = {}
-            for analytics_data in performance_data.get('platform_analytics', []):
-                platform = analytics_data['platform']
-                if platform not in platform_metrics:
-                    platform_metrics[platform] = {'engagement_rate': 0, 'views': 0, 'record_count': 0}
-                
-                if analytics_data['metric_name'] == 'engagement_rate':
-                    platform_metrics[platform]['engagement_rate'] = analytics_data['avg_value']
-                elif analytics_data['metric_name'] == 'views':
-                    platform_metrics[platform]['views'] = analytics_data['avg_value']
-                
-                platform_metrics[platform]['record_count'] += analytics_data['record_count']
-            
-            # Store platform performance
-            for platform, metrics in platform_metrics.items():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO platform_performance 
-                    (platform, content_count, total_views, avg_engagement_rate, date)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
-                    platform,
-                    metrics['record_count'],
-                    int(metrics['views']),
-                    metrics['engagement_rate'],
-                    current_date
-                ))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            logger.error(f"Error processing performance metrics: {e}")
+    async def check_alerts(self):
+        """Evaluate the alert rules; fire alerts whose rule holds and resolve those that cleared"""
+        for rule, firing, message in self.rules.evaluate():
+            if firing:
+                self.alerts.fire(rule.name, rule.severity, message, key=rule.key)
+            else:
+                self.alerts.resolve(rule.name, key=rule.key)
 
-    async def _process_agent_metrics(self, agents_data: Dict[str, Any]):
-        """Process and store agent-specific metrics"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            current_date = datetime.utcnow().date().isoformat()
-            
-            for agent in agents_data.get('agents', []):
-                # Get agent messages
-                try:
-                    response = requests.get(f"{self.api_base_url}/messages/{agent['id']}")
-                    if response.status_code == 200:
-                        messages_data = response.json()
-                        message_count = messages_data.get('count', 0)
-                    else:
-                        message_count = 0
-                except:
-                    message_count = 0
-                
-                # Calculate activity score based on last activity
-                last_activity = agent.get('last_activity')
-                if last_activity:
-                    last_activity_dt = datetime.fromisoformat(last_activity.replace('Z', '+00:00'))
-                    hours_since_activity = (datetime.utcnow() - last_activity_dt).total_seconds() / 3600
-                    activity_score = max(0, 1 - (hours_since_activity / 24))  # Decay over 24 hours
-                else:
-                    activity_score = 0
-                
-                cursor.execute('''
-                    INSERT OR REPLACE INTO agent_performance 
-                    (agent_id, persona, messages_sent, date)
-                    VALUES (?, ?, ?, ?)
-                ''', (agent['id'], agent['persona'], message_count, current_date))
-            
-            conn.commit()
-            conn.close()
-            
-        except Exception as e:
-            logger.error(f"Error processing agent metrics: {e}")
+    async def downsample_metrics(self):
+        """Roll raw metric samples up into hourly, daily, weekly and monthly buckets"""
+        await self.metrics.downsample()
 
-    async def _check_system_alerts(self, stats: Dict[str, Any]):
-        """Check system metrics against thresholds and create alerts"""
+    async def detect_anomalies(self):
+        """Score the hourly metric buckets closed since the last run for anomalies and alert on them"""
         try:
-            # Check agent activity
-            total_agents = stats.get('agents', {}).get('total', 0)
-            active_agents = stats.get('agents', {}).get('active', 0)
-            
-            if total_agents > 0:
-                active_ratio = active_agents / total_agents
-                if active_ratio < 0.8:
-                    await self._create_alert(
-                        "agent_activity", 
-                        "medium", 
-                        f"Low agent activity: {active_agents}/{total_agents} agents active ({active_ratio:.1%})"
-                    )
-            
-            # Check content production
-            published_content = stats.get('content', {}).get('published', 0)
-            total_content = stats.get('content', {}).get('total', 0)
-            
-            if total_content > 0:
-                publish_ratio = published_content / total_content
-                if publish_ratio < 0.7:
-                    await self._create_alert(
-                        "content_production", 
-                        "medium", 
-                        f"Low publish rate: {published_content}/{total_content} content published ({publish_ratio:.1%})"
-                    )
-            
-            # Check message processing
-            pending_messages = stats.get('messages', {}).get('pending', 0)
-            if pending_messages > 50:
-                await self._create_alert(
-                    "message_processing", 
-                    "high", 
-                    f"High pending message count: {pending_messages} messages pending"
-                )
-            
-        except Exception as e:
-            logger.error(f"Error checking system alerts: {e}")
+            # NumPy is only loaded once anomalies are detected
+            import anomaly_detection
+        except ImportError as e:
+            logger.error(f"Anomaly detection is unavailable ({e}); install numpy to detect anomalies")
+            return
 
-    async def _create_alert(self, alert_type: str, severity: str, message: str, details: Dict[str, Any] = None):
-        """Create a system alert"""
+        end = self.metrics.rolled_up_to('hourly')
+        # The first run scores the last day
+        since = self.anomalies_scored_to or end - 86400
+        if end <= since:
+            return
+        anomalies = await asyncio.to_thread(
+            anomaly_detection.detect_stored, self.db, end, since, settings=self.anomaly_settings
+        )
+        self.anomalies_scored_to = end
+        self.change_feeds.set_watermark('anomalies', str(end))
+
+        keys = []
+        for anomaly in anomalies:
+            metric_type, metric_name = anomaly.series
+            key = {'series': f"{metric_type}.{metric_name}", 'detector': anomaly.detector}
+            keys.append(key)
+            threshold = self.anomaly_settings.threshold(anomaly.detector)
+            self.alerts.fire(
+                'anomaly',
+                'high' if anomaly.score >= 2 * threshold else 'medium',
+                f"Anomalous {metric_type} metric {metric_name}: {anomaly.value:.4g} at "
+                f"{datetime.fromtimestamp(anomaly.timestamp, timezone.utc).isoformat()} ({anomaly.detector} score {anomaly.score:.1f})",
+                details={'value': anomaly.value, 'score': anomaly.score, 'timestamp': anomaly.timestamp},
+                key=key
+            )
+        # Anomalies are points in time; those not seen again in the new hours are over
+        self.alerts.resolve_except('anomaly', keys)
+        logger.info(f"Anomaly detection found {len(anomalies)} anomalies")
+
+    async def apply_retention(self):
+        """Prune each metric level past its retention, and resolved alerts older than retention_days"""
+        cutoff = (datetime.utcnow() - timedelta(days=self.retention_days)).isoformat()
+        self.write_buffer.add("DELETE FROM system_alerts WHERE status = 'resolved' AND resolved_at < ?", [(cutoff,)])
+        deleted = await self.metrics.prune()
+        logger.info(f"Retention applied: removed {sum(deleted.values())} metric rows and resolved alerts older than {cutoff}")
+
+    async def render_dashboard(self, days: int = 7):
+        """generate_performance_dashboard() on a worker thread, so the event loop keeps running"""
+        await self.write_buffer.flush()
+        await asyncio.to_thread(self.generate_performance_dashboard, days)
+
+    async def run_daemon(self, intervals: Optional[Dict[str, float]] = None, dashboard_days: int = 7):
+        """Run collection, alert checks, downsampling, dashboard rendering and retention periodically until stopped.
+
+        Stops on SIGINT/SIGTERM or stop_daemon(); in-flight jobs finish and
+        buffered writes are flushed before returning.
+        """
+        intervals = {**DEFAULT_JOB_INTERVALS, **(intervals or {})}
+        self.job_runner = JobRunner([
+            PeriodicJob('collect', intervals['collect'], self.collect_system_metrics),
+            # Alerts evaluate collected statistics, so the first check waits one interval
+            PeriodicJob('alerts', intervals['alerts'], self.check_alerts, run_at_start=False),
+            PeriodicJob('downsample', intervals['downsample'], self.downsample_metrics),
+            PeriodicJob('anomalies', intervals['anomalies'], self.detect_anomalies),
+            PeriodicJob('dashboard', intervals['dashboard'], lambda: self.render_dashboard(dashboard_days)),
+            PeriodicJob('retention', intervals['retention'], self.apply_retention),
+        ])
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO system_alerts (alert_type, severity, message, details, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                alert_type,
-                severity,
-                message,
-                json.dumps(details) if details else None,
-                datetime.utcnow().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            logger.warning(f"Alert created: [{severity.upper()}] {alert_type}: {message}")
-            
-        except Exception as e:
-            logger.error(f"Error creating alert: {e}")
+            await self.job_runner.run()
+        finally:
+            self.alerts.flush()
+            await self.write_buffer.close()
+            self.job_runner = None
+
+    def stop_daemon(self):
+        if self.job_runner is not None:
+            self.job_runner.stop()
 
     def generate_performance_dashboard(self, days: int = 7) -> str:
         """Generate comprehensive performance dashboard"""
         try:
-            # Create dashboard directory
-            dashboard_dir = Path("dashboard")
-            dashboard_dir.mkdir(exist_ok=True)
-            
-            # Generate visualizations
-            self._create_system_overview_chart(days)
-            self._create_agent_performance_chart(days)
-            self._create_platform_analytics_chart(days)
-            self._create_content_metrics_chart(days)
-            
-            # Generate HTML dashboard
-            dashboard_html = self._generate_dashboard_html(days)
-            
-            dashboard_path = dashboard_dir / "performance_dashboard.html"
-            with open(dashboard_path, 'w') as f:
-                f.write(dashboard_html)
-            
+            # pandas and plotly are only loaded once a dashboard is rendered
+            import dashboard_rendering
+        except ImportError as e:
+            logger.error(f"Dashboard rendering is unavailable ({e}); install pandas and plotly to generate dashboards")
+            return ""
+
+        try:
+            self.write_buffer.flush_sync()
+            # Kept between renders so unchanged charts are skipped and the worker pool is reused
+            if self.dashboard_renderer is None:
+                self.dashboard_renderer = dashboard_rendering.DashboardRenderer(Path("dashboard"))
+            dashboard_path = self.dashboard_renderer.render(self.db, self.metrics, days)
             logger.info(f"Performance dashboard generated: {dashboard_path}")
             return str(dashboard_path)
             
@@ -375,379 +385,51 @@ class MonitoringAnalyticsSystem:
             logger.error(f"Error generating dashboard: {e}")
             return ""
 
-    def _create_system_overview_chart(self, days: int):
-        """Create system overview chart"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get system metrics for the last N days
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
-            
-            query = '''
-                SELECT metric_name, metric_value, timestamp
-                FROM performance_metrics
-                WHERE metric_type = 'system' AND timestamp >= ?
-                ORDER BY timestamp
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=(start_date.isoformat(),))
-            conn.close()
-            
-            if df.empty:
-                return
-            
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Create subplots
-            fig = make_subplots(
-                rows=2, cols=2,
-                subplot_titles=('Active Agents', 'Content Production', 'Message Activity', 'System Health'),
-                specs=[[{"secondary_y": False}, {"secondary_y": False}],
-                       [{"secondary_y": False}, {"secondary_y": False}]]
-            )
-            
-            # Active agents
-            agent_data = df[df['metric_name'] == 'active_agents']
-            if not agent_data.empty:
-                fig.add_trace(
-                    go.Scatter(x=agent_data['timestamp'], y=agent_data['metric_value'],
-                              mode='lines+markers', name='Active Agents'),
-                    row=1, col=1
-                )
-            
-            # Content production
-            content_data = df[df['metric_name'] == 'published_content']
-            if not content_data.empty:
-                fig.add_trace(
-                    go.Scatter(x=content_data['timestamp'], y=content_data['metric_value'],
-                              mode='lines+markers', name='Published Content'),
-                    row=1, col=2
-                )
-            
-            # Message activity
-            message_data = df[df['metric_name'] == 'recent_activity']
-            if not message_data.empty:
-                fig.add_trace(
-                    go.Scatter(x=message_data['timestamp'], y=message_data['metric_value'],
-                              mode='lines+markers', name='Recent Activity'),
-                    row=2, col=1
-                )
-            
-            # System health (pending messages)
-            pending_data = df[df['metric_name'] == 'pending_messages']
-            if not pending_data.empty:
-                fig.add_trace(
-                    go.Scatter(x=pending_data['timestamp'], y=pending_data['metric_value'],
-                              mode='lines+markers', name='Pending Messages'),
-                    row=2, col=2
-                )
-            
-            fig.update_layout(
-                title_text="System Overview Dashboard",
-                showlegend=False,
-                height=600
-            )
-            
-            fig.write_html("dashboard/system_overview.html")
-            
-        except Exception as e:
-            logger.error(f"Error creating system overview chart: {e}")
-
-    def _create_agent_performance_chart(self, days: int):
-        """Create agent performance chart"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get agent performance data
-            end_date = datetime.utcnow().date()
-            start_date = end_date - timedelta(days=days)
-            
-            query = '''
-                SELECT persona, content_created, content_published, messages_sent, date
-                FROM agent_performance
-                WHERE date >= ?
-                ORDER BY date
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=(start_date.isoformat(),))
-            conn.close()
-            
-            if df.empty:
-                return
-            
-            # Create performance chart by persona
-            fig = px.bar(df, x='persona', y='content_created', 
-                        title='Content Creation by Persona',
-                        labels={'content_created': 'Content Created', 'persona': 'Persona'})
-            
-            fig.write_html("dashboard/agent_performance.html")
-            
-        except Exception as e:
-            logger.error(f"Error creating agent performance chart: {e}")
-
-    def _create_platform_analytics_chart(self, days: int):
-        """Create platform analytics chart"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get platform performance data
-            end_date = datetime.utcnow().date()
-            start_date = end_date - timedelta(days=days)
-            
-            query = '''
-                SELECT platform, avg_engagement_rate, total_views, content_count, date
-                FROM platform_performance
-                WHERE date >= ?
-                ORDER BY date
-            '''
-            
-            df = pd.read_sql_query(query, conn, params=(start_date.isoformat(),))
-            conn.close()
-            
-            if df.empty:
-                return
-            
-            # Create engagement rate chart
-            fig = px.bar(df, x='platform', y='avg_engagement_rate',
-                        title='Average Engagement Rate by Platform',
-                        labels={'avg_engagement_rate': 'Engagement Rate', 'platform': 'Platform'})
-            
-            fig.write_html("dashboard/platform_analytics.html")
-            
-        except Exception as e:
-            logger.error(f"Error creating platform analytics chart: {e}")
-
-    def _create_content_metrics_chart(self, days: int):
-        """Create content metrics chart"""
-        try:
-            # Create a sample content metrics chart
-            fig = go.Figure()
-            
-            # Sample data for demonstration
-            platforms = ['LinkedIn', 'Instagram', 'YouTube', 'TikTok']
-            engagement_rates = [0.045, 0.082, 0.038, 0.125]
-            
-            fig.add_trace(go.Bar(
-                x=platforms,
-                y=engagement_rates,
-                name='Engagement Rate',
-                marker_color=['#0077B5', '#E4405F', '#FF0000', '#000000']
-            ))
-            
-            fig.update_layout(
-                title='Content Performance Metrics',
-                xaxis_title='Platform',
-                yaxis_title='Engagement Rate',
-                showlegend=False
-            )
-            
-            fig.write_html("dashboard/content_metrics.html")
-            
-        except Exception as e:
-            logger.error(f"Error creating content metrics chart: {e}")
-
-    def _generate_dashboard_html(self, days: int) -> str:
-        """Generate comprehensive HTML dashboard"""
-        return f'''
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Autonomous Digital Media Agency - Performance Dashboard</title>
-    <style>
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            margin: 0;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }}
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            border-radius: 10px;
-            margin-bottom: 30px;
-            text-align: center;
-        }}
-        .dashboard-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(500px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-        .chart-container {{
-            background: white;
-            border-radius: 10px;
-            padding: 20px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }}
-        .metrics-summary {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-        .metric-card {{
-            background: white;
-            border-radius: 10px;
-            padding: 20px;
-            text-align: center;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }}
-        .metric-value {{
-            font-size: 2em;
-            font-weight: bold;
-            color: #667eea;
-        }}
-        .metric-label {{
-            color: #666;
-            margin-top: 10px;
-        }}
-        .alert-section {{
-            background: white;
-            border-radius: 10px;
-            padding: 20px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }}
-        .alert {{
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-            border-left: 4px solid;
-        }}
-        .alert-high {{
-            background-color: #fee;
-            border-color: #f56565;
-            color: #c53030;
-        }}
-        .alert-medium {{
-            background-color: #fef5e7;
-            border-color: #ed8936;
-            color: #c05621;
-        }}
-        .alert-low {{
-            background-color: #f0fff4;
-            border-color: #48bb78;
-            color: #2f855a;
-        }}
-        iframe {{
-            width: 100%;
-            height: 400px;
-            border: none;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <h1>Autonomous Digital Media Agency</h1>
-        <h2>Performance Dashboard</h2>
-        <p>Last {days} days • Generated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC</p>
-    </div>
-    
-    <div class="metrics-summary">
-        <div class="metric-card">
-            <div class="metric-value">4</div>
-            <div class="metric-label">Active Agents</div>
-        </div>
-        <div class="metric-card">
-            <div class="metric-value">127</div>
-            <div class="metric-label">Content Published</div>
-        </div>
-        <div class="metric-card">
-            <div class="metric-value">5.2%</div>
-            <div class="metric-label">Avg Engagement Rate</div>
-        </div>
-        <div class="metric-card">
-            <div class="metric-value">99.8%</div>
-            <div class="metric-label">System Uptime</div>
-        </div>
-    </div>
-    
-    <div class="dashboard-grid">
-        <div class="chart-container">
-            <h3>System Overview</h3>
-            <iframe src="system_overview.html"></iframe>
-        </div>
-        <div class="chart-container">
-            <h3>Agent Performance</h3>
-            <iframe src="agent_performance.html"></iframe>
-        </div>
-        <div class="chart-container">
-            <h3>Platform Analytics</h3>
-            <iframe src="platform_analytics.html"></iframe>
-        </div>
-        <div class="chart-container">
-            <h3>Content Metrics</h3>
-            <iframe src="content_metrics.html"></iframe>
-        </div>
-    </div>
-    
-    <div class="alert-section">
-        <h3>System Alerts</h3>
-        <div class="alert alert-low">
-            <strong>System Health:</strong> All systems operating normally
-        </div>
-        <div class="alert alert-medium">
-            <strong>Content Production:</strong> Strategic Storyteller agent below target output
-        </div>
-    </div>
-</body>
-</html>
-        '''
-
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get comprehensive performance summary"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get latest metrics
-            cursor = conn.cursor()
-            
-            # System metrics
-            cursor.execute('''
-                SELECT metric_name, metric_value
-                FROM performance_metrics
-                WHERE metric_type = 'system'
-                ORDER BY timestamp DESC
-                LIMIT 10
-            ''')
-            system_metrics = dict(cursor.fetchall())
-            
-            # Agent performance
-            cursor.execute('''
-                SELECT persona, SUM(content_created) as total_content, 
-                       SUM(content_published) as total_published,
-                       AVG(avg_engagement_rate) as avg_engagement
-                FROM agent_performance
-                WHERE date >= date('now', '-7 days')
-                GROUP BY persona
-            ''')
-            agent_performance = cursor.fetchall()
-            
-            # Platform performance
-            cursor.execute('''
-                SELECT platform, AVG(avg_engagement_rate) as avg_engagement,
-                       SUM(total_views) as total_views,
-                       SUM(content_count) as content_count
-                FROM platform_performance
-                WHERE date >= date('now', '-7 days')
-                GROUP BY platform
-            ''')
-            platform_performance = cursor.fetchall()
-            
-            # Active alerts
-            cursor.execute('''
-                SELECT alert_type, severity, COUNT(*) as count
-                FROM system_alerts
-                WHERE status = 'active'
-                GROUP BY alert_type, severity
-            ''')
-            active_alerts = cursor.fetchall()
+            self.write_buffer.flush_sync()
+            
+            def read_summary(conn):
+                # Latest sample of each system metric
+                system_metrics = {name: value for name, value, _timestamp in conn.execute('''
+                    SELECT metric_name, metric_value, MAX(timestamp)
+                    FROM performance_metrics
+                    WHERE metric_type = 'system' AND period = 'raw'
+                    GROUP BY metric_name
+                ''')}
+                
+                # Agent performance
+                agent_performance = conn.execute('''
+                    SELECT persona, SUM(content_created) as total_content, 
+                           SUM(content_published) as total_published,
+                           AVG(avg_engagement_rate) as avg_engagement
+                    FROM agent_performance
+                    WHERE date >= date('now', '-7 days')
+                    GROUP BY persona
+                ''').fetchall()
+                
+                # Platform performance
+                platform_performance = conn.execute('''
+                    SELECT platform, AVG(avg_engagement_rate) as avg_engagement,
+                           SUM(total_views) as total_views,
+                           SUM(content_count) as content_count
+                    FROM platform_performance
+                    WHERE date >= date('now', '-7 days')
+                    GROUP BY platform
+                ''').fetchall()
+                
+                # Active alerts
+                active_alerts = conn.execute('''
+                    SELECT alert_type, severity, COUNT(*) as count, SUM(occurrences) as occurrences
+                    FROM system_alerts
+                    WHERE status = 'active'
+                    GROUP BY alert_type, severity
+                ''').fetchall()
+                
+                return system_metrics, agent_performance, platform_performance, active_alerts
             
-            conn.close()
+            system_metrics, agent_performance, platform_performance, active_alerts = self.db.read_sync(read_summary)
             
             return {
                 'system_metrics': system_metrics,
@@ -771,7 +453,8 @@ class MonitoringAnalyticsSystem:
                     {
                         'alert_type': row[0],
                         'severity': row[1],
-                        'count': row[2]
+                        'count': row[2],
+                        'occurrences': row[3]
                     } for row in active_alerts
                 ],
                 'generated_at': datetime.utcnow().isoformat()
@@ -781,15 +464,51 @@ class MonitoringAnalyticsSystem:
             logger.error(f"Error generating performance summary: {e}")
             return {}
 
+    def close(self):
+        """Flush buffered and pending database writes, close connections and stop dashboard workers"""
+        if self.dashboard_renderer is not None:
+            self.dashboard_renderer.close()
+        self.alerts.flush()
+        self.write_buffer.flush_sync()
+        self.db.close()
+
+    async def aclose(self):
+        """close(), plus the HTTP session; call from the event loop that used it"""
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monitoring and Analytics System")
+    parser.add_argument("--api-url", default="http://localhost:5000/api")
+    parser.add_argument("--db-path", default="analytics.db")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running and repeat each job on its interval instead of running once")
+    parser.add_argument("--retention-days", type=int, default=90, help="days to keep resolved alerts")
+    parser.add_argument("--alert-renotify-interval", type=float, default=DEFAULT_RENOTIFY_INTERVAL,
+                        help="seconds before a still-active alert is notified again")
+    for job, interval in DEFAULT_JOB_INTERVALS.items():
+        parser.add_argument(f"--{job}-interval", type=float, default=interval, help=f"seconds between {job} runs")
+    return parser.parse_args(argv)
+
 # Example usage and testing
 async def main():
     """Example usage of the Monitoring and Analytics System"""
+    args = parse_args()
     
     # Initialize the system
-    monitor = MonitoringAnalyticsSystem()
+    monitor = MonitoringAnalyticsSystem(args.api_url, args.db_path, retention_days=args.retention_days,
+                                        alert_renotify_interval=args.alert_renotify_interval)
+    
+    if args.daemon:
+        await monitor.run_daemon({job: getattr(args, f"{job}_interval") for job in DEFAULT_JOB_INTERVALS})
+        await monitor.aclose()
+        return
     
     # Collect metrics
     await monitor.collect_system_metrics()
+    await monitor.check_alerts()
+    await monitor.downsample_metrics()
     
     # Generate dashboard
     dashboard_path = monitor.generate_performance_dashboard(7)
@@ -799,7 +518,8 @@ async def main():
     summary = monitor.get_performance_summary()
     print("Performance Summary:")
     print(json.dumps(summary, indent=2))
+    
+    await monitor.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
-
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Periodic Jobs
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Runs async jobs on fixed intervals inside one long-lived process. Each job
+has its own loop, so a run never overlaps the previous run of the same job;
+ticks missed while a slow run was in progress are skipped rather than
+queued up. Runs are spread with random jitter so jobs sharing an interval
+do not all fire at once, and stop() lets in-flight runs finish before
+returning.
+"""
+
+import asyncio
+import logging
+import math
+import random
+import signal
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PeriodicJob:
+    """An async callable run every `interval` seconds"""
+    name: str
+    interval: float
+    func: Callable[[], Awaitable[None]]
+    jitter: float = 0.1                # fraction of the interval added at random to each run
+    timeout: Optional[float] = None    # cancel a run that takes longer than this
+    run_at_start: bool = True
+
+
+class JobRunner:
+    """Runs PeriodicJobs until stop() is called or the process gets SIGINT/SIGTERM"""
+
+    def __init__(self, jobs: List[PeriodicJob], shutdown_timeout: float = 30.0):
+        self.jobs = jobs
+        self.shutdown_timeout = shutdown_timeout
+        self.runs: Dict[str, int] = {job.name: 0 for job in jobs}
+        self.skipped: Dict[str, int] = {job.name: 0 for job in jobs}
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def run(self, handle_signals: bool = True) -> None:
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if handle_signals:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(signum, self.stop)
+                except (NotImplementedError, RuntimeError):
+                    pass  # not supported on this platform or outside the main thread
+
+        tasks = [asyncio.create_task(self._run_job(job), name=f"job:{job.name}") for job in self.jobs]
+        logger.info(f"Job runner started: {', '.join(f'{job.name} every {job.interval:g}s' for job in self.jobs)}")
+        try:
+            await self._stopping.wait()
+            # Job loops exit at their next wait; give in-flight runs time to finish
+            done, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+            for task in pending:
+                logger.warning(f"{task.get_name()} did not finish within {self.shutdown_timeout:g}s; cancelling")
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if handle_signals:
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    try:
+                        loop.remove_signal_handler(signum)
+                    except (NotImplementedError, RuntimeError):
+                        pass
+        logger.info("Job runner stopped")
+
+    def stop(self) -> None:
+        if self._stopping is not None and not self._stopping.is_set():
+            logger.info("Stopping job runner")
+            self._stopping.set()
+
+    async def _sleep_until(self, deadline: float) -> bool:
+        """Wait for `deadline` on the loop clock; False if stop() was called first"""
+        timeout = deadline - asyncio.get_running_loop().time()
+        try:
+            await asyncio.wait_for(self._stopping.wait(), max(0.0, timeout))
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    async def _run_job(self, job: PeriodicJob) -> None:
+        loop = asyncio.get_running_loop()
+        # Runs are due on a fixed grid from the start time; jitter delays a run without moving the grid
+        due = loop.time() if job.run_at_start else loop.time() + job.interval
+
+        while not self._stopping.is_set():
+            if not await self._sleep_until(due + random.uniform(0, job.jitter * job.interval)):
+                break
+
+            try:
+                if job.timeout:
+                    await asyncio.wait_for(job.func(), job.timeout)
+                else:
+                    await job.func()
+            except asyncio.TimeoutError:
+                logger.error(f"Job {job.name} timed out after {job.timeout:g}s")
+            except Exception as e:
+                logger.error(f"Job {job.name} failed: {e!r}")
+            self.runs[job.name] += 1
+
+            due += job.interval
+            now = loop.time()
+            if due < now:
+                missed = math.ceil((now - due) / job.interval)
+                due += missed * job.interval
+                self.skipped[job.name] += missed
+                logger.warning(f"Job {job.name} overran its {job.interval:g}s interval; skipped {missed} run(s)")
@@ -10,17 +10,26 @@ and system coordination for the autonomous digital media agency.
 import json
 import asyncio
 import logging
+import random
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from enum import Enum
-import sqlite3
 from pathlib import Path
+from agent_db import AgentDatabase
+from content_scheduler import ContentScheduler
+from periodic_jobs import JobRunner, PeriodicJob
+from platform_limits import DEFAULT_POSTING_WINDOW_MINUTES, PlatformLimiter, PostingWindowCalendar
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Coordination API the recommended posting slots are read from
+DEFAULT_API_BASE_URL = "http://localhost:5000/api"
+DEFAULT_RECOMMENDED_SLOTS = 21  # weekly slots asked for when a platform has no schedule yet
+DEFAULT_SCHEDULE_REFRESH_SECONDS = 3600  # the API refits its slot model hourly by default
+
 class PlatformType(Enum):
     """Supported social media platforms"""
     LINKEDIN = "linkedin"
@@ -72,6 +81,16 @@ class PlatformConfig:
     posting_schedule: Dict[str, List[str]]  # day -> times
     content_guidelines: Dict[str, Any]
     performance_targets: Dict[str, float]
+    posting_schedule_utc: bool = False  # posting_schedule times are UTC rather than local
+
+@dataclass
+class DistributionPolicy:
+    """Limits applied when fanning content out to its target platforms"""
+    max_concurrent_per_platform: int = 4
+    timeout_seconds: float = 30.0
+    max_attempts: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 10.0
 
 @dataclass
 class AgentCommunication:
@@ -95,13 +114,19 @@ class PlatformArchitectureDesigner:
     5. Brand consistency enforcement
     """
     
-    def __init__(self, config_path: str = "config.json"):
+    def __init__(self, config_path: str = "config.json", distribution_policy: Optional[DistributionPolicy] = None,
+                 api_base_url: str = DEFAULT_API_BASE_URL):
         self.config_path = config_path
+        self.api_base_url = api_base_url
         self.platforms: Dict[PlatformType, PlatformConfig] = {}
-        self.content_queue: List[ContentItem] = []
+        self.content_queue = ContentScheduler()  # ContentItems ordered by scheduled_time
         self.agent_registry: Dict[str, Dict] = {}
         self.performance_data: Dict[str, Any] = {}
         self.db_path = "autonomous_agency.db"
+        self.distribution_policy = distribution_policy or DistributionPolicy()
+        self._platform_semaphores: Dict[PlatformType, asyncio.Semaphore] = {}
+        self.platform_limiters: Dict[PlatformType, PlatformLimiter] = {}
+        self.schedule_refresher: Optional[JobRunner] = None
         
         # Initialize database
         self._init_database()
@@ -113,68 +138,67 @@ class PlatformArchitectureDesigner:
 
     def _init_database(self):
         """Initialize SQLite database for storing content and analytics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Content table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS content (
-                id TEXT PRIMARY KEY,
-                persona TEXT NOT NULL,
-                content_type TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                content_body TEXT,
-                media_urls TEXT,
-                hashtags TEXT,
-                target_platforms TEXT,
-                scheduled_time TEXT,
-                created_at TEXT,
-                status TEXT DEFAULT 'draft',
-                performance_metrics TEXT
-            )
-        ''')
-        
-        # Analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content_id TEXT,
-                platform TEXT,
-                metric_name TEXT,
-                metric_value REAL,
-                recorded_at TEXT,
-                FOREIGN KEY (content_id) REFERENCES content (id)
-            )
-        ''')
+        self.db = AgentDatabase(self.db_path)
         
-        # Agent communications table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS agent_communications (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sender_agent TEXT,
-                receiver_agent TEXT,
-                message_type TEXT,
-                payload TEXT,
-                timestamp TEXT,
-                priority INTEGER DEFAULT 1,
-                processed BOOLEAN DEFAULT FALSE
-            )
-        ''')
-        
-        # Platform configurations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS platform_configs (
-                platform TEXT PRIMARY KEY,
-                api_credentials TEXT,
-                posting_schedule TEXT,
-                content_guidelines TEXT,
-                performance_targets TEXT
-            )
-        ''')
+        def create_tables(conn):
+            # Content table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS content (
+                    id TEXT PRIMARY KEY,
+                    persona TEXT NOT NULL,
+                    content_type TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    description TEXT,
+                    content_body TEXT,
+                    media_urls TEXT,
+                    hashtags TEXT,
+                    target_platforms TEXT,
+                    scheduled_time TEXT,
+                    created_at TEXT,
+                    status TEXT DEFAULT 'draft',
+                    performance_metrics TEXT
+                )
+            ''')
+            
+            # Analytics table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content_id TEXT,
+                    platform TEXT,
+                    metric_name TEXT,
+                    metric_value REAL,
+                    recorded_at TEXT,
+                    FOREIGN KEY (content_id) REFERENCES content (id)
+                )
+            ''')
+            
+            # Agent communications table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS agent_communications (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sender_agent TEXT,
+                    receiver_agent TEXT,
+                    message_type TEXT,
+                    payload TEXT,
+                    timestamp TEXT,
+                    priority INTEGER DEFAULT 1,
+                    processed BOOLEAN DEFAULT FALSE
+                )
+            ''')
+            
+            # Platform configurations table
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS platform_configs (
+                    platform TEXT PRIMARY KEY,
+                    api_credentials TEXT,
+                    posting_schedule TEXT,
+                    content_guidelines TEXT,
+                    performance_targets TEXT
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
+        self.db.write_sync(create_tables)
         logger.info("Database initialized successfully")
 
     def _load_configuration(self):
@@ -192,7 +216,13 @@ class PlatformArchitectureDesigner:
                         api_credentials=platform_data.get('api_credentials', {}),
                         posting_schedule=platform_data.get('posting_schedule', {}),
                         content_guidelines=platform_data.get('content_guidelines', {}),
-                        performance_targets=platform_data.get('performance_targets', {})
+                        performance_targets=platform_data.get('performance_targets', {}),
+                        posting_schedule_utc=platform_data.get('posting_schedule_utc', False)
+                    )
+                    self.platform_limiters[platform] = PlatformLimiter.from_config(
+                        self.platforms[platform].posting_schedule,
+                        self.platforms[platform].content_guidelines,
+                        self.platforms[platform].posting_schedule_utc
                     )
                 
                 # Load agent registry
@@ -285,14 +315,11 @@ class PlatformArchitectureDesigner:
     async def add_content_to_queue(self, content: ContentItem):
         """Add content to the distribution queue"""
         try:
-            # Add to memory queue
-            self.content_queue.append(content)
+            # Add to the scheduler; run_scheduler() dispatches it when it comes due
+            self.content_queue.schedule(content)
             
-            # Save to database
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
+            # Save to database on the writer thread; the event loop keeps running meanwhile
+            await self.db.execute('''
                 INSERT INTO content (
                     id, persona, content_type, title, description, content_body,
                     media_urls, hashtags, target_platforms, scheduled_time,
@@ -314,55 +341,201 @@ class PlatformArchitectureDesigner:
                 json.dumps(content.performance_metrics) if content.performance_metrics else None
             ))
             
-            conn.commit()
-            conn.close()
-            
             logger.info(f"Content {content.id} added to queue for {len(content.target_platforms)} platforms")
             
         except Exception as e:
             logger.error(f"Error adding content to queue: {e}")
 
+    async def run_scheduler(self, max_concurrency: int = 100,
+                            schedule_refresh_interval: Optional[float] = DEFAULT_SCHEDULE_REFRESH_SECONDS):
+        """Distribute queued content as it comes due, until stop_scheduler() is called.
+
+        Meanwhile the posting schedules are refreshed from the recommended slots
+        at start and every `schedule_refresh_interval` seconds; None keeps the
+        configured schedules.
+        """
+        refresher = None
+        if schedule_refresh_interval:
+            self.schedule_refresher = JobRunner([
+                PeriodicJob('posting_slots', schedule_refresh_interval, self.refresh_posting_schedules)
+            ])
+            # Starts at the queue's first wait, so it is running by the time the queue can return
+            refresher = asyncio.create_task(self.schedule_refresher.run(handle_signals=False))
+        
+        logger.info(f"Scheduler started with {len(self.content_queue)} queued items")
+        try:
+            await self.content_queue.run(self._distribute, max_concurrency=max_concurrency)
+        finally:
+            if refresher is not None:
+                self.schedule_refresher.stop()
+                await refresher
+                self.schedule_refresher = None
+        logger.info("Scheduler stopped")
+
+    def stop_scheduler(self):
+        self.content_queue.stop()
+
     async def distribute_content(self, content_id: str):
-        """Distribute content to target platforms"""
+        """Distribute queued content to target platforms now, if it is due"""
+        content = self.content_queue.get(content_id)
+        if not content:
+            logger.error(f"Content {content_id} not found in queue")
+            return
+        
+        # Check if it's time to post
+        if content.scheduled_time > datetime.now():
+            logger.info(f"Content {content_id} scheduled for {content.scheduled_time}, skipping for now")
+            return
+        
+        self.content_queue.cancel(content_id)
+        await self._distribute(content)
+
+    async def _distribute(self, content: ContentItem):
+        """Distribute content to the target platforms whose posting window is open.
+
+        Platforms still outside their window are left for a follow-up run:
+        the content is rescheduled for the earliest window that opens next.
+        """
+        content_id = content.id
         try:
-            # Find content in queue
-            content = None
-            for item in self.content_queue:
-                if item.id == content_id:
-                    content = item
-                    break
-            
-            if not content:
-                logger.error(f"Content {content_id} not found in queue")
-                return
-            
-            # Check if it's time to post
-            if content.scheduled_time > datetime.now():
-                logger.info(f"Content {content_id} scheduled for {content.scheduled_time}, skipping for now")
-                return
+            distribution_results = dict(content.performance_metrics or {})
+            now = datetime.now()
             
-            # Distribute to each target platform
-            distribution_results = {}
+            pending = [p for p in content.target_platforms if p.value not in distribution_results]
+            open_now = [p for p in pending if self._next_window(p, now) == now]
+            waiting = [p for p in pending if p not in open_now]
             
-            for platform in content.target_platforms:
-                try:
-                    result = await self._post_to_platform(platform, content)
-                    distribution_results[platform.value] = result
-                    logger.info(f"Content {content_id} posted to {platform.value}: {result}")
-                    
-                except Exception as e:
-                    logger.error(f"Error posting to {platform.value}: {e}")
-                    distribution_results[platform.value] = {"error": str(e)}
+            # Post to every open platform concurrently; a failure on one does not hold up the others
+            results = await asyncio.gather(*(self._post_with_retries(platform, content) for platform in open_now))
+            distribution_results.update({platform.value: result for platform, result in zip(open_now, results)})
+            content.performance_metrics = distribution_results
             
             # Update content status
-            content.status = "published"
-            content.performance_metrics = distribution_results
+            succeeded = sum(1 for result in distribution_results.values() if result.get("success"))
+            if waiting:
+                content.status = "partially_published" if succeeded else "scheduled"
+                content.scheduled_time = min(self._next_window(platform, now) for platform in waiting)
+                self.content_queue.schedule(content)
+                logger.info(f"Content {content_id} waiting for posting windows on "
+                            f"{', '.join(p.value for p in waiting)} until {content.scheduled_time}")
+            elif succeeded == len(content.target_platforms):
+                content.status = "published"
+            elif succeeded:
+                content.status = "partially_published"
+            else:
+                content.status = "failed"
             
-            logger.info(f"Content {content_id} distribution completed")
+            logger.info(f"Content {content_id} distribution pass completed: "
+                        f"{succeeded}/{len(content.target_platforms)} platforms")
             
         except Exception as e:
             logger.error(f"Error distributing content {content_id}: {e}")
 
+    def update_posting_schedule(self, platform: PlatformType, posting_schedule: Dict[str, List[str]],
+                                utc: bool = False):
+        """Post on `posting_schedule` from now on; `utc` if its times are UTC, as recommended slots are.
+
+        Content already waiting for one of the old windows is checked against the new ones when it comes due.
+        """
+        config = self.platforms.get(platform)
+        if config is None:
+            logger.error(f"No configuration for platform {platform.value}")
+            return
+        config.posting_schedule = posting_schedule
+        config.posting_schedule_utc = utc
+        self.platform_limiters[platform] = PlatformLimiter(
+            bucket=self._limiter(platform).bucket,
+            calendar=PostingWindowCalendar(
+                posting_schedule,
+                config.content_guidelines.get("posting_window_minutes", DEFAULT_POSTING_WINDOW_MINUTES),
+                utc
+            )
+        )
+        logger.info(f"Posting schedule for {platform.value} updated to "
+                    f"{sum(len(times) for times in posting_schedule.values())} weekly slots"
+                    f"{' (UTC)' if utc else ''}")
+
+    async def refresh_posting_schedules(self, api_base_url: Optional[str] = None,
+                                        metric: Optional[str] = None) -> List[PlatformType]:
+        """Switch every platform to the slots GET /api/posting-slots/<platform> recommends.
+
+        Each platform asks for as many weekly slots as it has now. Platforms the
+        API has no history for, or cannot be asked about, keep their schedule.
+        Returns the platforms whose schedule was replaced.
+        """
+        # Only needed when schedules are refreshed
+        import aiohttp
+
+        api_base_url = api_base_url or self.api_base_url
+        updated = []
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30, connect=3)) as session:
+            for platform, config in list(self.platforms.items()):
+                params = {"n": sum(len(times) for times in config.posting_schedule.values()) or DEFAULT_RECOMMENDED_SLOTS}
+                if metric:
+                    params["metric"] = metric
+                try:
+                    async with session.get(f"{api_base_url}/posting-slots/{platform.value}", params=params) as response:
+                        body = await response.json()
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                    logger.error(f"Error fetching posting slots for {platform.value}: {e}")
+                    continue
+                if response.status != 200:
+                    logger.warning(f"Keeping the posting schedule for {platform.value}: {body.get('error')}")
+                    continue
+                self.update_posting_schedule(platform, body["posting_schedule"], utc=True)
+                updated.append(platform)
+        return updated
+
+    def _limiter(self, platform: PlatformType) -> Optional[PlatformLimiter]:
+        if platform not in self.platform_limiters and platform in self.platforms:
+            config = self.platforms[platform]
+            self.platform_limiters[platform] = PlatformLimiter.from_config(
+                config.posting_schedule, config.content_guidelines, config.posting_schedule_utc
+            )
+        return self.platform_limiters.get(platform)
+
+    def _next_window(self, platform: PlatformType, moment: datetime) -> datetime:
+        """Start of the platform's next posting window, or `moment` if one is open"""
+        limiter = self._limiter(platform)
+        return limiter.calendar.next_open(moment) if limiter else moment
+
+    def _platform_semaphore(self, platform: PlatformType) -> asyncio.Semaphore:
+        """Per-platform cap on in-flight posts, shared across distribute_content calls"""
+        if platform not in self._platform_semaphores:
+            self._platform_semaphores[platform] = asyncio.Semaphore(self.distribution_policy.max_concurrent_per_platform)
+        return self._platform_semaphores[platform]
+
+    async def _post_with_retries(self, platform: PlatformType, content: ContentItem) -> Dict[str, Any]:
+        """Post to one platform with a timeout and jittered exponential backoff between attempts"""
+        policy = self.distribution_policy
+        if platform not in self.platforms:
+            logger.error(f"Error posting to {platform.value}: no configuration found")
+            return {"success": False, "error": f"No configuration found for platform {platform.value}", "attempts": 0}
+        
+        error = None
+        for attempt in range(1, policy.max_attempts + 1):
+            # Every attempt is an API call: wait for the platform's rate limit rather than hit it
+            await self._limiter(platform).bucket.acquire()
+            try:
+                async with self._platform_semaphore(platform):
+                    result = await asyncio.wait_for(self._post_to_platform(platform, content), policy.timeout_seconds)
+                logger.info(f"Content {content.id} posted to {platform.value}: {result}")
+                return {**result, "attempts": attempt}
+                
+            except asyncio.TimeoutError:
+                error = f"Timed out after {policy.timeout_seconds}s"
+            except Exception as e:
+                error = str(e)
+            
+            logger.warning(f"Attempt {attempt}/{policy.max_attempts} posting {content.id} to {platform.value} failed: {error}")
+            if attempt < policy.max_attempts:
+                # Full jitter keeps retries from several platforms or items from landing in lockstep
+                backoff = min(policy.backoff_max_seconds, policy.backoff_base_seconds * 2 ** (attempt - 1))
+                await asyncio.sleep(random.uniform(0, backoff))
+        
+        logger.error(f"Error posting to {platform.value}: {error}")
+        return {"success": False, "error": error, "attempts": policy.max_attempts}
+
     async def _post_to_platform(self, platform: PlatformType, content: ContentItem) -> Dict[str, Any]:
         """Post content to a specific platform (mock implementation)"""
         platform_config = self.platforms.get(platform)
@@ -383,17 +556,14 @@ class PlatformArchitectureDesigner:
     def get_performance_summary(self) -> Dict[str, Any]:
         """Get performance summary across all platforms and content"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Get content statistics
-            cursor.execute('SELECT COUNT(*) FROM content WHERE status = "published"')
-            published_count = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM content WHERE status = "draft"')
-            draft_count = cursor.fetchone()[0]
-            
-            conn.close()
+            counts = dict(self.db.fetchall_sync('''
+                SELECT status, COUNT(*) FROM content
+                WHERE status IN ('published', 'draft')
+                GROUP BY status
+            '''))
+            published_count = counts.get('published', 0)
+            draft_count = counts.get('draft', 0)
             
             return {
                 "content_stats": {
@@ -408,6 +578,10 @@ class PlatformArchitectureDesigner:
             logger.error(f"Error generating performance summary: {e}")
             return {}
 
+    def close(self):
+        """Flush pending database writes and close connections"""
+        self.db.close()
+
 # Example usage
 async def main():
     """Example usage of the Platform Architecture Designer Agent"""
@@ -437,6 +611,8 @@ async def main():
     summary = agent.get_performance_summary()
     print("Performance Summary:")
     print(json.dumps(summary, indent=2))
+    
+    agent.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Platform Limits
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Per-platform token-bucket rate limiting and posting-window calendars built
+from each platform's configuration.
+"""
+
+import asyncio
+import bisect
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Used when a platform's content_guidelines has no "rate_limit" entry
+DEFAULT_RATE_LIMIT = {"requests": 60, "per_seconds": 60, "burst": 10}
+DEFAULT_POSTING_WINDOW_MINUTES = 60
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `rate` tokens per second up to `capacity`
+
+    acquire() waits exactly as long as the next token needs, in FIFO order,
+    so a burst drains at the sustained rate instead of failing and retrying.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0 or capacity <= 0:
+            raise ValueError(f"Token bucket needs a positive rate and capacity, got rate={rate}, capacity={capacity}")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _check(self, tokens: float) -> None:
+        # More tokens than the bucket holds would never become available
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of capacity {self.capacity}")
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def delay_until_available(self, tokens: float = 1) -> float:
+        """Seconds until `tokens` can be taken, without taking them"""
+        self._check(tokens)
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+
+    async def acquire(self, tokens: float = 1) -> None:
+        self._check(tokens)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.delay_until_available(tokens))
+
+
+class PostingWindowCalendar:
+    """
+    Weekly posting windows built from a posting_schedule (weekday -> ["HH:MM", ...])
+
+    Each listed time opens a window of `window_minutes`. An empty schedule
+    means the platform accepts posts at any time. Moments are naive local
+    times; with `utc` the schedule's times are UTC, as the posting-slots
+    API recommends them, and are matched against each moment's UTC time.
+    """
+
+    def __init__(self, posting_schedule: Dict[str, List[str]], window_minutes: int = DEFAULT_POSTING_WINDOW_MINUTES,
+                 utc: bool = False):
+        self.window = timedelta(minutes=window_minutes)
+        self.utc = utc
+        # Window start times as minutes since Monday 00:00, sorted for bisection
+        self._starts = sorted(
+            WEEKDAYS.index(day.lower()) * 1440 + int(hour) * 60 + int(minute)
+            for day, times in posting_schedule.items()
+            for hour, minute in (slot.split(":") for slot in times)
+        )
+
+    @staticmethod
+    def _week_start(moment: datetime) -> datetime:
+        return (moment - timedelta(days=moment.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def is_open(self, moment: datetime) -> bool:
+        return self.next_open(moment) == moment
+
+    def next_open(self, moment: datetime) -> datetime:
+        """`moment` itself if a window is open then, otherwise the start of the next window"""
+        if not self._starts:
+            return moment
+        if self.utc:
+            # Converted per moment, so the local start of a window follows daylight saving changes
+            utc_moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+            opens = self._next_open(utc_moment)
+            return moment if opens == utc_moment else opens.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+        return self._next_open(moment)
+
+    def _next_open(self, moment: datetime) -> datetime:
+        week_start = self._week_start(moment)
+        minutes = (moment - week_start) / timedelta(minutes=1)
+        position = bisect.bisect_right(self._starts, minutes)
+
+        # The latest window that started at or before `moment`, possibly late last week
+        if position:
+            latest = week_start + timedelta(minutes=self._starts[position - 1])
+        else:
+            latest = week_start + timedelta(minutes=self._starts[-1] - 7 * 1440)
+        if moment < latest + self.window:
+            return moment
+
+        if position < len(self._starts):
+            return week_start + timedelta(minutes=self._starts[position])
+        return week_start + timedelta(days=7, minutes=self._starts[0])
+
+
+@dataclass
+class PlatformLimiter:
+    """Rate limit and posting windows for one platform"""
+    bucket: TokenBucket
+    calendar: PostingWindowCalendar
+
+    @classmethod
+    def from_config(cls, posting_schedule: Dict[str, List[str]], content_guidelines: Dict,
+                    utc: bool = False) -> "PlatformLimiter":
+        rate_limit = {**DEFAULT_RATE_LIMIT, **content_guidelines.get("rate_limit", {})}
+        if rate_limit["per_seconds"] <= 0:
+            raise ValueError(f"rate_limit per_seconds must be positive, got {rate_limit['per_seconds']}")
+        return cls(
+            bucket=TokenBucket(rate_limit["requests"] / rate_limit["per_seconds"], rate_limit["burst"]),
+            calendar=PostingWindowCalendar(
+                posting_schedule,
+                content_guidelines.get("posting_window_minutes", DEFAULT_POSTING_WINDOW_MINUTES),
+                utc
+            )
+        )
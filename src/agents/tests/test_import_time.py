@@ -0,0 +1,24 @@
+"""
+Startup import-time budget for the monitoring system.
+
+Runs `python -X importtime -c "import monitoring_analytics_system"` in
+fresh interpreters, as benchmarks/import_time.py does, and fails if the
+best import is over the budget or loads the visualization stack or NumPy.
+
+    python -m pytest src/agents/tests
+"""
+
+from benchmarks.import_time import DEFAULT_BUDGET_MS, DEFAULT_MODULE, LAZY_MODULES, measure
+
+# The first import also warms the bytecode and filesystem caches, so the best of a few runs is compared
+RUNS = 3
+
+
+def test_monitor_import_is_within_budget_and_lazy():
+    runs = [measure(DEFAULT_MODULE) for _ in range(RUNS)]
+
+    loaded = sorted({name.split('.')[0] for run in runs for name in run} & set(LAZY_MODULES))
+    assert not loaded, f"imported at startup: {', '.join(loaded)}"
+
+    best_ms = min(run[DEFAULT_MODULE] for run in runs) / 1000
+    assert best_ms <= DEFAULT_BUDGET_MS, f"import {DEFAULT_MODULE} took {best_ms:.1f} ms"
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Write-Behind Buffer
+Autonomous Digital Media Agency - Phase 3 Implementation
+
+Collects rows destined for an AgentDatabase in memory and writes them in
+one transaction, with one executemany per run of identical statements,
+once enough rows are pending or the oldest pending row has waited long
+enough. Rows are written in the order they were added.
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import List, Optional, Sequence
+
+from agent_db import AgentDatabase
+
+logger = logging.getLogger(__name__)
+
+# Primary result codes worth retrying; anything else fails the same way every time
+TRANSIENT_ERROR_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED, sqlite3.SQLITE_IOERR}
+
+
+def _is_transient(error: sqlite3.Error) -> bool:
+    # Extended result codes keep the primary code in their low byte
+    code = getattr(error, "sqlite_errorcode", None)
+    return code is not None and code & 0xFF in TRANSIENT_ERROR_CODES
+
+
+class WriteBehindBuffer:
+    """
+    Size- and time-triggered write-behind buffer over an AgentDatabase
+
+    Call flush() or close() before reading back what was added. Rows from a
+    flush that failed for a transient reason (busy or locked database, I/O
+    error) are put back in front of the buffer and retried by the next
+    flush. Any other error (missing table, SQL or constraint error) would
+    fail forever, so each run of identical statements is written under its
+    own savepoint: a run the database rejects is logged and dropped, and
+    the rest of the flush is still committed.
+    """
+
+    def __init__(self, db: AgentDatabase, max_rows: int = 500, max_delay: float = 5.0):
+        self.db = db
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+
+        self._segments: List[list] = []  # [sql, rows] in insertion order
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flushes = set()
+
+    def __len__(self) -> int:
+        return self._pending
+
+    def add(self, sql: str, rows: Sequence[Sequence]) -> None:
+        """Buffer `rows` for `sql`; triggers a flush once `max_rows` are pending"""
+        if not rows:
+            return
+        with self._lock:
+            if self._segments and self._segments[-1][0] == sql:
+                self._segments[-1][1].extend(rows)
+            else:
+                self._segments.append([sql, list(rows)])
+            self._pending += len(rows)
+            full = self._pending >= self.max_rows
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop to run a timer or a background flush on
+            if full:
+                self.flush_sync()
+            return
+
+        if full:
+            self._start_flush(loop)
+        elif self._timer is None or self._timer_loop is not loop:
+            self._timer = loop.call_later(self.max_delay, self._on_timer, loop)
+            self._timer_loop = loop
+
+    def _on_timer(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._timer = None
+        self._start_flush(loop)
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        task = loop.create_task(self.flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    def _take(self) -> List[list]:
+        with self._lock:
+            segments, self._segments, self._pending = self._segments, [], 0
+        # A pending timer is left to fire: cancelling it is not safe from flush_sync's thread,
+        # and flushing an empty buffer is free
+        return segments
+
+    def _failed(self, segments: List[list], error: Exception) -> None:
+        count = sum(len(rows) for _sql, rows in segments)
+        if isinstance(error, sqlite3.Error) and not _is_transient(error):
+            logger.error(f"Write buffer flush rejected, dropping {count} rows: {error}")
+            return
+        logger.error(f"Error flushing write buffer, keeping {count} rows for the next flush: {error}")
+        with self._lock:
+            self._segments[:0] = segments
+            self._pending += count
+
+    @staticmethod
+    def _writer(segments: List[list]):
+        """Write every segment; returns the rows written. A transient error aborts the whole flush"""
+        def write(conn):
+            written = 0
+            for sql, rows in segments:
+                conn.execute("SAVEPOINT segment")
+                try:
+                    conn.executemany(sql, rows)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO segment")
+                    conn.execute("RELEASE segment")
+                    if _is_transient(e):
+                        raise
+                    logger.error(f"Write buffer statement rejected, dropping {len(rows)} rows: {e}\n{sql.strip()}")
+                    continue
+                conn.execute("RELEASE segment")
+                written += len(rows)
+            return written
+        return write
+
+    async def flush(self) -> int:
+        """Write everything pending in one transaction; returns the number of rows written"""
+        segments = self._take()
+        if not segments:
+            return 0
+        try:
+            # Shielded so a cancelled caller cannot withdraw rows already taken from the buffer
+            return await asyncio.shield(asyncio.wrap_future(self.db.submit_write(self._writer(segments))))
+        except Exception as e:
+            self._failed(segments, e)
+            return 0
+
+    def flush_sync(self) -> int:
+        """flush() for callers outside the event loop"""
+        segments = self._take()
+        if not segments:
+            return 0
+        try:
+            return self.db.write_sync(self._writer(segments))
+        except Exception as e:
+            self._failed(segments, e)
+            return 0
+
+    async def close(self) -> None:
+        """Wait for background flushes, then write whatever is still pending"""
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
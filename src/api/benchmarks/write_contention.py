@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Write-contention benchmark for the coordination API's SQLite database.
+
+Runs the same mixed workload (concurrent writers committing small
+transactions alongside readers counting rows) against a bare SQLite
+engine and against one tuned by src.database, then prints throughput,
+commit latency and "database is locked" failures for each.
+
+    python benchmarks/write_contention.py --writers 8 --readers 4 --transactions 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from src.database import DEFAULT_POOL_OPTIONS, apply_sqlite_pragmas, sqlite_pragmas
+
+
+def run_workload(engine, writers, readers, transactions):
+    with engine.begin() as conn:
+        conn.execute(text('''
+            CREATE TABLE agent_messages (
+                id INTEGER PRIMARY KEY,
+                sender_agent_id TEXT NOT NULL,
+                receiver_agent_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        '''))
+
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop_readers = threading.Event()
+
+    def writer(worker_id):
+        for n in range(transactions):
+            started = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(
+                        text('INSERT INTO agent_messages (sender_agent_id, receiver_agent_id, payload, created_at) '
+                             'VALUES (:sender, :receiver, :payload, datetime())'),
+                        {'sender': f'agent_{worker_id}', 'receiver': f'agent_{n % 10}', 'payload': '{}'}
+                    )
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+
+    def reader():
+        while not stop_readers.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT COUNT(*) FROM agent_messages')).scalar()
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e.orig))
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+
+    started = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stop_readers.set()
+    for thread in reader_threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'commits': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'commits_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0.0,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def bare_engine(path):
+    # What main.py used to configure: rollback journal, synchronous=FULL, driver defaults
+    return create_engine(f'sqlite:///{path}')
+
+
+def tuned_engine(path):
+    engine = create_engine(f'sqlite:///{path}', **DEFAULT_POOL_OPTIONS)
+    pragmas = sqlite_pragmas()
+    event.listen(engine, 'connect', lambda dbapi_connection, record: apply_sqlite_pragmas(dbapi_connection, pragmas))
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--transactions', type=int, default=200, help='commits per writer')
+    args = parser.parse_args()
+
+    print(f'{args.writers} writers x {args.transactions} commits, {args.readers} concurrent readers')
+    print(f"{'configuration':<10} {'commits':>8} {'errors':>7} {'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, make_engine in (('before', bare_engine), ('after', tuned_engine)):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = make_engine(os.path.join(directory, 'app.db'))
+            result = run_workload(engine, args.writers, args.readers, args.transactions)
+            engine.dispose()
+        print(f"{name:<10} {result['commits']:>8} {result['errors']:>7} {result['commits_per_second']:>10.1f} "
+              f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
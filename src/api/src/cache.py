@@ -0,0 +1,126 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after a time-to-live"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by every invalidate(); a value computed across one may predate the write and is not stored
+        self._generation = 0
+        # Key -> Event set when its single in-flight get_or_refresh() computation finishes
+        self._computing = {}
+
+    def get_or_compute(self, key, ttl, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+            generation = self._generation
+
+        value = compute()
+        if ttl > 0:
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = (now + ttl, value)
+        return value
+
+    def get_or_refresh(self, key, ttl, compute, spawn):
+        """Like get_or_compute, but an expired value keeps being served while one refresh runs.
+
+        The refresh is handed to `spawn(refresh)` to run off the caller's path.
+        Only a key with no value at all is computed by a caller, and callers
+        arriving meanwhile wait for that one computation rather than repeat it.
+        """
+        if ttl <= 0:
+            return compute()
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > now:
+                    return entry[1]
+                done = self._computing.get(key)
+                owner = done is None
+                if owner:
+                    done = self._computing[key] = threading.Event()
+                generation = self._generation
+
+            if entry:
+                if owner:
+                    spawn(lambda: self._compute(key, ttl, compute, generation, done))
+                return entry[1]
+            if owner:
+                return self._compute(key, ttl, compute, generation, done)
+            # Read the stored value next time round; if the computation failed, compute it here
+            done.wait()
+
+    def _compute(self, key, ttl, compute, generation, done):
+        try:
+            value = compute()
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = (time.monotonic() + ttl, value)
+            return value
+        finally:
+            with self._lock:
+                self._computing.pop(key, None)
+            done.set()
+
+    def invalidate(self, key=None):
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+_commit_callbacks = []
+
+
+def on_committed_write(tables, callback):
+    """Call `callback()` after any commit that inserted, updated or deleted rows in `tables`"""
+    _commit_callbacks.append((frozenset(tables), callback))
+
+
+def _touched(session):
+    return session.info.setdefault('touched_tables', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_tables(session, flush_context):
+    touched = _touched(session)
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, '__table__', None)
+        if table is not None:
+            touched.add(table.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_executed_tables(orm_execute_state):
+    # Core-style insert/update/delete run through session.execute() bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            _touched(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_commit_callbacks(session):
+    touched = session.info.pop('touched_tables', None)
+    if not touched:
+        return
+    for tables, callback in _commit_callbacks:
+        if tables & touched:
+            callback()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_touched_tables(session):
+    session.info.pop('touched_tables', None)
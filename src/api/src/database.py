@@ -0,0 +1,96 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Applied to every new SQLite connection. WAL lets readers proceed while a
+# writer commits, synchronous=NORMAL fsyncs only at checkpoints under WAL,
+# and busy_timeout makes writers queue for the lock instead of failing with
+# "database is locked".
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,        # milliseconds
+    'mmap_size': 268435456,      # 256 MiB
+    'cache_size': -65536,        # negative means KiB: 64 MiB per connection
+    'temp_store': 'MEMORY',
+}
+
+DEFAULT_POOL_OPTIONS = {
+    'pool_size': 10,
+    'max_overflow': 20,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+    'pool_pre_ping': True,
+}
+
+
+def _env_overrides(prefix, defaults):
+    """Read PREFIX_<NAME> environment variables over `defaults`, keeping their types"""
+    values = dict(defaults)
+    for name, default in defaults.items():
+        raw = os.environ.get(f'{prefix}_{name.upper()}')
+        if raw is None:
+            continue
+        if isinstance(default, bool):
+            values[name] = raw.lower() in ('1', 'true', 'yes', 'on')
+        elif isinstance(default, int):
+            values[name] = int(raw)
+        else:
+            values[name] = raw
+    return values
+
+
+def sqlite_pragmas():
+    """DEFAULT_SQLITE_PRAGMAS with SQLITE_<PRAGMA> environment overrides"""
+    return _env_overrides('SQLITE', DEFAULT_SQLITE_PRAGMAS)
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def is_memory_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def configure_database(app, default_uri):
+    """Set the database URI and engine options from the environment.
+
+    DATABASE_URL (or SQLALCHEMY_DATABASE_URI) overrides `default_uri`;
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and
+    DB_POOL_PRE_PING size the connection pool.
+    """
+    uri = os.environ.get('DATABASE_URL') or os.environ.get('SQLALCHEMY_DATABASE_URI') or default_uri
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and not is_memory_database(uri):
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+
+    # In-memory SQLite uses a single shared connection, which has no pool to size
+    if not is_memory_database(uri):
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update(_env_overrides('DB', DEFAULT_POOL_OPTIONS))
+
+
+def init_database(app, db):
+    """Bind `db` to the app and apply the SQLite pragmas on every new connection"""
+    db.init_app(app)
+
+    if make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name() != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas()
+    if is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        pragmas.pop('journal_mode')
+        pragmas.pop('mmap_size')
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'connect')
+        def _on_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, pragmas)
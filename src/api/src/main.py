@@ -5,8 +5,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory
 from flask_cors import CORS
+from src.database import configure_database, init_database
 from src.models.user import db
 from src.models.agent import Agent, AgentMessage, ContentItem, PlatformAnalytics, SystemStatus
+from src.models.schema import upgrade_schema
+from src.notifications import init_message_hub
 from src.routes.user import user_bp
 from src.routes.agent import agent_bp
 
@@ -19,12 +22,20 @@ CORS(app, origins="*")
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(agent_bp, url_prefix='/api')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Database configuration; DATABASE_URL overrides the bundled SQLite file
+configure_database(app, f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
+# 'memory' wakes long-poll/SSE readers in-process; use 'polling' when running several workers
+app.config['MESSAGE_HUB'] = os.environ.get('MESSAGE_HUB', 'memory')
+# Seconds /system/status statistics are cached between writes; 0 disables the cache
+app.config['SYSTEM_STATUS_TTL'] = float(os.environ.get('SYSTEM_STATUS_TTL', 10))
+# Seconds a fitted posting-slot model is served before it is refitted from analytics history
+app.config['SLOT_MODEL_TTL'] = float(os.environ.get('SLOT_MODEL_TTL', 3600))
+init_database(app, db)
+init_message_hub(app)
 with app.app_context():
     db.create_all()
+    upgrade_schema()
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -1,8 +1,6 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
-
-db = SQLAlchemy()
+from src.models.user import db
 
 class Agent(db.Model):
     """Model for registered agents in the system"""
@@ -11,8 +9,8 @@ class Agent(db.Model):
     id = db.Column(db.String(100), primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     persona = db.Column(db.String(50), nullable=False)
-    primary_platforms = db.Column(db.Text, nullable=False)  # JSON string
-    content_types = db.Column(db.Text, nullable=False)  # JSON string
+    primary_platforms = db.Column(db.JSON, nullable=False)
+    content_types = db.Column(db.JSON, nullable=False)
     posting_frequency = db.Column(db.String(50), nullable=False)
     status = db.Column(db.String(20), default='active')
     last_activity = db.Column(db.DateTime, default=datetime.utcnow)
@@ -23,8 +21,8 @@ class Agent(db.Model):
             'id': self.id,
             'name': self.name,
             'persona': self.persona,
-            'primary_platforms': json.loads(self.primary_platforms),
-            'content_types': json.loads(self.content_types),
+            'primary_platforms': self.primary_platforms,
+            'content_types': self.content_types,
             'posting_frequency': self.posting_frequency,
             'status': self.status,
             'last_activity': self.last_activity.isoformat() if self.last_activity else None,
@@ -41,10 +39,28 @@ class AgentMessage(db.Model):
     message_type = db.Column(db.String(50), nullable=False)
     payload = db.Column(db.Text, nullable=False)  # JSON string
     priority = db.Column(db.Integer, default=1)
-    status = db.Column(db.String(20), default='pending')  # pending, processed, failed
+    status = db.Column(db.String(20), default='pending')  # pending, in_flight, processed, failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     processed_at = db.Column(db.DateTime, nullable=True)
     response = db.Column(db.Text, nullable=True)  # JSON string
+    lease_token = db.Column(db.String(36), nullable=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    delivery_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Set on every insert and update, including bulk db.update() statements; drives GET /changes/messages
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # Inbox reads: WHERE receiver_agent_id = ? AND status = ? ORDER BY priority DESC, created_at ASC
+        db.Index('ix_agent_messages_inbox', receiver_agent_id, status, priority.desc(), created_at),
+        # SSE stream: WHERE receiver_agent_id = ? AND status = 'pending' AND id > ? ORDER BY id
+        db.Index('ix_agent_messages_stream', receiver_agent_id, status, id),
+        # Status counts in /system/status and the expired-lease reaper
+        db.Index('ix_agent_messages_status', status, lease_expires_at),
+        # Recent-activity count in /system/status
+        db.Index('ix_agent_messages_created', created_at),
+        # Change feed order
+        db.Index('ix_agent_messages_updated', updated_at, id),
+    )
     
     def to_dict(self):
         return {
@@ -57,7 +73,10 @@ class AgentMessage(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'processed_at': self.processed_at.isoformat() if self.processed_at else None,
-            'response': json.loads(self.response) if self.response else None
+            'response': json.loads(self.response) if self.response else None,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
+            'delivery_count': self.delivery_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 class ContentItem(db.Model):
@@ -71,14 +90,26 @@ class ContentItem(db.Model):
     title = db.Column(db.String(500), nullable=False)
     description = db.Column(db.Text, nullable=True)
     content_body = db.Column(db.Text, nullable=False)
-    media_urls = db.Column(db.Text, nullable=True)  # JSON string
-    hashtags = db.Column(db.Text, nullable=True)  # JSON string
-    target_platforms = db.Column(db.Text, nullable=False)  # JSON string
+    media_urls = db.Column(db.JSON, nullable=True)
+    hashtags = db.Column(db.JSON, nullable=True)  # queryable through content_hashtags
+    target_platforms = db.Column(db.JSON, nullable=False)  # queryable through content_platforms
     scheduled_time = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(20), default='draft')  # draft, scheduled, published, failed
     performance_metrics = db.Column(db.Text, nullable=True)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     published_at = db.Column(db.DateTime, nullable=True)
+    # Set on every insert and update; drives GET /changes/content
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        # GET /content filters on any one of these and pages by (scheduled_time, id)
+        db.Index('ix_content_items_scheduled', scheduled_time, id),
+        db.Index('ix_content_items_status_scheduled', status, scheduled_time, id),
+        db.Index('ix_content_items_persona_scheduled', persona, scheduled_time, id),
+        db.Index('ix_content_items_creator_scheduled', creator_agent_id, scheduled_time, id),
+        # Change feed order
+        db.Index('ix_content_items_updated', updated_at, id),
+    )
     
     def to_dict(self):
         return {
@@ -89,16 +120,50 @@ class ContentItem(db.Model):
             'title': self.title,
             'description': self.description,
             'content_body': self.content_body,
-            'media_urls': json.loads(self.media_urls) if self.media_urls else [],
-            'hashtags': json.loads(self.hashtags) if self.hashtags else [],
-            'target_platforms': json.loads(self.target_platforms),
+            'media_urls': self.media_urls or [],
+            'hashtags': self.hashtags or [],
+            'target_platforms': self.target_platforms,
             'scheduled_time': self.scheduled_time.isoformat() if self.scheduled_time else None,
             'status': self.status,
             'performance_metrics': json.loads(self.performance_metrics) if self.performance_metrics else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'published_at': self.published_at.isoformat() if self.published_at else None
+            'published_at': self.published_at.isoformat() if self.published_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+def normalize_hashtag(tag):
+    """Hashtags match case-insensitively and with or without the leading '#'"""
+    return tag.strip().lstrip('#').lower()
+
+def content_tag_rows(content_id, target_platforms, hashtags):
+    """Build the content_platforms and content_hashtags rows for a content item"""
+    platform_rows = [{'content_id': content_id, 'platform': platform} for platform in set(target_platforms or [])]
+    hashtag_rows = [{'content_id': content_id, 'hashtag': tag} for tag in {normalize_hashtag(tag) for tag in hashtags or []} if tag]
+    return platform_rows, hashtag_rows
+
+class ContentPlatform(db.Model):
+    """Target platforms of a content item, one row per platform"""
+    __tablename__ = 'content_platforms'
+    
+    # (platform, content_id) as the key lets GET /content?platform= search instead of scan
+    platform = db.Column(db.String(50), primary_key=True)
+    content_id = db.Column(db.String(100), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_content_platforms_content', content_id),
+    )
+
+class ContentHashtag(db.Model):
+    """Normalized hashtags of a content item, one row per hashtag"""
+    __tablename__ = 'content_hashtags'
+    
+    hashtag = db.Column(db.String(100), primary_key=True)
+    content_id = db.Column(db.String(100), primary_key=True)
+    
+    __table_args__ = (
+        db.Index('ix_content_hashtags_content', content_id),
+    )
+
 class PlatformAnalytics(db.Model):
     """Model for platform analytics data"""
     __tablename__ = 'platform_analytics'
@@ -110,6 +175,12 @@ class PlatformAnalytics(db.Model):
     metric_value = db.Column(db.Float, nullable=False)
     recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_platform_analytics_content', content_id, recorded_at),
+        # Posting-slot fits: WHERE metric_name = ? AND recorded_at >= ?
+        db.Index('ix_platform_analytics_metric', metric_name, recorded_at),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -131,6 +202,10 @@ class SystemStatus(db.Model):
     metrics = db.Column(db.Text, nullable=True)  # JSON string
     last_check = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_system_status_component', component),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
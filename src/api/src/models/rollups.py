@@ -0,0 +1,134 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+
+
+class ContentPersonaDaily(db.Model):
+    """Content created per persona per day, and how much of it is published"""
+    __tablename__ = 'rollup_content_persona_daily'
+
+    persona = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    content_count = db.Column(db.Integer, nullable=False, default=0)
+    published_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_rollup_content_persona_daily_day', day),
+    )
+
+class PlatformMetricHourly(db.Model):
+    """Sum and count of each platform metric per hour"""
+    __tablename__ = 'rollup_platform_metric_hourly'
+
+    platform = db.Column(db.String(50), primary_key=True)
+    metric_name = db.Column(db.String(100), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)
+    value_sum = db.Column(db.Float, nullable=False, default=0.0)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_rollup_platform_metric_hourly_hour', hour),
+    )
+
+class SenderMessageDaily(db.Model):
+    """Messages sent per agent per day"""
+    __tablename__ = 'rollup_sender_message_daily'
+
+    sender_agent_id = db.Column(db.String(100), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_rollup_sender_message_daily_day', day),
+    )
+
+ROLLUP_MODELS = (ContentPersonaDaily, PlatformMetricHourly, SenderMessageDaily)
+
+
+def _day(timestamp):
+    return (timestamp or datetime.utcnow()).date()
+
+def _hour(timestamp):
+    return (timestamp or datetime.utcnow()).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+
+def _increment(model, increments):
+    """Add `increments` ({key tuple: {column: delta}}) to the rollup rows in one upsert"""
+    if not increments:
+        return
+
+    key_columns = [column.name for column in model.__table__.primary_key.columns]
+    rows = [{**dict(zip(key_columns, key)), **deltas} for key, deltas in increments.items()]
+    value_columns = list(rows[0].keys() - set(key_columns))
+
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    statement = insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={column: getattr(model, column) + getattr(statement.excluded, column) for column in value_columns}
+    )
+    db.session.execute(statement, rows)
+
+
+def record_content(items):
+    """Fold newly created content (dicts with persona, status, created_at) into the persona rollup"""
+    increments = defaultdict(lambda: {'content_count': 0, 'published_count': 0})
+    for item in items:
+        bucket = increments[(item['persona'], _day(item.get('created_at')))]
+        bucket['content_count'] += 1
+        bucket['published_count'] += 1 if item.get('status') == 'published' else 0
+    _increment(ContentPersonaDaily, increments)
+
+def record_content_status_change(content, old_status):
+    """Move a content item in or out of its creation day's published count"""
+    was_published, is_published = old_status == 'published', content.status == 'published'
+    if was_published != is_published:
+        _increment(ContentPersonaDaily, {
+            (content.persona, _day(content.created_at)): {'content_count': 0, 'published_count': 1 if is_published else -1}
+        })
+
+def record_messages(messages):
+    """Fold newly sent messages (dicts with sender_agent_id, created_at) into the sender rollup"""
+    increments = defaultdict(lambda: {'message_count': 0})
+    for message in messages:
+        increments[(message['sender_agent_id'], _day(message.get('created_at')))]['message_count'] += 1
+    _increment(SenderMessageDaily, increments)
+
+def record_analytics(records):
+    """Fold new analytics points (dicts with platform, metric_name, metric_value, recorded_at) into the hourly rollup"""
+    increments = defaultdict(lambda: {'value_sum': 0.0, 'record_count': 0})
+    for record in records:
+        bucket = increments[(record['platform'], record['metric_name'], _hour(record.get('recorded_at')))]
+        bucket['value_sum'] += record['metric_value']
+        bucket['record_count'] += 1
+    _increment(PlatformMetricHourly, increments)
+
+
+def rebuild_rollups():
+    """Recompute every rollup from the raw tables; used to seed databases that predate them"""
+    for model in ROLLUP_MODELS:
+        db.session.execute(db.delete(model))
+
+    db.session.execute(db.text('''
+        INSERT INTO rollup_content_persona_daily (persona, day, content_count, published_count)
+        SELECT persona, date(created_at), COUNT(*), SUM(CASE WHEN status = 'published' THEN 1 ELSE 0 END)
+        FROM content_items
+        WHERE created_at IS NOT NULL
+        GROUP BY persona, date(created_at)
+    '''))
+    db.session.execute(db.text('''
+        INSERT INTO rollup_platform_metric_hourly (platform, metric_name, hour, value_sum, record_count)
+        SELECT platform, metric_name, strftime('%Y-%m-%d %H:00:00.000000', recorded_at), SUM(metric_value), COUNT(*)
+        FROM platform_analytics
+        WHERE recorded_at IS NOT NULL
+        GROUP BY platform, metric_name, strftime('%Y-%m-%d %H:00:00.000000', recorded_at)
+    '''))
+    db.session.execute(db.text('''
+        INSERT INTO rollup_sender_message_daily (sender_agent_id, day, message_count)
+        SELECT sender_agent_id, date(created_at), COUNT(*)
+        FROM agent_messages
+        WHERE created_at IS NOT NULL
+        GROUP BY sender_agent_id, date(created_at)
+    '''))
+    db.session.commit()
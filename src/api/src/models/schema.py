@@ -0,0 +1,118 @@
+from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.user import db
+from src.models.agent import (
+    Agent, AgentMessage, ContentItem, ContentPlatform, ContentHashtag, PlatformAnalytics, SystemStatus,
+    content_tag_rows
+)
+from src.models.rollups import ROLLUP_MODELS, rebuild_rollups
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+class SchemaMigration(db.Model):
+    """One-off data migrations that have completed, so they are not repeated on every start"""
+    __tablename__ = 'schema_migrations'
+
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+def _run_once(name, migrate):
+    """Run `migrate()` unless a previous start already completed it"""
+    if db.session.get(SchemaMigration, name) is not None:
+        return
+    migrate()
+    db.session.add(SchemaMigration(name=name))
+    db.session.commit()
+
+
+def _add_missing_columns(engine, table):
+    """Add columns that exist on the model but not yet in the database table"""
+    existing = {column['name'] for column in db.inspect(engine).get_columns(table.name)}
+    with engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}'
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            conn.execute(db.text(ddl))
+
+
+def _insert_missing(model, rows):
+    """Insert `rows`, skipping any whose primary key already exists"""
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    db.session.execute(insert(model).on_conflict_do_nothing(), rows)
+
+
+def _backfill_content_tags():
+    """Populate content_platforms/content_hashtags for content written before they existed"""
+    # Content lacking either kind of row; items whose lists are empty stay in this set,
+    # so batches advance by id rather than waiting for the set to drain
+    untagged = db.select(ContentItem.id, ContentItem.target_platforms, ContentItem.hashtags).where(
+        ~ContentItem.id.in_(db.select(ContentPlatform.content_id)) |
+        ~ContentItem.id.in_(db.select(ContentHashtag.content_id))
+    ).order_by(ContentItem.id).limit(BACKFILL_BATCH_SIZE)
+    
+    last_id = None
+    while True:
+        query = untagged if last_id is None else untagged.where(ContentItem.id > last_id)
+        batch = db.session.execute(query).all()
+        if not batch:
+            break
+        platform_rows, hashtag_rows = [], []
+        for content_id, target_platforms, hashtags in batch:
+            platforms, tags = content_tag_rows(content_id, target_platforms, hashtags)
+            platform_rows += platforms
+            hashtag_rows += tags
+        
+        _insert_missing(ContentPlatform, platform_rows)
+        _insert_missing(ContentHashtag, hashtag_rows)
+        db.session.commit()
+        last_id = batch[-1][0]
+
+
+def _backfill_updated_at():
+    """Give rows written before updated_at existed a change-feed position"""
+    now = datetime.utcnow()
+    for model, changed_at in (
+        (AgentMessage, db.func.coalesce(AgentMessage.processed_at, AgentMessage.created_at, now)),
+        (ContentItem, db.func.coalesce(ContentItem.published_at, ContentItem.created_at, now)),
+    ):
+        # Explicit value, so the column's onupdate does not stamp every row with now
+        db.session.execute(
+            db.update(model).where(model.updated_at.is_(None)).values(updated_at=changed_at),
+            execution_options={'synchronize_session': False}
+        )
+    db.session.commit()
+
+
+def _seed_rollups():
+    """Build the dashboard rollups once for databases that have data but no rollups yet"""
+    if any(db.session.execute(db.select(model).limit(1)).first() for model in ROLLUP_MODELS):
+        return
+    if any(db.session.execute(db.select(model.id).limit(1)).first() for model in (ContentItem, PlatformAnalytics, AgentMessage)):
+        rebuild_rollups()
+
+
+def upgrade_schema():
+    """Bring an existing database up to the current model definitions.
+
+    ``db.create_all()`` only creates missing tables, so columns and indexes
+    added to a model after its table already exists are created here, and
+    lookup tables derived from existing rows are filled in.
+    """
+    engine = db.engine
+    SchemaMigration.__table__.create(bind=engine, checkfirst=True)
+    for model in (Agent, AgentMessage, ContentItem, ContentPlatform, ContentHashtag, PlatformAnalytics, SystemStatus, *ROLLUP_MODELS):
+        _add_missing_columns(engine, model.__table__)
+        for index in model.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    _run_once('backfill_content_tags', _backfill_content_tags)
+    _backfill_updated_at()
+    _seed_rollups()
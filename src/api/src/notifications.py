@@ -0,0 +1,93 @@
+import threading
+import time
+from flask import current_app
+
+
+class InProcessMessageHub:
+    """Wakes up inbox readers in this process as soon as a message is committed.
+
+    Every receiver has a version counter that is bumped on publish. A reader
+    records the version before querying and then waits for it to change, so
+    a message committed between the query and the wait is never missed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._conditions = {}
+
+    def _condition(self, key):
+        condition = self._conditions.get(key)
+        if condition is None:
+            condition = self._conditions.setdefault(key, threading.Condition(self._lock))
+        return condition
+
+    def version(self, key):
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def publish(self, key):
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._condition(key).notify_all()
+
+    def wait(self, key, version, timeout):
+        """Block until `key` moves past `version`; returns False on timeout"""
+        with self._lock:
+            return self._condition(key).wait_for(
+                lambda: self._versions.get(key, 0) != version, timeout
+            )
+
+
+class PollingMessageHub:
+    """Stand-in for a shared broker when the API runs as several worker processes.
+
+    Publishes in one worker are invisible to the others, so waiters probe a
+    cheap indexed version query (e.g. the newest message id for the receiver)
+    at a short interval instead of re-running the full inbox query.
+    """
+
+    def __init__(self, probe, interval=0.25):
+        self._probe = probe
+        self._interval = interval
+
+    def version(self, key):
+        return self._probe(key)
+
+    def publish(self, key):
+        pass
+
+    def wait(self, key, version, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._probe(key) != version:
+                return True
+            time.sleep(min(self._interval, max(0, deadline - time.monotonic())))
+        return self._probe(key) != version
+
+
+def init_message_hub(app, hub=None):
+    """Attach the inbox notification hub selected by MESSAGE_HUB ('memory' or 'polling')"""
+    if hub is None:
+        if app.config.get('MESSAGE_HUB', 'memory') == 'polling':
+            from src.models.agent import db, AgentMessage
+
+            def newest_message_id(receiver_agent_id):
+                newest = db.session.query(db.func.max(AgentMessage.id)).filter(
+                    AgentMessage.receiver_agent_id == receiver_agent_id
+                ).scalar()
+                db.session.close()
+                return newest or 0
+
+            hub = PollingMessageHub(newest_message_id, app.config.get('MESSAGE_HUB_POLL_INTERVAL', 0.25))
+        else:
+            hub = InProcessMessageHub()
+    app.extensions['message_hub'] = hub
+    return hub
+
+
+def get_message_hub():
+    hub = current_app.extensions.get('message_hub')
+    if hub is None:
+        hub = init_message_hub(current_app._get_current_object())
+    return hub
@@ -0,0 +1,77 @@
+import base64
+import json
+from datetime import datetime
+from src.models.user import db
+
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def page_size(requested, default):
+    """Clamp a client-supplied limit to [1, MAX_PAGE_SIZE]"""
+    try:
+        size = int(requested) if requested is not None else default
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row on a page as an opaque token"""
+    encoded = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(encoded, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_keys):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise PaginationError('Malformed cursor')
+    if not isinstance(values, list) or len(values) != len(sort_keys):
+        raise PaginationError('Cursor does not match this listing')
+
+    decoded = []
+    for (column, _descending), value in zip(sort_keys, values):
+        if value is not None and isinstance(column.type, db.DateTime):
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise PaginationError('Malformed cursor')
+        decoded.append(value)
+    return decoded
+
+
+def _after(sort_keys, values):
+    """Rows strictly after `values` in the (possibly mixed-direction) sort order.
+
+    Expands to (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with < for
+    descending keys, which SQLite answers as a range seek on the matching index.
+    """
+    clauses = []
+    for position, ((column, descending), value) in enumerate(zip(sort_keys, values)):
+        equal_prefix = [prefix_column == prefix_value for (prefix_column, _), prefix_value in zip(sort_keys[:position], values)]
+        beyond = column < value if descending else column > value
+        clauses.append(db.and_(*equal_prefix, beyond))
+    return db.or_(*clauses)
+
+
+def keyset_page(query, sort_keys, cursor=None, limit=MAX_PAGE_SIZE):
+    """Fetch one page of `query` ordered by `sort_keys`, a list of (column, descending).
+
+    The last key must be unique (normally the primary key) so the order is
+    total. Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        query = query.filter(_after(sort_keys, decode_cursor(cursor, sort_keys)))
+
+    order_by = [column.desc() if descending else column.asc() for column, descending in sort_keys]
+    items = query.order_by(*order_by).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column, _ in sort_keys])
+    return items, next_cursor
@@ -1,11 +1,43 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime, timedelta
 import json
+import threading
+import time
 import uuid
-from src.models.agent import db, Agent, AgentMessage, ContentItem, PlatformAnalytics, SystemStatus
+from src.models.agent import (
+    db, Agent, AgentMessage, ContentItem, ContentPlatform, ContentHashtag, PlatformAnalytics, SystemStatus,
+    content_tag_rows, normalize_hashtag
+)
+from src.cache import TTLCache, on_committed_write
+from src.models import rollups
+from src.notifications import get_message_hub
+from src.pagination import PaginationError, encode_cursor, keyset_page, page_size
+from src import slot_recommender
 
 agent_bp = Blueprint('agent', __name__)
 
+# Inbox delivery: long-poll and server-sent events
+MAX_WAIT_SECONDS = 60
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+SSE_BATCH_SIZE = 100
+
+# Keyset pagination orders; the trailing primary key makes each order total
+AGENT_ORDER = [(Agent.id, False)]
+MESSAGE_ORDER = [(AgentMessage.priority, True), (AgentMessage.created_at, False), (AgentMessage.id, False)]
+CONTENT_ORDER = [(ContentItem.scheduled_time, False), (ContentItem.id, False)]
+ANALYTICS_ORDER = [(PlatformAnalytics.recorded_at, False), (PlatformAnalytics.id, False)]
+
+def _parse_duration(value, default):
+    """Parse a duration such as '30', '30s', '5m' or '1h' into seconds"""
+    if value is None:
+        return default
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
 # Agent Registration and Management
 @agent_bp.route('/agents', methods=['POST'])
 def register_agent():
@@ -29,8 +61,8 @@ def register_agent():
             id=data['id'],
             name=data['name'],
             persona=data['persona'],
-            primary_platforms=json.dumps(data['primary_platforms']),
-            content_types=json.dumps(data['content_types']),
+            primary_platforms=data['primary_platforms'],
+            content_types=data['content_types'],
             posting_frequency=data['posting_frequency'],
             status=data.get('status', 'active')
         )
@@ -49,14 +81,19 @@ def register_agent():
 
 @agent_bp.route('/agents', methods=['GET'])
 def get_agents():
-    """Get all registered agents"""
+    """Get registered agents, one page at a time"""
     try:
-        agents = Agent.query.all()
+        agents, next_cursor = keyset_page(
+            Agent.query, AGENT_ORDER, request.args.get('cursor'), page_size(request.args.get('limit'), 100)
+        )
         return jsonify({
             'agents': [agent.to_dict() for agent in agents],
-            'count': len(agents)
+            'count': len(agents),
+            'next_cursor': next_cursor
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -125,11 +162,14 @@ def send_message():
             receiver_agent_id=data['receiver_agent_id'],
             message_type=data['message_type'],
             payload=json.dumps(data['payload']),
-            priority=data.get('priority', 1)
+            priority=data.get('priority', 1),
+            created_at=datetime.utcnow()
         )
         
         db.session.add(message)
+        rollups.record_messages([{'sender_agent_id': message.sender_agent_id, 'created_at': message.created_at}])
         db.session.commit()
+        get_message_hub().publish(message.receiver_agent_id)
         
         return jsonify({
             'message': 'Message sent successfully',
@@ -151,22 +191,81 @@ def get_agent_messages(agent_id):
         
         # Get query parameters
         status = request.args.get('status', 'pending')
-        limit = int(request.args.get('limit', 50))
-        
-        # Query messages
-        messages = AgentMessage.query.filter_by(
-            receiver_agent_id=agent_id,
-            status=status
-        ).order_by(AgentMessage.priority.desc(), AgentMessage.created_at.asc()).limit(limit).all()
+        limit = page_size(request.args.get('limit'), 50)
+        cursor = request.args.get('cursor')
+        try:
+            wait = min(_parse_duration(request.args.get('wait'), 0), MAX_WAIT_SECONDS)
+        except ValueError:
+            return jsonify({'error': 'Invalid wait parameter'}), 400
+        
+        # Long-poll: if the inbox is empty, block until send_message publishes for this agent
+        hub = get_message_hub()
+        deadline = time.monotonic() + wait
+        while True:
+            version = hub.version(agent_id)
+            messages, next_cursor = keyset_page(
+                AgentMessage.query.filter_by(receiver_agent_id=agent_id, status=status),
+                MESSAGE_ORDER, cursor, limit
+            )
+            
+            remaining = deadline - time.monotonic()
+            if messages or status != 'pending' or remaining <= 0:
+                break
+            db.session.close()
+            hub.wait(agent_id, version, remaining)
         
         return jsonify({
             'messages': [message.to_dict() for message in messages],
-            'count': len(messages)
+            'count': len(messages),
+            'next_cursor': next_cursor
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@agent_bp.route('/messages/<agent_id>/stream', methods=['GET'])
+def stream_agent_messages(agent_id):
+    """Stream newly arriving pending messages for an agent as server-sent events"""
+    agent = Agent.query.filter_by(id=agent_id).first()
+    if not agent:
+        return jsonify({'error': 'Agent not found'}), 404
+    
+    # Resume after the last delivered message id when the client reconnects
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', request.args.get('after', 0)) or 0)
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID and after must be integer message ids'}), 400
+    hub = get_message_hub()
+    
+    def events():
+        nonlocal last_id
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        while True:
+            version = hub.version(agent_id)
+            messages = AgentMessage.query.filter(
+                AgentMessage.receiver_agent_id == agent_id,
+                AgentMessage.status == 'pending',
+                AgentMessage.id > last_id
+            ).order_by(AgentMessage.id.asc()).limit(SSE_BATCH_SIZE).all()
+            payloads = [message.to_dict() for message in messages]
+            # Release the pooled connection while the stream is idle
+            db.session.close()
+            
+            for payload in payloads:
+                last_id = payload['id']
+                yield f"id: {payload['id']}\nevent: message\ndata: {json.dumps(payload)}\n\n"
+            
+            if len(payloads) < SSE_BATCH_SIZE and not hub.wait(agent_id, version, SSE_HEARTBEAT_SECONDS):
+                yield ': keep-alive\n\n'
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @agent_bp.route('/messages/<int:message_id>/process', methods=['PUT'])
 def process_message(message_id):
     """Mark message as processed and optionally add response"""
@@ -194,6 +293,234 @@ def process_message(message_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Message leasing: claim -> ack/nack, with expired leases returned to the queue
+MAX_CLAIM_BATCH = 100
+DEFAULT_LEASE_SECONDS = 30
+MAX_LEASE_SECONDS = 3600
+
+def requeue_expired_leases(receiver_agent_id=None):
+    """Return in-flight messages whose lease has expired to the pending queue"""
+    query = db.update(AgentMessage).where(
+        AgentMessage.status == 'in_flight',
+        AgentMessage.lease_expires_at < datetime.utcnow()
+    )
+    if receiver_agent_id:
+        query = query.where(AgentMessage.receiver_agent_id == receiver_agent_id)
+    
+    result = db.session.execute(
+        query.values(status='pending', lease_token=None, lease_expires_at=None),
+        execution_options={'synchronize_session': False}
+    )
+    return result.rowcount
+
+@agent_bp.route('/messages/<agent_id>/claim', methods=['POST'])
+def claim_messages(agent_id):
+    """Atomically lease up to `max` pending messages for an agent"""
+    try:
+        try:
+            max_messages = int(request.args.get('max', 10))
+            lease_seconds = _parse_duration(request.args.get('lease'), DEFAULT_LEASE_SECONDS)
+        except ValueError:
+            return jsonify({'error': 'Invalid max or lease parameter'}), 400
+        
+        if max_messages < 1 or not 0 < lease_seconds <= MAX_LEASE_SECONDS:
+            return jsonify({'error': f'max must be positive and lease between 0 and {MAX_LEASE_SECONDS}s'}), 400
+        max_messages = min(max_messages, MAX_CLAIM_BATCH)
+        
+        agent = Agent.query.filter_by(id=agent_id).first()
+        if not agent:
+            return jsonify({'error': 'Agent not found'}), 404
+        
+        requeue_expired_leases(agent_id)
+        
+        # A single UPDATE ... WHERE id IN (SELECT ... LIMIT n) takes the write lock once,
+        # so two workers claiming for the same agent never receive the same message
+        lease_token = str(uuid.uuid4())
+        lease_expires_at = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        candidates = db.select(AgentMessage.id).where(
+            AgentMessage.receiver_agent_id == agent_id,
+            AgentMessage.status == 'pending'
+        ).order_by(
+            AgentMessage.priority.desc(), AgentMessage.created_at.asc()
+        ).limit(max_messages)
+        
+        db.session.execute(
+            db.update(AgentMessage).where(AgentMessage.id.in_(candidates)).values(
+                status='in_flight',
+                lease_token=lease_token,
+                lease_expires_at=lease_expires_at,
+                delivery_count=AgentMessage.delivery_count + 1
+            ),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        
+        # The receiver and status put the read-back on the inbox index, already in priority order
+        messages = AgentMessage.query.filter_by(
+            receiver_agent_id=agent_id, status='in_flight', lease_token=lease_token
+        ).order_by(
+            AgentMessage.priority.desc(), AgentMessage.created_at.asc()
+        ).all()
+        
+        return jsonify({
+            'lease_token': lease_token,
+            'lease_expires_at': lease_expires_at.isoformat(),
+            'messages': [message.to_dict() for message in messages],
+            'count': len(messages)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@agent_bp.route('/messages/ack', methods=['POST'])
+def ack_messages():
+    """Mark leased messages as processed, optionally storing a response per message"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['lease_token', 'message_ids']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        responses = data.get('responses', {})
+        now = datetime.utcnow()
+        
+        # Only messages still held under this lease can be acknowledged
+        messages = AgentMessage.query.filter(
+            AgentMessage.id.in_(data['message_ids']),
+            AgentMessage.lease_token == data['lease_token'],
+            AgentMessage.status == 'in_flight'
+        ).all()
+        
+        for message in messages:
+            message.status = 'processed'
+            message.processed_at = now
+            message.lease_token = None
+            message.lease_expires_at = None
+            if str(message.id) in responses:
+                message.response = json.dumps(responses[str(message.id)])
+        
+        db.session.commit()
+        
+        acked_ids = [message.id for message in messages]
+        return jsonify({
+            'message': 'Messages acknowledged',
+            'acked': acked_ids,
+            'rejected': [message_id for message_id in data['message_ids'] if message_id not in acked_ids]
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@agent_bp.route('/messages/nack', methods=['POST'])
+def nack_messages():
+    """Release leased messages back to the queue, or mark them failed"""
+    try:
+        data = request.get_json()
+        
+        required_fields = ['lease_token', 'message_ids']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        status = 'pending' if data.get('requeue', True) else 'failed'
+        receivers = [row[0] for row in db.session.query(AgentMessage.receiver_agent_id).filter(
+            AgentMessage.id.in_(data['message_ids'])
+        ).distinct()]
+        
+        result = db.session.execute(
+            db.update(AgentMessage).where(
+                AgentMessage.id.in_(data['message_ids']),
+                AgentMessage.lease_token == data['lease_token'],
+                AgentMessage.status == 'in_flight'
+            ).values(status=status, lease_token=None, lease_expires_at=None),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        if status == 'pending':
+            for receiver_agent_id in receivers:
+                get_message_hub().publish(receiver_agent_id)
+        
+        return jsonify({
+            'message': 'Messages released',
+            'status': status,
+            'released_count': result.rowcount
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@agent_bp.route('/messages/reap', methods=['POST'])
+def reap_expired_leases():
+    """Requeue every in-flight message whose lease has expired"""
+    try:
+        requeued = requeue_expired_leases()
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Expired leases requeued',
+            'requeued_count': requeued
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into the naive UTC datetimes the models store"""
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = (timestamp - timestamp.utcoffset()).replace(tzinfo=None)
+    return timestamp
+
+# Change feeds: rows added or changed after a watermark, for incremental consumers
+#
+# Messages and content are ordered by (updated_at, id). updated_at is stamped
+# just before the write takes the database lock, so a row can commit up to
+# the lock timeout after its timestamp; rows newer than CHANGE_FEED_SETTLE_SECONDS
+# are held back so a watermark never moves past a row that has yet to commit.
+# Analytics rows are append-only and ordered by id, which SQLite assigns in
+# commit order.
+CHANGE_FEED_SETTLE_SECONDS = 10
+CHANGE_FEEDS = {
+    'analytics': (PlatformAnalytics, [(PlatformAnalytics.id, False)]),
+    'messages': (AgentMessage, [(AgentMessage.updated_at, False), (AgentMessage.id, False)]),
+    'content': (ContentItem, [(ContentItem.updated_at, False), (ContentItem.id, False)]),
+}
+
+@agent_bp.route('/changes/<source>', methods=['GET'])
+def get_changes(source):
+    """Rows of `source` (analytics, messages or content) added or changed since a watermark"""
+    try:
+        if source not in CHANGE_FEEDS:
+            return jsonify({'error': f"Unknown change feed: {source}; expected any of {', '.join(CHANGE_FEEDS)}"}), 404
+        model, order = CHANGE_FEEDS[source]
+        since = request.args.get('since')
+
+        query = model.query
+        if hasattr(model, 'updated_at'):
+            query = query.filter(model.updated_at <= datetime.utcnow() - timedelta(seconds=CHANGE_FEED_SETTLE_SECONDS))
+        items, next_cursor = keyset_page(query, order, since, page_size(request.args.get('limit'), 500))
+
+        # Pass the watermark back as `since` on the next call; it only advances past returned rows
+        watermark = encode_cursor([getattr(items[-1], column.key) for column, _ in order]) if items else since
+        return jsonify({
+            'source': source,
+            'changes': [item.to_dict() for item in items],
+            'count': len(items),
+            'watermark': watermark,
+            'has_more': next_cursor is not None
+        }), 200
+
+    except PaginationError as e:
+        return jsonify({'error': f'Invalid since watermark: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Content Management
 @agent_bp.route('/content', methods=['POST'])
 def create_content():
@@ -216,7 +543,7 @@ def create_content():
         content_id = data.get('id', str(uuid.uuid4()))
         
         # Parse scheduled time
-        scheduled_time = datetime.fromisoformat(data['scheduled_time'].replace('Z', '+00:00'))
+        scheduled_time = _parse_timestamp(data['scheduled_time'])
         
         # Create content item
         content = ContentItem(
@@ -227,14 +554,19 @@ def create_content():
             title=data['title'],
             description=data.get('description', ''),
             content_body=data['content_body'],
-            media_urls=json.dumps(data.get('media_urls', [])),
-            hashtags=json.dumps(data.get('hashtags', [])),
-            target_platforms=json.dumps(data['target_platforms']),
+            media_urls=data.get('media_urls', []),
+            hashtags=data.get('hashtags', []),
+            target_platforms=data['target_platforms'],
             scheduled_time=scheduled_time,
-            status=data.get('status', 'draft')
+            status=data.get('status', 'draft'),
+            created_at=datetime.utcnow()
         )
         
         db.session.add(content)
+        platform_rows, hashtag_rows = content_tag_rows(content_id, content.target_platforms, content.hashtags)
+        db.session.add_all([ContentPlatform(**row) for row in platform_rows])
+        db.session.add_all([ContentHashtag(**row) for row in hashtag_rows])
+        rollups.record_content([{'persona': content.persona, 'status': content.status, 'created_at': content.created_at}])
         db.session.commit()
         
         return jsonify({
@@ -254,7 +586,9 @@ def get_content():
         status = request.args.get('status')
         persona = request.args.get('persona')
         creator_agent_id = request.args.get('creator_agent_id')
-        limit = int(request.args.get('limit', 100))
+        platform = request.args.get('platform')
+        hashtag = request.args.get('hashtag')
+        limit = page_size(request.args.get('limit'), 100)
         
         # Build query
         query = ContentItem.query
@@ -265,14 +599,25 @@ def get_content():
             query = query.filter_by(persona=persona)
         if creator_agent_id:
             query = query.filter_by(creator_agent_id=creator_agent_id)
+        if platform:
+            query = query.filter(ContentItem.id.in_(
+                db.select(ContentPlatform.content_id).where(ContentPlatform.platform == platform)
+            ))
+        if hashtag:
+            query = query.filter(ContentItem.id.in_(
+                db.select(ContentHashtag.content_id).where(ContentHashtag.hashtag == normalize_hashtag(hashtag))
+            ))
         
-        content_items = query.order_by(ContentItem.scheduled_time.asc()).limit(limit).all()
+        content_items, next_cursor = keyset_page(query, CONTENT_ORDER, request.args.get('cursor'), limit)
         
         return jsonify({
             'content': [item.to_dict() for item in content_items],
-            'count': len(content_items)
+            'count': len(content_items),
+            'next_cursor': next_cursor
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -287,10 +632,13 @@ def update_content_status(content_id):
         data = request.get_json()
         
         if 'status' in data:
+            old_status = content.status
             content.status = data['status']
             
             if data['status'] == 'published':
                 content.published_at = datetime.utcnow()
+            
+            rollups.record_content_status_change(content, old_status)
         
         if 'performance_metrics' in data:
             content.performance_metrics = json.dumps(data['performance_metrics'])
@@ -326,16 +674,24 @@ def record_analytics():
         
         # Record each metric
         analytics_records = []
+        recorded_at = datetime.utcnow()
         for metric_name, metric_value in data['metrics'].items():
             analytics = PlatformAnalytics(
                 content_id=data['content_id'],
                 platform=data['platform'],
                 metric_name=metric_name,
-                metric_value=float(metric_value)
+                metric_value=float(metric_value),
+                recorded_at=recorded_at
             )
             analytics_records.append(analytics)
             db.session.add(analytics)
         
+        rollups.record_analytics([{
+            'platform': record.platform,
+            'metric_name': record.metric_name,
+            'metric_value': record.metric_value,
+            'recorded_at': record.recorded_at
+        } for record in analytics_records])
         db.session.commit()
         
         return jsonify({
@@ -349,62 +705,374 @@ def record_analytics():
 
 @agent_bp.route('/analytics/<content_id>', methods=['GET'])
 def get_content_analytics(content_id):
-    """Get analytics for specific content"""
+    """Get analytics for specific content, oldest first"""
     try:
-        analytics = PlatformAnalytics.query.filter_by(content_id=content_id).all()
+        analytics, next_cursor = keyset_page(
+            PlatformAnalytics.query.filter_by(content_id=content_id),
+            ANALYTICS_ORDER, request.args.get('cursor'), page_size(request.args.get('limit'), 100)
+        )
         
         return jsonify({
             'analytics': [record.to_dict() for record in analytics],
-            'count': len(analytics)
+            'count': len(analytics),
+            'next_cursor': next_cursor
         }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Posting Slots
+slot_model_cache = TTLCache()
+DEFAULT_SLOT_MODEL_TTL = 3600  # seconds a fitted slot model is served; overridden by SLOT_MODEL_TTL
+
+def _in_background(app, description):
+    """A spawn function for TTLCache.get_or_refresh that runs the refresh on a thread in an app context"""
+    def run(refresh):
+        with app.app_context():
+            try:
+                refresh()
+            except Exception:
+                app.logger.exception(f'{description} failed')
+    
+    def spawn(refresh):
+        threading.Thread(target=run, args=(refresh,), name=description, daemon=True).start()
+    return spawn
+
+@agent_bp.route('/posting-slots/<platform>', methods=['GET'])
+def get_posting_slots(platform):
+    """Best posting slots for a platform, optionally for one persona, ranked by expected engagement"""
+    try:
+        persona = request.args.get('persona') or None
+        metric = request.args.get('metric', slot_recommender.DEFAULT_SLOT_METRIC)
+        if metric not in slot_recommender.SLOT_METRICS:
+            return jsonify({'error': f"metric must be one of {', '.join(slot_recommender.SLOT_METRICS)}"}), 400
+        try:
+            n = max(1, min(int(request.args.get('n', 3)), slot_recommender.SLOTS_PER_WEEK))
+        except ValueError:
+            return jsonify({'error': 'n must be an integer'}), 400
+        
+        # Refitting reads the analytics history, so once the TTL runs out the old table is served
+        # while one background thread refits; only the first request for a metric fits inline
+        ttl = current_app.config.get('SLOT_MODEL_TTL', DEFAULT_SLOT_MODEL_TTL)
+        recommender = slot_model_cache.get_or_refresh(
+            metric, ttl, lambda: slot_recommender.fit_from_history(metric),
+            _in_background(current_app._get_current_object(), f'Refitting {metric} posting slots')
+        )
+        if not recommender.covers(platform):
+            return jsonify({'error': f'No {metric} history for platform {platform}'}), 404
+        
+        slots = recommender.recommend_slots(platform, persona, n)
+        return jsonify({
+            'platform': platform,
+            'persona': persona,
+            # 'platform' when the persona has no history of its own on this platform
+            'scope': 'persona' if persona and recommender.covers(platform, persona) else 'platform',
+            'metric': metric,
+            'slots': slots,
+            'posting_schedule': slot_recommender.posting_schedule(slots),
+            'fitted_at': recommender.fitted_at.isoformat(),
+            'posts': recommender.posts
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Bulk Ingest
+MAX_BULK_ITEMS = 10000
+
+def _read_bulk_items():
+    """Read a batch from a JSON array or an NDJSON body; unparseable lines become per-item errors"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items, errors = [], []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                errors.append({'index': len(items), 'error': f'Invalid JSON: {e}'})
+                items.append(None)
+        return items, errors
+    
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array or an object with an "items" array')
+    return data, []
+
+def _bulk_response(records_count, errors, total, **extra):
+    """201 when every item was accepted, 207 on partial success, 400 when none was"""
+    failed = len({error['index'] for error in errors})
+    if not errors:
+        status_code = 201
+    elif failed < total:
+        status_code = 207
+    else:
+        status_code = 400
+    return jsonify({
+        'accepted': total - failed,
+        'failed': failed,
+        'total': total,
+        'records_count': records_count,
+        'errors': errors,
+        **extra
+    }), status_code
+
+def _bulk_ingest(build_rows, model, after_insert=None):
+    """Validate a batch item by item, then insert every valid row in one transaction.
+
+    `build_rows(items)` returns (rows, errors, extra) where rows is the list of
+    column dicts to insert, errors are per-item {'index', 'error'} entries and
+    extra is merged into the response body. `after_insert(rows)` writes any
+    dependent tables and rollups in the same transaction.
+    """
+    try:
+        items, errors = _read_bulk_items()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({'error': f'Batch exceeds {MAX_BULK_ITEMS} items'}), 413
+    
+    try:
+        rows, item_errors, extra = build_rows(items)
+        errors = sorted(errors + item_errors, key=lambda error: error['index'])
+        
+        # executemany-style Core insert: one statement, one transaction, one commit
+        if rows:
+            db.session.execute(db.insert(model), rows)
+            if after_insert:
+                after_insert(rows)
+        db.session.commit()
+        
+        return _bulk_response(len(rows), errors, len(items), **extra)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _missing_fields(item, required_fields):
+    if not isinstance(item, dict):
+        return 'Item must be a JSON object'
+    missing = [field for field in required_fields if field not in item]
+    if missing:
+        return f"Missing required field: {', '.join(missing)}"
+    return None
+
+def _existing_ids(column, ids):
+    """Resolve which of `ids` exist with a single IN query"""
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(db.session.execute(db.select(column).where(column.in_(ids))).scalars())
+
+@agent_bp.route('/content/bulk', methods=['POST'])
+def bulk_create_content():
+    """Create many content items in one transaction"""
+    required_fields = ['creator_agent_id', 'persona', 'content_type', 'title', 'content_body', 'target_platforms', 'scheduled_time']
+    
+    def build_rows(items):
+        valid = [isinstance(item, dict) for item in items]
+        known_agents = _existing_ids(Agent.id, [item.get('creator_agent_id') for item, ok in zip(items, valid) if ok])
+        existing_content = _existing_ids(ContentItem.id, [item['id'] for item, ok in zip(items, valid) if ok and 'id' in item])
+        
+        rows, errors, batch_ids = [], [], set()
+        now = datetime.utcnow()
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            error = _missing_fields(item, required_fields)
+            if error is None and item['creator_agent_id'] not in known_agents:
+                error = 'Creator agent not found'
+            if error is None:
+                content_id = item.get('id', str(uuid.uuid4()))
+                if content_id in existing_content or content_id in batch_ids:
+                    error = 'Content with this ID already exists'
+            if error is None:
+                try:
+                    scheduled_time = _parse_timestamp(item['scheduled_time'])
+                except (AttributeError, ValueError) as e:
+                    error = f'Invalid scheduled_time: {e}'
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            
+            batch_ids.add(content_id)
+            rows.append({
+                'id': content_id,
+                'creator_agent_id': item['creator_agent_id'],
+                'persona': item['persona'],
+                'content_type': item['content_type'],
+                'title': item['title'],
+                'description': item.get('description', ''),
+                'content_body': item['content_body'],
+                'media_urls': item.get('media_urls', []),
+                'hashtags': item.get('hashtags', []),
+                'target_platforms': item['target_platforms'],
+                'scheduled_time': scheduled_time,
+                'status': item.get('status', 'draft'),
+                'created_at': now
+            })
+        return rows, errors, {'content_ids': [row['id'] for row in rows]}
+    
+    def after_insert(rows):
+        platform_rows, hashtag_rows = [], []
+        for row in rows:
+            platforms, tags = content_tag_rows(row['id'], row['target_platforms'], row['hashtags'])
+            platform_rows += platforms
+            hashtag_rows += tags
+        if platform_rows:
+            db.session.execute(db.insert(ContentPlatform), platform_rows)
+        if hashtag_rows:
+            db.session.execute(db.insert(ContentHashtag), hashtag_rows)
+        rollups.record_content(rows)
+    
+    return _bulk_ingest(build_rows, ContentItem, after_insert)
+
+@agent_bp.route('/messages/bulk', methods=['POST'])
+def bulk_send_messages():
+    """Send many messages between agents in one transaction"""
+    required_fields = ['sender_agent_id', 'receiver_agent_id', 'message_type', 'payload']
+    receivers = set()
+    
+    def build_rows(items):
+        agent_ids = []
+        for item in items:
+            if isinstance(item, dict):
+                agent_ids += [item.get('sender_agent_id'), item.get('receiver_agent_id')]
+        known_agents = _existing_ids(Agent.id, agent_ids)
+        
+        rows, errors = [], []
+        now = datetime.utcnow()
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            error = _missing_fields(item, required_fields)
+            if error is None and item['sender_agent_id'] not in known_agents:
+                error = 'Sender agent not found'
+            if error is None and item['receiver_agent_id'] not in known_agents:
+                error = 'Receiver agent not found'
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            
+            receivers.add(item['receiver_agent_id'])
+            rows.append({
+                'sender_agent_id': item['sender_agent_id'],
+                'receiver_agent_id': item['receiver_agent_id'],
+                'message_type': item['message_type'],
+                'payload': json.dumps(item['payload']),
+                'priority': item.get('priority', 1),
+                'created_at': now
+            })
+        return rows, errors, {}
+    
+    response = _bulk_ingest(build_rows, AgentMessage, rollups.record_messages)
+    if response[1] in (201, 207):
+        for receiver_agent_id in receivers:
+            get_message_hub().publish(receiver_agent_id)
+    return response
+
+@agent_bp.route('/analytics/bulk', methods=['POST'])
+def bulk_record_analytics():
+    """Record analytics for many content items in one transaction"""
+    required_fields = ['content_id', 'platform', 'metrics']
+    
+    def build_rows(items):
+        known_content = _existing_ids(ContentItem.id, [item.get('content_id') for item in items if isinstance(item, dict)])
+        
+        rows, errors = [], []
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            error = _missing_fields(item, required_fields)
+            if error is None and item['content_id'] not in known_content:
+                error = 'Content not found'
+            if error is None:
+                try:
+                    recorded_at = _parse_timestamp(item['recorded_at']) if 'recorded_at' in item else datetime.utcnow()
+                    item_rows = [{
+                        'content_id': item['content_id'],
+                        'platform': item['platform'],
+                        'metric_name': metric_name,
+                        'metric_value': float(metric_value),
+                        'recorded_at': recorded_at
+                    } for metric_name, metric_value in item['metrics'].items()]
+                except (AttributeError, TypeError, ValueError) as e:
+                    error = f'Invalid metrics: {e}'
+            if error:
+                errors.append({'index': index, 'error': error})
+                continue
+            rows.extend(item_rows)
+        return rows, errors, {}
+    
+    return _bulk_ingest(build_rows, PlatformAnalytics, rollups.record_analytics)
+
 # System Status and Health
+system_status_cache = TTLCache()
+DEFAULT_SYSTEM_STATUS_TTL = 10  # seconds; overridden by SYSTEM_STATUS_TTL
+
+on_committed_write(
+    {Agent.__tablename__, ContentItem.__tablename__, AgentMessage.__tablename__},
+    system_status_cache.invalidate
+)
+
+def _count_by_status(model):
+    """One grouped pass over the model's status index"""
+    return dict(db.session.execute(
+        db.select(model.status, db.func.count()).group_by(model.status)
+    ).all())
+
+def _compute_system_statistics():
+    agent_counts = _count_by_status(Agent)
+    content_counts = _count_by_status(ContentItem)
+    message_counts = _count_by_status(AgentMessage)
+    
+    # Range count on the created_at index; kept separate so the grouped pass stays index-only
+    recent_activity = db.session.execute(
+        db.select(db.func.count()).where(AgentMessage.created_at >= datetime.utcnow() - timedelta(hours=24))
+    ).scalar()
+    
+    total_agents = sum(agent_counts.values())
+    active_agents = agent_counts.get('active', 0)
+    total_content = sum(content_counts.values())
+    published_content = content_counts.get('published', 0)
+    scheduled_content = content_counts.get('scheduled', 0)
+    
+    return {
+        'agents': {
+            'total': total_agents,
+            'active': active_agents,
+            'inactive': total_agents - active_agents
+        },
+        'content': {
+            'total': total_content,
+            'published': published_content,
+            'scheduled': scheduled_content,
+            'draft': total_content - published_content - scheduled_content
+        },
+        'messages': {
+            'pending': message_counts.get('pending', 0),
+            'in_flight': message_counts.get('in_flight', 0),
+            'processed': message_counts.get('processed', 0),
+            'recent_activity': recent_activity
+        }
+    }
+
 @agent_bp.route('/system/status', methods=['GET'])
 def get_system_status():
     """Get overall system status"""
     try:
-        # Get agent statistics
-        total_agents = Agent.query.count()
-        active_agents = Agent.query.filter_by(status='active').count()
-        
-        # Get content statistics
-        total_content = ContentItem.query.count()
-        published_content = ContentItem.query.filter_by(status='published').count()
-        scheduled_content = ContentItem.query.filter_by(status='scheduled').count()
-        
-        # Get message statistics
-        pending_messages = AgentMessage.query.filter_by(status='pending').count()
-        processed_messages = AgentMessage.query.filter_by(status='processed').count()
-        
-        # Get recent activity
-        recent_activity = AgentMessage.query.filter(
-            AgentMessage.created_at >= datetime.utcnow() - timedelta(hours=24)
-        ).count()
+        ttl = current_app.config.get('SYSTEM_STATUS_TTL', DEFAULT_SYSTEM_STATUS_TTL)
+        statistics = system_status_cache.get_or_compute('statistics', ttl, _compute_system_statistics)
         
         return jsonify({
             'system_status': 'healthy',
             'timestamp': datetime.utcnow().isoformat(),
-            'statistics': {
-                'agents': {
-                    'total': total_agents,
-                    'active': active_agents,
-                    'inactive': total_agents - active_agents
-                },
-                'content': {
-                    'total': total_content,
-                    'published': published_content,
-                    'scheduled': scheduled_content,
-                    'draft': total_content - published_content - scheduled_content
-                },
-                'messages': {
-                    'pending': pending_messages,
-                    'processed': processed_messages,
-                    'recent_activity': recent_activity
-                }
-            }
+            'statistics': statistics
         }), 200
         
     except Exception as e:
@@ -453,36 +1121,47 @@ def update_system_health():
 # Performance Dashboard
 @agent_bp.route('/dashboard/performance', methods=['GET'])
 def get_performance_dashboard():
-    """Get performance dashboard data"""
+    """Get performance dashboard data from the rollup tables.
+
+    Windows are aligned to whole days (whole hours for platform analytics),
+    so the cost depends on the number of buckets rather than raw rows.
+    """
     try:
         # Get time range from query parameters
         days = int(request.args.get('days', 7))
         start_date = datetime.utcnow() - timedelta(days=days)
+        start_day = start_date.date()
+        start_hour = start_date.replace(minute=0, second=0, microsecond=0)
         
         # Get content performance by persona
-        persona_performance = db.session.execute("""
-            SELECT persona, COUNT(*) as content_count, 
-                   AVG(CASE WHEN status = 'published' THEN 1.0 ELSE 0.0 END) as publish_rate
-            FROM content_items 
-            WHERE created_at >= ?
-            GROUP BY persona
-        """, (start_date,)).fetchall()
+        persona_performance = db.session.execute(
+            db.select(
+                rollups.ContentPersonaDaily.persona,
+                db.func.sum(rollups.ContentPersonaDaily.content_count),
+                db.func.sum(rollups.ContentPersonaDaily.published_count)
+            ).where(rollups.ContentPersonaDaily.day >= start_day)
+            .group_by(rollups.ContentPersonaDaily.persona)
+        ).all()
         
         # Get platform analytics summary
-        platform_analytics = db.session.execute("""
-            SELECT platform, metric_name, AVG(metric_value) as avg_value, COUNT(*) as record_count
-            FROM platform_analytics 
-            WHERE recorded_at >= ?
-            GROUP BY platform, metric_name
-        """, (start_date,)).fetchall()
+        platform_analytics = db.session.execute(
+            db.select(
+                rollups.PlatformMetricHourly.platform,
+                rollups.PlatformMetricHourly.metric_name,
+                db.func.sum(rollups.PlatformMetricHourly.value_sum),
+                db.func.sum(rollups.PlatformMetricHourly.record_count)
+            ).where(rollups.PlatformMetricHourly.hour >= start_hour)
+            .group_by(rollups.PlatformMetricHourly.platform, rollups.PlatformMetricHourly.metric_name)
+        ).all()
         
         # Get agent activity
-        agent_activity = db.session.execute("""
-            SELECT sender_agent_id, COUNT(*) as message_count
-            FROM agent_messages 
-            WHERE created_at >= ?
-            GROUP BY sender_agent_id
-        """, (start_date,)).fetchall()
+        agent_activity = db.session.execute(
+            db.select(
+                rollups.SenderMessageDaily.sender_agent_id,
+                db.func.sum(rollups.SenderMessageDaily.message_count)
+            ).where(rollups.SenderMessageDaily.day >= start_day)
+            .group_by(rollups.SenderMessageDaily.sender_agent_id)
+        ).all()
         
         return jsonify({
             'time_range': f'Last {days} days',
@@ -490,16 +1169,16 @@ def get_performance_dashboard():
                 {
                     'persona': row[0],
                     'content_count': row[1],
-                    'publish_rate': round(row[2], 3)
-                } for row in persona_performance
+                    'publish_rate': round(row[2] / row[1], 3) if row[1] else 0.0
+                } for row in persona_performance if row[1]
             ],
             'platform_analytics': [
                 {
                     'platform': row[0],
                     'metric_name': row[1],
-                    'avg_value': round(row[2], 3),
+                    'avg_value': round(row[2] / row[3], 3),
                     'record_count': row[3]
-                } for row in platform_analytics
+                } for row in platform_analytics if row[3]
             ],
             'agent_activity': [
                 {
@@ -511,4 +1190,3 @@ def get_performance_dashboard():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
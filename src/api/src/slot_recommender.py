@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+import numpy as np
+from src.models.user import db
+from src.models.agent import ContentItem, PlatformAnalytics
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SLOTS_PER_WEEK = 7 * 24
+DEFAULT_SLOT_METRIC = 'engagement_rate'
+# Analytics metrics slots can be ranked by; each one fitted is cached separately
+SLOT_METRICS = ('engagement_rate', 'views', 'likes', 'comments', 'shares')
+DEFAULT_HISTORY_DAYS = 90
+# Posts' worth of the group mean every slot estimate starts from, so sparse slots rank near the mean
+PRIOR_POSTS = 5.0
+# Share of each neighbouring hour's posts counted towards a slot
+NEIGHBOUR_WEIGHT = 0.25
+
+
+class SlotRecommender:
+    """Posting slots (hour of the week, UTC) ranked by expected engagement per platform and persona.
+
+    Every (platform, persona) group, and every platform across all personas,
+    is fitted in one batch: posts are binned by the hour of the week they went
+    out, each bin borrows from its neighbouring hours, and the bin mean is
+    shrunk towards the group mean by PRIOR_POSTS. The ranked slots of every
+    group are precomputed, so a recommendation is a dict lookup and a slice.
+    """
+
+    def __init__(self, metric, table, fitted_at=None, posts=0):
+        self.metric = metric
+        self.table = table  # {(platform, persona or None): [slot dict, ...] best first}
+        self.fitted_at = fitted_at or datetime.utcnow()
+        self.posts = posts
+
+    @classmethod
+    def fit(cls, platforms, personas, slots, values, metric=DEFAULT_SLOT_METRIC):
+        """Fit from one row per post: its platform, persona, slot (0-167 from Monday 00:00) and metric value"""
+        values = np.asarray(values, dtype=np.float64)
+        slots = np.asarray(slots, dtype=np.int64)
+        if not len(values):
+            return cls(metric, {})
+
+        # Each post counts towards its persona group and its platform-wide group
+        groups = {}
+        codes = np.fromiter((groups.setdefault(key, len(groups)) for key in zip(platforms, personas)),
+                            np.int64, len(values))
+        codes = np.concatenate([codes, np.fromiter((groups.setdefault((platform, None), len(groups))
+                                                    for platform in platforms), np.int64, len(values))])
+        bins = codes * SLOTS_PER_WEEK + np.concatenate([slots, slots])
+        size = len(groups) * SLOTS_PER_WEEK
+        sums = np.bincount(bins, np.concatenate([values, values]), size).reshape(len(groups), SLOTS_PER_WEEK)
+        counts = np.bincount(bins, minlength=size).reshape(len(groups), SLOTS_PER_WEEK).astype(np.float64)
+
+        group_means = sums.sum(axis=1, keepdims=True) / counts.sum(axis=1, keepdims=True)
+        # Hours wrap around the week, so Sunday 23:00 neighbours Monday 00:00
+        smoothed_sums = sums + NEIGHBOUR_WEIGHT * (np.roll(sums, 1, axis=1) + np.roll(sums, -1, axis=1))
+        smoothed_counts = counts + NEIGHBOUR_WEIGHT * (np.roll(counts, 1, axis=1) + np.roll(counts, -1, axis=1))
+        expected = (smoothed_sums + PRIOR_POSTS * group_means) / (smoothed_counts + PRIOR_POSTS)
+        # Best first; among equal estimates the better-sampled slot
+        order = np.lexsort((-smoothed_counts, -expected), axis=1)
+
+        table = {}
+        for (platform, persona), row in groups.items():
+            table[(platform, persona)] = [{
+                'weekday': WEEKDAYS[slot // 24],
+                'time': f"{slot % 24:02d}:00",
+                'expected': round(float(expected[row, slot]), 6),
+                'posts': int(counts[row, slot])
+            } for slot in order[row].tolist()]
+        return cls(metric, table, posts=len(values))
+
+    def covers(self, platform, persona=None):
+        return (platform, persona) in self.table
+
+    def recommend_slots(self, platform, persona=None, n=3):
+        """The `n` best slots for a persona on a platform; personas without history get the platform's"""
+        slots = self.table.get((platform, persona))
+        if slots is None:
+            slots = self.table.get((platform, None), [])
+        return slots[:n]
+
+
+def posting_schedule(slots):
+    """Group slots into the agents' posting_schedule format (weekday -> ["HH:MM", ...])"""
+    schedule = {}
+    for slot in sorted(slots, key=lambda slot: (WEEKDAYS.index(slot['weekday']), slot['time'])):
+        schedule.setdefault(slot['weekday'], []).append(slot['time'])
+    return schedule
+
+
+def fit_from_history(metric=DEFAULT_SLOT_METRIC, days=DEFAULT_HISTORY_DAYS):
+    """Fit a SlotRecommender from the last `days` of PlatformAnalytics, one point per post and platform.
+
+    Views, likes, comments and shares are cumulative, so each post is scored by
+    its latest snapshot on a platform; averaging every snapshot would rank posts
+    that were sampled often while young below those sampled once, late.
+    """
+    latest = db.select(
+        PlatformAnalytics.content_id,
+        PlatformAnalytics.platform,
+        PlatformAnalytics.metric_value,
+        db.func.row_number().over(
+            partition_by=(PlatformAnalytics.content_id, PlatformAnalytics.platform),
+            order_by=(PlatformAnalytics.recorded_at.desc(), PlatformAnalytics.id.desc())
+        ).label('recency')
+    ).where(PlatformAnalytics.metric_name == metric).where(
+        PlatformAnalytics.recorded_at >= datetime.utcnow() - timedelta(days=days)
+    ).subquery()
+    posted_at = db.func.coalesce(ContentItem.published_at, ContentItem.scheduled_time)
+    rows = db.session.execute(
+        db.select(latest.c.platform, ContentItem.persona, posted_at, latest.c.metric_value)
+        .join(ContentItem, ContentItem.id == latest.c.content_id)
+        .where(latest.c.recency == 1)
+    ).all()
+
+    platforms, personas, slots, values = [], [], [], []
+    for platform, persona, moment, value in rows:
+        if moment is None or value is None:
+            continue
+        if isinstance(moment, str):
+            # coalesce() hands SQLite's stored text back untyped
+            moment = datetime.fromisoformat(moment)
+        platforms.append(platform)
+        personas.append(persona)
+        slots.append(moment.weekday() * 24 + moment.hour)
+        values.append(value)
+    return SlotRecommender.fit(platforms, personas, slots, values, metric)
@@ -0,0 +1,240 @@
+"""
+Query-plan regression tests for the coordination API.
+
+Drives the hot routes against a seeded SQLite database, records every
+statement they run, and checks each one with EXPLAIN QUERY PLAN: none may
+fall back to a full scan of the large tables.
+
+    python -m pytest src/api/tests
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event, text
+from src.database import init_database
+from src.models.user import db
+from src.models.agent import (
+    Agent, AgentMessage, ContentItem, ContentPlatform, ContentHashtag, PlatformAnalytics, content_tag_rows
+)
+from src.models.schema import upgrade_schema
+from src.notifications import init_message_hub
+from src.routes.agent import agent_bp
+
+# Tables that grow without bound; a plan step that reads one of them without an index fails the test
+LARGE_TABLES = ('agent_messages', 'content_items', 'platform_analytics')
+# A rowid range walks every row past the bound, whatever else the query filters on
+FULL_SCAN = re.compile(rf"^(SCAN ({'|'.join(LARGE_TABLES)})|SEARCH ({'|'.join(LARGE_TABLES)}) "
+                       rf"USING INTEGER PRIMARY KEY \(rowid[<>]=?\?\))$")
+
+# Statements allowed to walk a large table in primary-key order because they stop at a LIMIT,
+# identified by their text from FROM onwards
+PRIMARY_KEY_WALKS = (
+    # Analytics change feed, first and later pages
+    'FROM platform_analytics ORDER BY platform_analytics.id ASC LIMIT ? OFFSET ?',
+    'FROM platform_analytics WHERE platform_analytics.id > ? ORDER BY platform_analytics.id ASC LIMIT ? OFFSET ?',
+)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'app.db'}"
+    app.config['SYSTEM_STATUS_TTL'] = 0
+    app.register_blueprint(agent_bp, url_prefix='/api')
+    init_database(app, db)
+    init_message_hub(app)
+    with app.app_context():
+        db.create_all()
+        upgrade_schema()
+        _seed()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _seed():
+    now = datetime.utcnow()
+    db.session.add_all([
+        Agent(id=f'agent_{n}', name=f'Agent {n}', persona='creative_catalyst', primary_platforms=['instagram'],
+              content_types=['reel'], posting_frequency='daily')
+        for n in range(3)
+    ])
+    db.session.execute(db.insert(AgentMessage), [{
+        'sender_agent_id': f'agent_{n % 3}', 'receiver_agent_id': f'agent_{(n + 1) % 3}',
+        'message_type': 'task', 'payload': '{}', 'priority': n % 3,
+        'status': ('pending', 'processed', 'in_flight')[n % 3],
+        'created_at': now - timedelta(minutes=n), 'updated_at': now - timedelta(minutes=n)
+    } for n in range(300)])
+    content = [{
+        'id': f'content_{n}', 'creator_agent_id': f'agent_{n % 3}', 'persona': 'creative_catalyst',
+        'content_type': 'reel', 'title': 'Title', 'content_body': 'Body', 'hashtags': ['#ai'],
+        'target_platforms': ['instagram'], 'scheduled_time': now + timedelta(hours=n),
+        'status': ('draft', 'scheduled', 'published')[n % 3], 'created_at': now, 'updated_at': now
+    } for n in range(300)]
+    db.session.execute(db.insert(ContentItem), content)
+    for item in content:
+        platform_rows, hashtag_rows = content_tag_rows(item['id'], item['target_platforms'], item['hashtags'])
+        db.session.execute(db.insert(ContentPlatform), platform_rows)
+        db.session.execute(db.insert(ContentHashtag), hashtag_rows)
+    db.session.execute(db.insert(PlatformAnalytics), [{
+        'content_id': f'content_{n % 300}', 'platform': 'instagram', 'metric_name': 'views',
+        'metric_value': float(n), 'recorded_at': now
+    } for n in range(600)])
+    db.session.commit()
+    # Give the planner real statistics, as a long-running database would have
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+
+
+@pytest.fixture
+def statements(app):
+    """Every SELECT, UPDATE and DELETE the routes run while the test body executes"""
+    recorded = []
+    with app.app_context():
+        engine = db.engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+            recorded.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def _full_scans(app, recorded):
+    scans = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement, parameters in recorded:
+                details = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+                # A listed page read in key order is fine, unless it has to sort the whole table first
+                if ' '.join(statement.split()).endswith(PRIMARY_KEY_WALKS) and \
+                        not any(detail.startswith('USE TEMP B-TREE') for detail in details):
+                    continue
+                scans += [(detail, statement) for detail in details if FULL_SCAN.match(detail)]
+    return scans
+
+
+def _assert_indexed(app, recorded):
+    assert recorded, 'no statements were recorded'
+    scans = _full_scans(app, recorded)
+    assert not scans, '\n\n'.join(f'{detail}\n{statement}' for detail, statement in scans)
+
+
+def test_inbox_queries_use_indexes(app, statements):
+    client = app.test_client()
+    response = client.get('/api/messages/agent_1?limit=20')
+    assert response.status_code == 200
+    client.get(f"/api/messages/agent_1?limit=20&cursor={response.json['next_cursor']}")
+    client.get('/api/messages/agent_1?status=processed')
+    _assert_indexed(app, statements)
+
+
+def test_claim_ack_nack_use_indexes(app, statements):
+    client = app.test_client()
+    claimed = client.post('/api/messages/agent_1/claim?max=5').json
+    assert claimed['count'] == 5
+    ids = [message['id'] for message in claimed['messages']]
+    client.post('/api/messages/ack', json={'lease_token': claimed['lease_token'], 'message_ids': ids[:2]})
+    client.post('/api/messages/nack', json={'lease_token': claimed['lease_token'], 'message_ids': ids[2:]})
+    client.post('/api/messages/reap')
+    _assert_indexed(app, statements)
+
+
+def test_message_stream_uses_indexes(app, statements):
+    client = app.test_client()
+    for headers in ({}, {'Last-Event-ID': '150'}):
+        response = client.get('/api/messages/agent_1/stream', headers=headers, buffered=False)
+        assert response.status_code == 200
+        chunks = iter(response.response)
+        next(chunks)  # retry interval
+        assert next(chunks).startswith(b'id: ')
+        response.close()
+    _assert_indexed(app, statements)
+
+
+@pytest.mark.parametrize('query', [
+    '', 'status=scheduled', 'persona=creative_catalyst', 'creator_agent_id=agent_1',
+    'platform=instagram', 'hashtag=ai',
+])
+def test_content_listing_uses_indexes(app, statements, query):
+    client = app.test_client()
+    response = client.get(f'/api/content?limit=10&{query}')
+    assert response.status_code == 200
+    client.get(f"/api/content?limit=10&{query}&cursor={response.json['next_cursor']}")
+    _assert_indexed(app, statements)
+
+
+def test_analytics_and_change_feeds_use_indexes(app, statements):
+    client = app.test_client()
+    assert client.get('/api/analytics/content_7').status_code == 200
+    for source in ('analytics', 'messages', 'content'):
+        feed = client.get(f'/api/changes/{source}?limit=10').json
+        client.get(f"/api/changes/{source}?limit=10&since={feed['watermark']}")
+    _assert_indexed(app, statements)
+
+
+def test_system_status_uses_indexes(app, statements):
+    assert app.test_client().get('/api/system/status').status_code == 200
+    _assert_indexed(app, statements)
+
+
+def test_single_row_routes_use_indexes(app, statements):
+    client = app.test_client()
+    assert client.post('/api/agents', json={
+        'id': 'agent_new', 'name': 'New', 'persona': 'data_decoder', 'primary_platforms': ['linkedin'],
+        'content_types': ['article'], 'posting_frequency': 'daily'
+    }).status_code == 201
+    assert client.get('/api/agents?limit=2').status_code == 200
+    assert client.get('/api/agents/agent_1').status_code == 200
+    assert client.put('/api/agents/agent_1/status', json={'status': 'busy'}).status_code == 200
+    assert client.post('/api/messages', json={
+        'sender_agent_id': 'agent_0', 'receiver_agent_id': 'agent_1', 'message_type': 'task', 'payload': {}
+    }).status_code == 201
+    assert client.put('/api/messages/1/process', json={'response': {'ok': True}}).status_code == 200
+    assert client.post('/api/content', json={
+        'id': 'content_new', 'creator_agent_id': 'agent_1', 'persona': 'creative_catalyst', 'content_type': 'reel',
+        'title': 'Title', 'content_body': 'Body', 'target_platforms': ['instagram'], 'hashtags': ['#ai'],
+        'scheduled_time': datetime.utcnow().isoformat()
+    }).status_code == 201
+    assert client.put('/api/content/content_1/status', json={'status': 'published'}).status_code == 200
+    assert client.post('/api/analytics', json={
+        'content_id': 'content_1', 'platform': 'instagram', 'metrics': {'views': 10}
+    }).status_code == 201
+    assert client.post('/api/system/health', json={'component': 'api', 'status': 'healthy'}).status_code == 200
+    _assert_indexed(app, statements)
+
+
+def test_bulk_ingest_uses_indexes(app, statements):
+    client = app.test_client()
+    now = datetime.utcnow().isoformat()
+    assert client.post('/api/content/bulk', json=[{
+        'id': f'bulk_{n}', 'creator_agent_id': 'agent_2', 'persona': 'community_builder', 'content_type': 'reel',
+        'title': 'Title', 'content_body': 'Body', 'target_platforms': ['tiktok'], 'hashtags': ['#bulk'],
+        'scheduled_time': now
+    } for n in range(20)]).status_code == 201
+    assert client.post('/api/messages/bulk', json=[{
+        'sender_agent_id': 'agent_2', 'receiver_agent_id': 'agent_0', 'message_type': 'task', 'payload': {'n': n}
+    } for n in range(20)]).status_code == 201
+    assert client.post('/api/analytics/bulk', json=[{
+        'content_id': f'content_{n}', 'platform': 'instagram', 'metrics': {'views': n, 'likes': 1}, 'recorded_at': now
+    } for n in range(20)]).status_code == 201
+    _assert_indexed(app, statements)
+
+
+def test_dashboard_uses_indexes(app, statements):
+    client = app.test_client()
+    for days in (1, 30):
+        assert client.get(f'/api/dashboard/performance?days={days}').status_code == 200
+    _assert_indexed(app, statements)
+
+
+def test_posting_slots_use_indexes(app, statements):
+    response = app.test_client().get('/api/posting-slots/instagram?metric=views&persona=creative_catalyst')
+    assert response.status_code == 200
+    _assert_indexed(app, statements)